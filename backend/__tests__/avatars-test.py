@@ -0,0 +1,58 @@
+import io
+
+import pytest
+from fastapi import HTTPException
+from PIL import Image
+import v1.shared.avatars as avatars
+import v1.shared.image_store as image_store
+
+
+pytestmark = pytest.mark.usefixtures("image_store_refs")
+
+
+def _png(size=(300, 200)):
+    buffer = io.BytesIO()
+    Image.new("RGBA", size, (255, 0, 0, 128)).save(buffer, "PNG")
+    buffer.seek(0)
+    return buffer
+
+
+def _path(tmp_path, url):
+    return tmp_path / url[len(image_store.IMAGE_STORE_URL_PREFIX) + 1:]
+
+
+def test_store_avatar_writes_thumbnails(tmp_path):
+    url, thumbnails = avatars.store_avatar(_png())
+    assert url.startswith("/static/img/cas/") and url.endswith(".png")
+    assert set(thumbnails) == {"64", "256"}
+    with Image.open(_path(tmp_path, thumbnails["64"])) as thumbnail:
+        assert thumbnail.size == (64, 64)
+
+
+def test_store_avatar_rejects_non_images_and_oversized_uploads(monkeypatch):
+    with pytest.raises(HTTPException) as error:
+        avatars.store_avatar(io.BytesIO(b"not an image"))
+    assert error.value.status_code == 400
+
+    jpeg = io.BytesIO()
+    Image.new("RGB", (300, 200), (0, 128, 255)).save(jpeg, "JPEG")
+    with pytest.raises(HTTPException) as error:
+        avatars.store_avatar(io.BytesIO(jpeg.getvalue()[:len(jpeg.getvalue()) // 2]))
+    assert error.value.status_code == 400
+
+    monkeypatch.setattr(avatars, "MAX_AVATAR_BYTES", 100)
+    with pytest.raises(HTTPException) as error:
+        avatars.store_avatar(_png())
+    assert error.value.status_code == 413
+
+
+def test_identical_avatars_are_stored_once_and_released_by_reference(tmp_path):
+    first = avatars.store_avatar(_png())
+    second = avatars.store_avatar(_png())
+    assert first == second
+
+    avatars.release_avatar(*first)
+    assert _path(tmp_path, first[0]).exists()
+    avatars.release_avatar(*second)
+    assert not _path(tmp_path, first[0]).exists()
+    assert not _path(tmp_path, first[1]["64"]).exists()
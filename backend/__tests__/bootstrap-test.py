@@ -0,0 +1,28 @@
+import asyncio
+from v1.api.bootstrap import _parse_known, _section
+
+
+def test_parse_known_ignores_malformed_parts():
+    assert _parse_known("interests:abc, events:def,broken,:x") == {"interests": "abc", "events": "def"}
+    assert _parse_known(None) == {}
+
+
+def test_section_skips_loading_known_versions():
+    loads = []
+
+    def resolve():
+        return "v1", lambda: loads.append(1) or ["data"]
+
+    unchanged = asyncio.run(_section("interests", {"interests": "v1"}, resolve))
+    assert unchanged.unchanged and unchanged.data is None and loads == []
+
+    changed = asyncio.run(_section("interests", {"interests": "v0"}, resolve))
+    assert changed.version == "v1" and changed.data == ["data"] and loads == [1]
+
+
+def test_failing_section_is_empty():
+    def resolve():
+        raise RuntimeError("database down")
+
+    section = asyncio.run(_section("events", {}, resolve))
+    assert section.version is None and section.data is None
@@ -0,0 +1,69 @@
+import asyncio
+from v1.shared.broadcast import VersionBroadcaster
+
+
+def test_poke_publishes_new_version_to_all_subscribers():
+    version = {"value": 1}
+
+    async def run():
+        broadcaster = VersionBroadcaster("test", lambda: version["value"], poll_interval=60)
+        first = broadcaster.subscribe()
+        second = broadcaster.subscribe()
+        assert await asyncio.wait_for(first.queue.get(), 1) == 1
+        assert await asyncio.wait_for(second.queue.get(), 1) == 1
+
+        version["value"] = 2
+        broadcaster.poke()
+        assert await asyncio.wait_for(first.queue.get(), 1) == 2
+        assert await asyncio.wait_for(second.queue.get(), 1) == 2
+
+        broadcaster.unsubscribe(first)
+        broadcaster.unsubscribe(second)
+        broadcaster.poke()
+        await asyncio.sleep(0)
+
+    asyncio.run(run())
+
+
+def test_slow_subscriber_overflows_without_blocking_others():
+    async def run():
+        broadcaster = VersionBroadcaster("test", lambda: 0, poll_interval=60)
+        slow = broadcaster.subscribe(max_queue=2)
+        fast = broadcaster.subscribe(max_queue=10)
+        for version in range(1, 6):
+            broadcaster.publish(version)
+        assert slow.overflowed
+        assert not fast.overflowed
+        assert fast.queue.qsize() >= 5
+        broadcaster.unsubscribe(slow)
+        broadcaster.unsubscribe(fast)
+        broadcaster.poke()
+        await asyncio.sleep(0)
+
+    asyncio.run(run())
+
+
+def test_stream_does_not_repeat_the_token_sent_on_connect(monkeypatch):
+    import v1.events.events_stream as events_stream
+
+    class Request:
+        async def is_disconnected(self):
+            return False
+
+    async def run():
+        broadcaster = VersionBroadcaster("test", lambda: 3, poll_interval=60)
+        monkeypatch.setattr(events_stream, "event_changes_broadcaster", broadcaster)
+        monkeypatch.setattr(events_stream, "_read_event_changes_version", lambda: 3)
+        stream = events_stream.stream_event_changes(Request())
+        assert (await stream.__anext__()).startswith("retry:")
+        assert '"token": "3"' in await stream.__anext__()
+
+        # The broadcaster's first read publishes 3 again, then a change to 4
+        await asyncio.sleep(0.05)
+        broadcaster.publish(4)
+        assert '"token": "4"' in await asyncio.wait_for(stream.__anext__(), 1)
+        await stream.aclose()
+        broadcaster.poke()
+        await asyncio.sleep(0)
+
+    asyncio.run(run())
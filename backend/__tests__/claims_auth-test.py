@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+import v1.request_filter as request_filter
+import v1.token_handler as token_handler
+from v1.token_handler import create_access_token
+
+USER = {"userId": 7, "isMember": True, "settings": {"show_attendance": "NO_ONE"}}
+
+
+@pytest.fixture(autouse=True)
+def _secret(monkeypatch):
+    monkeypatch.setattr(token_handler, "get_or_create_jwt_secret", lambda: "test-secret")
+    request_filter._viewer_settings.clear()
+    token_handler._verified.clear()
+    token_handler._rejected.clear()
+
+
+def _authenticate(token):
+    bearer = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+    return asyncio.run(request_filter.validate_claims(bearer))
+
+
+def test_claims_token_skips_user_fetch_once_settings_are_known(monkeypatch):
+    fetches = []
+    monkeypatch.setattr(request_filter, "get_user", lambda user_id: fetches.append(user_id) or dict(USER))
+    token = create_access_token(7, USER)
+
+    assert _authenticate(token)["settings"] == USER["settings"]
+    viewer = _authenticate(token)
+    assert viewer == {"userId": 7, "isMember": True, "settings": USER["settings"]}
+    assert fetches == [7]
+
+
+def test_stale_settings_version_falls_back_to_fetch(monkeypatch):
+    fetches = []
+    changed = {**USER, "settings": {"show_attendance": "EVERYONE"}}
+    monkeypatch.setattr(request_filter, "get_user", lambda user_id: fetches.append(user_id) or dict(changed))
+    request_filter.remember_viewer(changed)
+    old_token = create_access_token(7, USER)
+
+    assert _authenticate(old_token)["settings"] == changed["settings"]
+    assert _authenticate(create_access_token(7))["settings"] == changed["settings"]
+    assert fetches == [7, 7]
+
+
+def test_invalid_token_is_rejected():
+    with pytest.raises(HTTPException) as error:
+        _authenticate("not-a-token")
+    assert error.value.status_code == 401
+
+
+def test_verified_tokens_are_decoded_once(monkeypatch):
+    token, expiry = token_handler.create_access_token_with_expiry(7)
+    decodes = []
+    original = token_handler.jwt.decode
+    monkeypatch.setattr(token_handler.jwt, "decode", lambda *args, **kwargs: decodes.append(1) or original(*args, **kwargs))
+
+    for _ in range(3):
+        valid, payload = token_handler.verify_access_token(token)
+        assert valid and payload["exp"] == int(expiry.timestamp())
+    assert token_handler.verify_refresh_token(token) == (False, "Invalid token type")
+    for _ in range(3):
+        assert token_handler.verify_access_token("garbage")[0] is False
+    assert len(decodes) == 2
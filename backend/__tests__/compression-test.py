@@ -0,0 +1,58 @@
+from fastapi import FastAPI, Response
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+import v1.compression_middleware as compression
+from v1.compression_middleware import CompressionMiddleware, choose_encoding
+
+BODY = b'{"description": "' + b"<p>Lorem ipsum</p>" * 200 + b'"}'
+
+
+def _client():
+    app = FastAPI()
+
+    @app.get("/catalog")
+    async def catalog():
+        return Response(BODY, media_type="application/json", headers={"ETag": '"v1"'})
+
+    @app.get("/small")
+    async def small():
+        return Response(b"{}", media_type="application/json")
+
+    @app.get("/stream")
+    async def stream():
+        async def events():
+            yield BODY
+            yield BODY
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    app.add_middleware(CompressionMiddleware)
+    return TestClient(app)
+
+
+def test_choose_encoding():
+    assert choose_encoding("gzip, deflate, br") == "br"
+    assert choose_encoding("gzip;q=1, br;q=0.5") == "gzip"
+    assert choose_encoding("identity") is None
+    assert choose_encoding(None) is None
+
+
+def test_compresses_once_per_etag(monkeypatch):
+    calls = []
+    original = compression.compress
+    monkeypatch.setattr(compression, "compress", lambda body, encoding: calls.append(encoding) or original(body, encoding))
+    client = _client()
+    for _ in range(2):
+        response = client.get("/catalog", headers={"Accept-Encoding": "br"})
+        assert response.headers["content-encoding"] == "br"
+        assert "Accept-Encoding" in response.headers["vary"]
+    assert calls == ["br"]
+    raw = client.get("/catalog", headers={"Accept-Encoding": "gzip"}).content
+    assert raw == BODY
+
+
+def test_small_and_streamed_responses_pass_through():
+    client = _client()
+    assert "content-encoding" not in client.get("/small", headers={"Accept-Encoding": "gzip"}).headers
+    response = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert response.content == BODY * 2
@@ -0,0 +1,17 @@
+import pytest
+import v1.shared.image_store as image_store
+
+
+@pytest.fixture
+def image_store_refs(tmp_path, monkeypatch):
+    """Point the image store at `tmp_path` and count its references in memory, by key."""
+    refs = {}
+    monkeypatch.setattr(image_store, "IMAGE_STORE_ROOT", str(tmp_path))
+    monkeypatch.setattr(image_store, "add_image_ref", lambda key: refs.__setitem__(key, refs.get(key, 0) + 1))
+
+    def release(key):
+        refs[key] -= 1
+        return refs[key] == 0
+    monkeypatch.setattr(image_store, "release_image_ref", release)
+    monkeypatch.setattr(image_store, "has_image_ref", lambda key: refs.get(key, 0) > 0)
+    return refs
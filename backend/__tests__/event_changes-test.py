@@ -0,0 +1,212 @@
+import datetime
+from types import SimpleNamespace
+
+import pytest
+import v1.db.data_versions as data_versions
+import v1.events.events_db as events_db
+from v1.db.data_versions import EVENT_CHANGES, committed_version
+
+
+class FakeVersions:
+    """The event_changes counter document, reserved and released like begin_version/end_version do."""
+
+    def __init__(self):
+        self.doc = {"_id": EVENT_CHANGES, "value": 0, "pending": []}
+
+    def find(self, query):
+        return [self.doc]
+
+    def begin(self, name):
+        self.doc["value"] += 1
+        self.doc["pending"].append({"version": self.doc["value"], "at": datetime.datetime.utcnow()})
+        return self.doc["value"]
+
+    def end(self, name, version):
+        self.doc["pending"] = [entry for entry in self.doc["pending"] if entry["version"] != version]
+
+
+class FakeEvents:
+    def __init__(self):
+        self.stamped = {}
+        self.during_write = {}
+
+    def find_one(self, query, projection=None):
+        return {"_id": "any"}
+
+    def update_many(self, query, update):
+        event_id = query["$and"][0]["_id"]["$in"][0]
+        hook = self.during_write.pop(event_id, None)
+        if hook:
+            hook()
+        self.stamped[event_id] = update["$set"]["version"]
+        return SimpleNamespace(modified_count=1)
+
+
+@pytest.fixture
+def stores(monkeypatch):
+    versions, events = FakeVersions(), FakeEvents()
+    monkeypatch.setattr(data_versions, "data_versions_collection", versions)
+    monkeypatch.setattr(events_db, "begin_version", versions.begin)
+    monkeypatch.setattr(events_db, "end_version", versions.end)
+    monkeypatch.setattr(events_db, "event_collection", events)
+    monkeypatch.setattr(events_db, "notify_event_changes", lambda: None)
+    return versions, events
+
+
+def _token():
+    return data_versions.get_versions([EVENT_CHANGES])[EVENT_CHANGES]
+
+
+def test_token_stays_below_a_slower_concurrent_write(stores):
+    versions, events = stores
+    tokens = []
+
+    def faster_writer():
+        events_db.delete_stored_events(["b"])
+        tokens.append(_token())
+
+    # Writer A reserves version 1, then writer B reserves and commits version 2 before A writes
+    events.during_write["a"] = faster_writer
+    events_db.delete_stored_events(["a"])
+
+    assert events.stamped == {"a": 1, "b": 2}
+    # While A was in flight the token must not pass it, or A's change would be skipped
+    assert tokens == [0]
+    assert _token() == 2
+
+
+def test_failed_reservation_does_not_write(stores, monkeypatch):
+    versions, events = stores
+
+    def fail(name):
+        raise RuntimeError("counter unavailable")
+    monkeypatch.setattr(events_db, "begin_version", fail)
+
+    with pytest.raises(RuntimeError):
+        events_db.delete_stored_events(["a"])
+    assert events.stamped == {}
+
+
+def test_abandoned_reservations_expire():
+    now = datetime.datetime(2026, 5, 1, 12, 0)
+    doc = {"value": 5, "pending": [
+        {"version": 3, "at": now - data_versions.PENDING_VERSION_TIMEOUT - datetime.timedelta(seconds=1)},
+        {"version": 5, "at": now},
+    ]}
+    assert committed_version(doc, now) == 4
+    assert committed_version({"value": 5}, now) == 5
+
+
+def _matches(doc, query):
+    for key, condition in query.items():
+        if key == "$and":
+            if not all(_matches(doc, part) for part in condition):
+                return False
+            continue
+        if key == "$or":
+            if not any(_matches(doc, part) for part in condition):
+                return False
+            continue
+        value = doc
+        for part in key.split("."):
+            value = [item.get(part) for item in value] if isinstance(value, list) else (value or {}).get(part)
+        values = value if isinstance(value, list) else [value]
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        for op, operand in condition.items():
+            checks = {
+                "$eq": lambda v: v == operand, "$ne": lambda v: v != operand, "$in": lambda v: v in operand,
+                "$gt": lambda v: v is not None and v > operand, "$gte": lambda v: v is not None and v >= operand,
+                "$lt": lambda v: v is not None and v < operand, "$lte": lambda v: v is not None and v <= operand,
+            }
+            if op == "$ne":
+                if not all(checks[op](v) for v in values):
+                    return False
+            elif not any(checks[op](v) for v in values):
+                return False
+    return True
+
+
+class Cursor(list):
+    def sort(self, keys):
+        return Cursor(sorted(self, key=lambda doc: tuple(doc[key] for key, _ in keys)))
+
+
+class QueryEvents:
+    """Stored unified events, answering the queries find_event_changes and touch_events_attended_by make."""
+
+    def __init__(self, docs):
+        self.docs = {doc["_id"]: doc for doc in docs}
+
+    def find(self, query, projection=None):
+        return Cursor(doc for doc in self.docs.values() if _matches(doc, query))
+
+    def find_one(self, query, projection=None):
+        return next(iter(self.find(query)), None)
+
+    def update_many(self, query, update):
+        matched = self.find(query)
+        for doc in matched:
+            doc.update(update["$set"])
+        return SimpleNamespace(modified_count=len(matched))
+
+
+def _stored(event_id, version, start, official=False, attendees=(), deleted=False):
+    doc = {"_id": event_id, "id": event_id, "name": "Event", "version": version, "start": start,
+           "official": official, "attendees": [{"userId": user_id} for user_id in attendees]}
+    if deleted:
+        doc["deleted"] = True
+    return doc
+
+
+def test_find_event_changes_deletes_events_outside_the_window(stores, monkeypatch):
+    versions, _ = stores
+    versions.doc["value"] = 5
+    now = datetime.datetime(2026, 5, 1, 12, 0)
+    window = {"$or": [{"official": True}, {"start": {"$gte": now - datetime.timedelta(days=30)}}]}
+    events = QueryEvents([
+        _stored("usr-current", 4, now),
+        # Edited to a start before the window
+        _stored("usr-moved", 5, now - datetime.timedelta(days=40)),
+        # Unchanged, but aged out of the window since the last sync
+        _stored("usr-aged", 2, now - datetime.timedelta(days=30, hours=12)),
+        _stored("usr-old", 1, now - datetime.timedelta(days=60)),
+        _stored("usr-gone", 5, now, deleted=True),
+    ])
+    monkeypatch.setattr(events_db, "event_collection", events)
+
+    left = {"official": False, "start": {"$gte": now - datetime.timedelta(days=31), "$lt": now - datetime.timedelta(days=30)}}
+    changed, deleted, current, reset = events_db.find_event_changes(3, window, left)
+    assert [event.id for event in changed] == ["usr-current"]
+    assert sorted(deleted) == ["usr-aged", "usr-gone", "usr-moved"]
+    assert (current, reset) == (5, False)
+
+
+def test_touch_events_attended_by_stamps_a_new_version(stores, monkeypatch):
+    versions, _ = stores
+    versions.doc["value"] = 4
+    now = datetime.datetime(2026, 5, 1, 12, 0)
+    events = QueryEvents([_stored("usr-a", 1, now, attendees=[7]), _stored("usr-b", 1, now, attendees=[8])])
+    monkeypatch.setattr(events_db, "event_collection", events)
+
+    assert events_db.touch_events_attended_by(7) == 1
+    assert events.docs["usr-a"]["version"] == 5
+    assert events.docs["usr-b"]["version"] == 1
+    assert events_db.touch_events_attended_by(9) == 0
+
+
+def test_attendance_privacy_change_touches_attended_events(monkeypatch):
+    import asyncio
+    import v1.api.users as users
+    from v1.db.models.user import UserSettings, UserUpdate
+
+    touched = []
+    monkeypatch.setattr(users, "update_user", lambda user_id, user: user)
+    monkeypatch.setattr(users, "remember_viewer", lambda user: None)
+    monkeypatch.setattr(users, "touch_events_attended_by", touched.append)
+    current = {"userId": 7, "settings": {"show_attendance": "MEMBERS_ONLY"}}
+
+    asyncio.run(users.update_current_user(UserUpdate(settings=UserSettings(show_attendance="MEMBERS_ONLY")), dict(current)))
+    assert touched == []
+    asyncio.run(users.update_current_user(UserUpdate(settings=UserSettings(show_attendance="NO_ONE")), dict(current)))
+    assert touched == [7]
@@ -0,0 +1,83 @@
+import datetime
+import io
+
+import requests_mock
+from PIL import Image
+import v1.external.event_images as event_images
+from v1.db.models.external_events import ExternalEventDetails
+from v1.events.events_mappers import map_external_event
+
+
+def _event(event_id, image_url):
+    start = datetime.datetime(2026, 5, 1, 18, 0)
+    return ExternalEventDetails(
+        eventId=event_id, eventDate=start, startTime="18:00", endTime="19:00", titel="Event",
+        description="", speaker="", location="", isFree=True, price=0, isLimited=False, stock=0,
+        showBooked=False, booked=0, imageUrl300=image_url, eventUrl="http://example.com/event",
+    )
+
+
+def _jpeg(width, height):
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), (0, 128, 255)).save(buffer, "JPEG")
+    return buffer.getvalue()
+
+
+def test_fetch_event_image_scales_down_wide_images():
+    with requests_mock.Mocker() as mock:
+        mock.get("http://upstream/big.jpg", content=_jpeg(1200, 800))
+        data = event_images.fetch_event_image("http://upstream/big.jpg")
+    with Image.open(io.BytesIO(data)) as image:
+        assert image.size == (600, 400)
+
+
+def test_cache_event_images_fetches_each_image_once_and_releases_unused(monkeypatch):
+    entries = {"http://upstream/gone.jpg": {"_id": "http://upstream/gone.jpg", "url": "/static/img/cas/old.jpg"}}
+    fetched, released, persisted = [], [], {}
+    monkeypatch.setattr(event_images, "get_event_images", lambda urls: {u: entries[u] for u in urls if u in entries})
+    monkeypatch.setattr(event_images, "store_event_image",
+                        lambda upstream, url, checked_at: entries.__setitem__(upstream, {"_id": upstream, "url": url, "checkedAt": checked_at}))
+    monkeypatch.setattr(event_images, "fetch_event_image", lambda url: fetched.append(url) or b"jpeg")
+    monkeypatch.setattr(event_images, "store_image_bytes", lambda data, extension: "/static/img/cas/new.jpg")
+    monkeypatch.setattr(event_images, "set_cached_image_urls", persisted.update)
+    monkeypatch.setattr(event_images, "release_image", released.append)
+
+    def remove_except(urls):
+        removed = [entry for key, entry in entries.items() if key not in urls]
+        for entry in removed:
+            del entries[entry["_id"]]
+        return removed
+    monkeypatch.setattr(event_images, "remove_event_images_except", remove_except)
+
+    events = [_event(1, "http://upstream/a.jpg"), _event(2, "http://upstream/a.jpg"), _event(3, None)]
+    event_images.cache_event_images(events)
+    event_images.cache_event_images(events)
+
+    assert fetched == ["http://upstream/a.jpg"]
+    assert released == ["/static/img/cas/old.jpg"]
+    assert persisted == {1: "/static/img/cas/new.jpg", 2: "/static/img/cas/new.jpg", 3: None}
+    assert map_external_event(events[0], current_user_id=1, booked_ids=set()).imageUrl == "/static/img/cas/new.jpg"
+
+
+def test_failed_lookup_aborts_without_fetching(monkeypatch):
+    import pytest
+    from pymongo.errors import PyMongoError
+
+    fetched = []
+
+    def unavailable(urls):
+        raise PyMongoError("connection lost")
+    monkeypatch.setattr(event_images, "get_event_images", unavailable)
+    monkeypatch.setattr(event_images, "fetch_event_image", lambda url: fetched.append(url) or b"jpeg")
+
+    with pytest.raises(PyMongoError):
+        event_images.cache_event_images([_event(1, "http://upstream/a.jpg")])
+    assert fetched == []
+
+
+def test_failed_images_are_due_after_the_retry_interval(monkeypatch):
+    checked_before = []
+    monkeypatch.setattr(event_images, "has_failed_event_images", lambda before: checked_before.append(before) or True)
+    assert event_images.event_images_due()
+    now = event_images.get_current_time().replace(tzinfo=None)
+    assert abs((now - checked_before[0]) - event_images.RETRY_FAILED_IMAGE_AFTER) < datetime.timedelta(seconds=5)
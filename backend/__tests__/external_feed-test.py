@@ -0,0 +1,77 @@
+import requests_mock
+import v1.external.event_api as event_api
+
+URL = "http://upstream/rest"
+FEED = {"events": [{
+    "eventId": 1, "startTime": "18:00", "endTime": "19:00", "titel": "Event", "description": "",
+    "speaker": "", "location": "", "isFree": True, "price": 0, "isLimited": False, "stock": 0,
+    "showBooked": False, "booked": 0, "imageUrl300": "", "eventUrl": "http://example.com/event",
+}]}
+
+
+def _stored(monkeypatch):
+    stored = []
+    monkeypatch.setattr(event_api, "store_external_event_details", lambda events: stored.extend(events) or True)
+    return stored
+
+
+def test_changed_feed_is_validated_stored_and_fingerprinted(monkeypatch):
+    stored = _stored(monkeypatch)
+    with requests_mock.Mocker() as mock:
+        mock.post(URL, json=FEED, headers={"ETag": '"v1"'})
+        feed = event_api.get_external_event_details(URL, "2026-05-01")
+    assert [event.eventId for event in feed.events] == [1]
+    assert feed.events[0].eventDate.isoformat() == "2026-05-01T18:00:00"
+    assert stored == feed.events
+    assert feed.fingerprint["_id"] == "2026-05-01"
+    assert feed.fingerprint["etag"] == '"v1"'
+
+
+def test_unchanged_feed_skips_validation_and_storage(monkeypatch):
+    stored = _stored(monkeypatch)
+    with requests_mock.Mocker() as mock:
+        mock.post(URL, json=FEED)
+        first = event_api.get_external_event_details(URL, "2026-05-01")
+        stored.clear()
+        monkeypatch.setattr(event_api, "validate_external_event_details", lambda events, date: 1 / 0)
+        again = event_api.get_external_event_details(URL, "2026-05-01", first.fingerprint)
+    assert again.events is None and again.fingerprint is None
+    assert stored == []
+
+
+def test_conditional_headers_are_sent_and_304_is_unchanged(monkeypatch):
+    stored = _stored(monkeypatch)
+    previous = {"_id": "2026-05-01", "fingerprint": "old", "etag": '"v1"', "lastModified": "Fri, 01 May 2026 10:00:00 GMT"}
+    with requests_mock.Mocker() as mock:
+        mock.post(URL, status_code=304)
+        feed = event_api.get_external_event_details(URL, "2026-05-01", previous)
+        request = mock.request_history[0]
+    assert request.headers["If-None-Match"] == '"v1"'
+    assert request.headers["If-Modified-Since"] == previous["lastModified"]
+    assert feed.events is None
+    assert stored == []
+
+
+def test_refresh_skips_when_only_a_failing_feed_has_no_fingerprint(monkeypatch):
+    from types import SimpleNamespace
+    import v1.jobs.refresh_events as refresh_events
+
+    synced = []
+    monkeypatch.setattr(refresh_events, "get_external_root",
+                        lambda: SimpleNamespace(restUrl=URL, dates=["2026-05-01", "2026-05-02"]))
+    monkeypatch.setattr(refresh_events, "get_feed_fingerprints", lambda: {"2026-05-01": {"_id": "2026-05-01"}})
+    # The first date is unchanged, the second keeps failing validation
+    monkeypatch.setattr(refresh_events, "get_external_event_details",
+                        lambda url, date, previous: event_api.ExternalEventFeed(date, None, None))
+    monkeypatch.setattr(refresh_events, "refresh_external_bookings", lambda: False)
+    monkeypatch.setattr(refresh_events, "event_images_due", lambda: False)
+    monkeypatch.setattr(refresh_events, "prune_tombstones", lambda: None)
+    monkeypatch.setattr(refresh_events, "get_stored_external_event_details_for_date", lambda date: [])
+    monkeypatch.setattr(refresh_events, "clean_external_events", lambda keeping: None)
+    monkeypatch.setattr(refresh_events, "cache_event_images", lambda events: None)
+    monkeypatch.setattr(refresh_events, "sync_external_events", synced.append)
+    monkeypatch.setattr(refresh_events, "store_feed_fingerprints", lambda fingerprints: None)
+    monkeypatch.setattr(refresh_events, "remove_feed_fingerprints_except", lambda dates: 0)
+
+    refresh_events.refresh_external_events()
+    assert synced == []
@@ -0,0 +1,60 @@
+import datetime
+from v1.google_maps_api.geocoder import CachedGeocoder, normalize_address
+from v1.google_maps_api.geolocation_model import GeoLocation
+
+
+class FakeGeocoder:
+    def __init__(self, known):
+        self.known = known
+        self.calls = []
+
+    def geocode(self, address):
+        self.calls.append(address)
+        return self.known.get(normalize_address(address))
+
+
+def _cached(backend, stored):
+    return CachedGeocoder(backend,
+                          load=stored.get,
+                          save=lambda key, location, expires_at: stored.__setitem__(key, {"location": location, "expiresAt": expires_at}))
+
+
+def test_normalize_address_folds_case_diacritics_and_whitespace():
+    assert normalize_address("  Götgatan   12,\tStockholm ") == normalize_address("gotgatan 12, STOCKHOLM")
+    assert normalize_address("Götgatan 12") == "gotgatan 12"
+
+
+def test_repeated_addresses_hit_the_cache():
+    location = GeoLocation(formatted_address="Götgatan 12, Stockholm", latitude=59.3, longitude=18.07)
+    backend = FakeGeocoder({"gotgatan 12, stockholm": location})
+    stored = {}
+    geocoder = _cached(backend, stored)
+
+    assert geocoder.geocode("Götgatan 12, Stockholm") == location
+    assert geocoder.geocode("GOTGATAN 12,  stockholm") == location
+    assert geocoder.geocode("Nowhere 1") is None
+    assert geocoder.geocode("nowhere 1") is None
+    assert len(backend.calls) == 2
+
+    # A new process reads the persisted entries
+    restarted = _cached(backend, stored)
+    assert restarted.geocode("götgatan 12, stockholm") == location
+    assert restarted.geocode("Nowhere 1") is None
+    assert len(backend.calls) == 2
+
+
+def test_expiry_is_utc_as_stored_by_pymongo():
+    location = GeoLocation(formatted_address="Götgatan 12, Stockholm", latitude=59.3, longitude=18.07)
+    backend = FakeGeocoder({"gotgatan 12, stockholm": location})
+    stored = {}
+    _cached(backend, stored).geocode("Götgatan 12, Stockholm")
+    assert stored["gotgatan 12, stockholm"]["expiresAt"].tzinfo is not None
+
+    # Pymongo reads naive UTC datetimes back
+    utc_now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+    stored["gotgatan 12, stockholm"] = {"location": location.model_dump(), "expiresAt": utc_now + datetime.timedelta(minutes=30)}
+    assert _cached(backend, stored).geocode("Götgatan 12, Stockholm") == location
+    assert len(backend.calls) == 1
+    stored["gotgatan 12, stockholm"]["expiresAt"] = utc_now - datetime.timedelta(minutes=30)
+    _cached(backend, stored).geocode("Götgatan 12, Stockholm")
+    assert len(backend.calls) == 2
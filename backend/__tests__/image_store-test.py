@@ -0,0 +1,55 @@
+import hashlib
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+import v1.shared.image_store as image_store
+from v1.shared.image_store import IMMUTABLE_CACHE_CONTROL, ImmutableStaticFiles
+
+
+def test_images_are_sharded_by_hash_and_served_immutable(tmp_path, image_store_refs):
+    data = b"\x89PNG fake image"
+    digest = hashlib.sha256(data).hexdigest()
+
+    url = image_store.store_image_bytes(data, ".png")
+    assert url == f"/static/img/cas/{digest[:2]}/{digest[2:4]}/{digest}.png"
+    assert [p.name for p in tmp_path.iterdir()] == [digest[:2]]
+
+    app = FastAPI()
+    app.mount("/static/img/cas", ImmutableStaticFiles(directory=str(tmp_path)))
+    client = TestClient(app)
+    response = client.get(url)
+    assert response.content == data
+    assert response.headers["etag"] == f'"{digest}"'
+    assert response.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+    assert client.get(url, headers={"If-None-Match": f'"{digest}"'}).status_code == 304
+
+
+def _path(tmp_path, url):
+    return tmp_path / url[len(image_store.IMAGE_STORE_URL_PREFIX) + 1:]
+
+
+def test_same_content_with_different_extensions_is_counted_per_file(tmp_path, image_store_refs):
+    jpg = image_store.store_image_bytes(b"same", ".jpg")
+    jpeg = image_store.store_image_bytes(b"same", ".jpeg")
+
+    image_store.release_image(jpg)
+    assert not _path(tmp_path, jpg).exists()
+    assert _path(tmp_path, jpeg).exists()
+    image_store.release_image(jpeg)
+    assert not _path(tmp_path, jpeg).exists()
+
+
+def test_release_keeps_file_stored_again_concurrently(tmp_path, monkeypatch, image_store_refs):
+    refs = image_store_refs
+    url = image_store.store_image_bytes(b"image", ".png")
+
+    def release_then_store_again(key):
+        refs[key] -= 1
+        # Another upload of the same image takes a reference right after the last one is dropped
+        refs[key] += 1
+        return True
+    monkeypatch.setattr(image_store, "release_image_ref", release_then_store_again)
+
+    image_store.release_image(url)
+    assert _path(tmp_path, url).read_bytes() == b"image"
+    assert [p.name for p in tmp_path.iterdir() if p.name.startswith(".")] == []
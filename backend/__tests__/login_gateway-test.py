@@ -0,0 +1,93 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+from v1.external.login_gateway import LoginGateway
+
+
+def test_identical_logins_share_one_upstream_call():
+    calls = []
+
+    def upstream():
+        calls.append(1)
+        time.sleep(0.05)
+        return {"memberId": 1}
+
+    async def run():
+        gateway = LoginGateway()
+        return await asyncio.gather(
+            gateway.login("authm", "ada", "secret", upstream),
+            gateway.login("authm", "ada", "secret", upstream),
+            gateway.login("authm", "ada", "other", upstream),
+        )
+
+    results = asyncio.run(run())
+    assert results[0] == results[1] == {"memberId": 1}
+    assert len(calls) == 2
+
+
+def test_saturated_gateway_answers_503_with_retry_after():
+    release = threading.Event()
+
+    async def run():
+        gateway = LoginGateway(max_concurrent=1, queue_timeout=0.05, retry_after=7)
+        slow = asyncio.ensure_future(gateway.login("authm", "a", "p", lambda: release.wait(1)))
+        await asyncio.sleep(0.01)
+        try:
+            with pytest.raises(HTTPException) as error:
+                await gateway.login("authm", "b", "p", lambda: None)
+        finally:
+            release.set()
+            await slow
+        return error.value
+
+    error = asyncio.run(run())
+    assert error.status_code == 503
+    assert error.headers == {"Retry-After": "7"}
+
+
+def test_upstream_errors_reach_every_joined_login():
+    def upstream():
+        time.sleep(0.02)
+        raise HTTPException(status_code=400, detail="Invalid credentials")
+
+    async def run():
+        gateway = LoginGateway()
+        return await asyncio.gather(
+            gateway.login("authb", "ada", "bad", upstream),
+            gateway.login("authb", "ada", "bad", upstream),
+            return_exceptions=True,
+        )
+
+    assert [e.status_code for e in asyncio.run(run())] == [400, 400]
+
+
+def test_cancelled_first_login_neither_fails_joined_logins_nor_frees_its_slot():
+    release = threading.Event()
+    running = []
+
+    def upstream():
+        running.append(1)
+        release.wait(1)
+        return {"memberId": 1}
+
+    async def run():
+        gateway = LoginGateway(max_concurrent=1, queue_timeout=1)
+        first = asyncio.ensure_future(gateway.login("authm", "ada", "secret", upstream))
+        joined = asyncio.ensure_future(gateway.login("authm", "ada", "secret", upstream))
+        await asyncio.sleep(0.05)
+        first.cancel()
+        await asyncio.sleep(0.01)
+        # The slot is still held by the running upstream call
+        other = asyncio.ensure_future(gateway.login("authm", "bob", "secret", lambda: len(running)))
+        await asyncio.sleep(0.05)
+        assert not other.done()
+        release.set()
+        return await joined, await other, first.cancelled()
+
+    joined, other, first_cancelled = asyncio.run(run())
+    assert joined == {"memberId": 1}
+    assert other == 1
+    assert first_cancelled
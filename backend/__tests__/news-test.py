@@ -0,0 +1,90 @@
+import datetime
+
+import pytz
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import v1.api.news as news
+import v1.db.event_site_news as event_site_news
+from v1.db.models.event_site_news import EventSiteNews
+from v1.request_filter import validate_token
+
+
+def _news(day, title):
+    item = EventSiteNews(date="2026-05-01", time="10:00", title=title, description="Text", by="Board")
+    item.date = datetime.datetime(2026, 5, day, 10, 0)
+    return item
+
+
+def _client(monkeypatch, versions, documents):
+    monkeypatch.setattr(news, "get_versions", lambda names: {name: versions[-1] for name in names})
+    monkeypatch.setattr(news, "get_stored_news", lambda: documents())
+    monkeypatch.setattr(news, "news_snapshot", news.NewsSnapshot(check_interval=0))
+    app = FastAPI()
+    app.include_router(news.news_v1)
+    app.dependency_overrides[validate_token] = lambda: {"userId": 1}
+    return TestClient(app)
+
+
+def test_news_document_is_keyed_by_content():
+    first = event_site_news.news_document(_news(1, "Welcome"))
+    assert first == event_site_news.news_document(_news(1, "Welcome"))
+    assert first["_id"] != event_site_news.news_document(_news(1, "Welcome!"))["_id"]
+    unparsed = EventSiteNews(date="2026-05-01", time="10:00", description="Text", by="Board")
+    assert event_site_news.news_document(unparsed) is None
+
+
+def test_get_news_reloads_only_when_the_version_changes(monkeypatch):
+    versions, loads = [1], []
+    stored = [event_site_news.news_document(_news(2, "Second")), event_site_news.news_document(_news(1, "First"))]
+    client = _client(monkeypatch, versions, lambda: loads.append(1) or stored)
+
+    response = client.get("/v1/news")
+    assert [item["title"] for item in response.json()] == ["Second", "First"]
+    etag = response.headers["etag"]
+    assert client.get("/v1/news", headers={"If-None-Match": etag}).status_code == 304
+    assert len(loads) == 1
+
+    versions.append(2)
+    response = client.get("/v1/news", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert len(loads) == 2
+
+
+def test_get_news_since_filters_by_publication_time(monkeypatch):
+    stored = [event_site_news.news_document(_news(2, "Second")), event_site_news.news_document(_news(1, "First"))]
+    client = _client(monkeypatch, [1], lambda: stored)
+
+    response = client.get("/v1/news", params={"since": "2026-05-01T10:00:00"})
+    assert [item["title"] for item in response.json()] == ["Second"]
+    # 09:00 UTC is 11:00 in Stockholm, after the first item
+    since = datetime.datetime(2026, 5, 1, 9, 0, tzinfo=pytz.utc).isoformat()
+    assert [item["title"] for item in client.get("/v1/news", params={"since": since}).json()] == ["Second"]
+    assert len(client.get("/v1/news").json()) == 2
+
+
+def test_empty_feed_clears_stored_news_and_bumps_version(monkeypatch):
+    import requests_mock
+    from types import SimpleNamespace
+    import v1.jobs.refresh_news as refresh_news
+
+    class FakeCollection:
+        def __init__(self):
+            self.ids = {"old"}
+
+        def delete_many(self, query):
+            removed = {i for i in self.ids if i not in query["_id"]["$nin"]}
+            self.ids -= removed
+            return SimpleNamespace(deleted_count=len(removed))
+
+    collection, bumped = FakeCollection(), []
+    monkeypatch.setattr(event_site_news, "event_site_news_collection", collection)
+    monkeypatch.setattr(refresh_news, "get_external_root", lambda: SimpleNamespace(restUrl="http://upstream/rest"))
+    monkeypatch.setattr(refresh_news, "bump_version", bumped.append)
+
+    with requests_mock.Mocker() as mock:
+        mock.post("http://upstream/rest", json={"news": []})
+        refresh_news.refresh_external_news()
+    assert collection.ids == set()
+    assert bumped == ["news"]
@@ -0,0 +1,47 @@
+from datetime import datetime
+
+from bson import ObjectId
+from v1.db.models.user import User
+from v1.shared.responses import dumps
+from v1.shared.model_with_id import ModelWithId
+from fastapi.encoders import jsonable_encoder
+import json
+
+
+class _Stored(ModelWithId):
+    name: str
+    when: datetime
+
+
+def test_dumps_matches_pydantic_encoding():
+    stored = _Stored(id=ObjectId("65f000000000000000000001"), name="a", when=datetime(2026, 5, 1, 12, 0))
+    assert json.loads(dumps([stored])) == [json.loads(stored.model_dump_json(by_alias=True))]
+    assert json.loads(dumps({"_id": ObjectId("65f000000000000000000001")})) == {"_id": "65f000000000000000000001"}
+
+
+def test_dumps_user_matches_fastapi_encoding():
+    user = User.model_validate({"userId": 2, "firstName": "Ada", "lastName": "L", "settings": {}})
+    assert json.loads(dumps(user)) == jsonable_encoder(user)
+
+
+def test_msgpack_decodes_to_the_json_payload():
+    import msgpack
+    from v1.shared.responses import packb
+
+    stored = _Stored(id=ObjectId("65f000000000000000000001"), name="a", when=datetime(2026, 5, 1, 12, 0))
+    content = {"items": [stored], "at": datetime(2026, 5, 1, 12, 0)}
+    assert msgpack.unpackb(packb(content)) == json.loads(dumps(content))
+
+
+def test_preferred_media_type():
+    from starlette.requests import Request
+    from v1.shared.responses import JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE, preferred_media_type, variant_etag
+
+    def prefer(accept):
+        return preferred_media_type(Request({"type": "http", "headers": [(b"accept", accept.encode())]}))
+
+    assert prefer("application/msgpack") == MSGPACK_MEDIA_TYPE
+    assert prefer("application/json, application/msgpack;q=0.5") == JSON_MEDIA_TYPE
+    assert prefer("*/*") == JSON_MEDIA_TYPE
+    assert variant_etag('"abc"', MSGPACK_MEDIA_TYPE) == '"abc-msgpack"'
+    assert variant_etag('"abc"', JSON_MEDIA_TYPE) == '"abc"'
@@ -0,0 +1,27 @@
+from typing import List
+from starlette.requests import Request
+from v1.api.interests import INTEREST_CATEGORIES, INTEREST_CATEGORIES_PAYLOAD, InterestCategory
+from v1.shared.static_payload import StaticPayload
+
+
+def _request(headers=None):
+    raw = [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw})
+
+
+def test_payload_body_matches_model_serialization():
+    expected = b"[" + b",".join(c.model_dump_json().encode() for c in INTEREST_CATEGORIES) + b"]"
+    assert INTEREST_CATEGORIES_PAYLOAD.body == expected
+
+
+def test_payload_serves_304_for_matching_etag():
+    payload = StaticPayload([InterestCategory(category="Musik", items=[])], List[InterestCategory])
+    full = payload.response(_request())
+    assert full.status_code == 200
+    assert full.body == payload.body
+    assert full.headers["etag"] == payload.etag
+    assert "max-age" in full.headers["cache-control"]
+
+    cached = payload.response(_request({"If-None-Match": payload.etag}))
+    assert cached.status_code == 304
+    assert cached.body == b""
@@ -4,6 +4,7 @@ from v1.events.events_service import list_unified_events
 from v1.db.models.external_events import ExternalEventDetails, Category
 from v1.user_events.user_events_model import ExtendedUserEvent, UserEvent, Attendee, Host, Location
 from v1.events.events_model import Event, EventAttendee
+from v1.events.events_db import build_external_event, build_user_event
 
 class DummyExtendedUserEvent(ExtendedUserEvent):
     pass
@@ -165,6 +166,7 @@ def test_delete_booking(monkeypatch):
             deleted.append(f)
 
     monkeypatch.setattr(eb, "external_event_bookings_collection", FakeCol())
+    monkeypatch.setattr(eb, "_booking_changed", lambda eventId: None)
     eb.delete_booking(userId=5, eventId=99)
     assert deleted == [{"userId": 5, "eventId": 99}]
 
@@ -197,11 +199,9 @@ def test_list_unified_events_populates_attendees_when_show_booked(monkeypatch):
     ext = make_external_event(300, booked=1)
     ext.showBooked = True
 
-    monkeypatch.setattr(svc, "get_booked_external_events", lambda uid: [])
-    monkeypatch.setattr(svc, "get_all_stored_external_event_details", lambda: [ext])
-    monkeypatch.setattr(svc, "get_safe_user_events_since", lambda since: [])
+    stored = build_external_event(ext, {42}, {})
+    monkeypatch.setattr(svc, "find_stored_events", lambda query, **kwargs: [stored])
     monkeypatch.setattr(svc, "get_users_by_ids", lambda ids: [])
-    monkeypatch.setattr(svc, "get_bookings_by_event_ids", lambda ids: {300: {42}})
 
     current_user = {"userId": 1, "isMember": True, "settings": {}}
     events = svc.list_unified_events(current_user)
@@ -217,11 +217,9 @@ def test_list_unified_events_no_attendees_when_show_booked_false_and_not_admin(m
     ext.showBooked = False
     ext.admins = None
 
-    monkeypatch.setattr(svc, "get_booked_external_events", lambda uid: [])
-    monkeypatch.setattr(svc, "get_all_stored_external_event_details", lambda: [ext])
-    monkeypatch.setattr(svc, "get_safe_user_events_since", lambda since: [])
+    stored = build_external_event(ext, {42}, {})
+    monkeypatch.setattr(svc, "find_stored_events", lambda query, **kwargs: [stored])
     monkeypatch.setattr(svc, "get_users_by_ids", lambda ids: [])
-    monkeypatch.setattr(svc, "get_bookings_by_event_ids", lambda ids: {301: {42}})
 
     current_user = {"userId": 1, "isMember": True, "settings": {}}
     events = svc.list_unified_events(current_user)
@@ -237,11 +235,9 @@ def test_list_unified_events_admin_sees_attendees_even_if_show_booked_false(monk
     ext.showBooked = False
     ext.admins = ["99"]  # userId 99 is admin
 
-    monkeypatch.setattr(svc, "get_booked_external_events", lambda uid: [])
-    monkeypatch.setattr(svc, "get_all_stored_external_event_details", lambda: [ext])
-    monkeypatch.setattr(svc, "get_safe_user_events_since", lambda since: [])
+    stored = build_external_event(ext, {7, 8}, {})
+    monkeypatch.setattr(svc, "find_stored_events", lambda query, **kwargs: [stored])
     monkeypatch.setattr(svc, "get_users_by_ids", lambda ids: [])
-    monkeypatch.setattr(svc, "get_bookings_by_event_ids", lambda ids: {302: {7, 8}})
 
     current_user = {"userId": 99, "isMember": True, "settings": {}}
     events = svc.list_unified_events(current_user)
@@ -250,6 +246,241 @@ def test_list_unified_events_admin_sees_attendees_even_if_show_booked_false(monk
     assert {a.userId for a in ext_events[0].attendees} == {7, 8}
 
 
+def test_list_unified_events_attending_follows_stored_bookings(monkeypatch):
+    import v1.events.events_service as svc
+
+    ext = make_external_event(303, booked=1)
+    ext.showBooked = False
+    stored = build_external_event(ext, {5}, {5: "Booker"})
+    monkeypatch.setattr(svc, "find_stored_events", lambda query, **kwargs: [stored])
+    monkeypatch.setattr(svc, "get_users_by_ids", lambda ids: [])
+
+    booker = svc.list_unified_events({"userId": 5, "isMember": True, "settings": {}})
+    assert booker[0].attending is True
+    other = svc.list_unified_events({"userId": 6, "isMember": True, "settings": {}})
+    assert other[0].attending is False
+    assert other[0].attendees == []
+    assert other[0].extras["attendeeNames"] == []
+    assert other[0].attendeeCount == 1
+
+
+def test_list_unified_events_page_follows_cursor_through_filtered_events(monkeypatch):
+    import v1.events.events_service as svc
+    from v1.events.events_db import sort_key
+
+    stored = sorted(
+        (build_user_event(make_user_event(f"507f191e810c19729de860{i:02d}", owner_id=2,
+                                          start_offset_hours=10 + i,
+                                          attendees=[Attendee(userId=1)] if i % 2 else []))
+         for i in range(7)),
+        key=sort_key,
+    )
+
+    def fake_find(query, after=None, limit=None, projection=None):
+        rows = [e for e in stored if after is None or sort_key(e) > after]
+        return rows[:limit] if limit else rows
+
+    monkeypatch.setattr(svc, "find_stored_events", fake_find)
+    monkeypatch.setattr(svc, "get_users_by_ids", lambda ids: [])
+    viewer = {"userId": 1, "isMember": True, "settings": {}}
+
+    seen = []
+    cursor = None
+    while True:
+        page, cursor = svc.list_unified_events_page(viewer, attending=True, limit=2, cursor=cursor)
+        seen.extend(e.id for e in page)
+        if not cursor:
+            break
+    assert seen == [e.id for e in stored if any(a.userId == 1 for a in e.attendees)]
+
+
+def test_list_unified_events_page_caps_page_filled_across_batches(monkeypatch):
+    import v1.events.events_service as svc
+    from v1.events.events_db import sort_key
+
+    # The viewer attends all but the third event; the second batch is short
+    stored = sorted(
+        (build_user_event(make_user_event(f"507f191e810c19729de861{i:02d}", owner_id=2,
+                                          start_offset_hours=10 + i,
+                                          attendees=[] if i == 2 else [Attendee(userId=1)]))
+         for i in range(5)),
+        key=sort_key,
+    )
+
+    def fake_find(query, after=None, limit=None, projection=None):
+        rows = [e for e in stored if after is None or sort_key(e) > after]
+        return rows[:limit] if limit else rows
+
+    monkeypatch.setattr(svc, "find_stored_events", fake_find)
+    monkeypatch.setattr(svc, "get_users_by_ids", lambda ids: [])
+    viewer = {"userId": 1, "isMember": True, "settings": {}}
+
+    page, cursor = svc.list_unified_events_page(viewer, attending=True, limit=3)
+    assert [e.id for e in page] == [stored[0].id, stored[1].id, stored[3].id]
+    assert cursor
+    rest, cursor = svc.list_unified_events_page(viewer, attending=True, limit=3, cursor=cursor)
+    assert [e.id for e in rest] == [stored[4].id]
+    assert cursor is None
+
+
+def test_decode_cursor_rejects_garbage():
+    import pytest
+    from fastapi import HTTPException
+    import v1.events.events_service as svc
+
+    key = (datetime.datetime(2025, 11, 10, 9, 0), "opening", "ext1")
+    assert svc.decode_cursor(svc.encode_cursor(key)) == key
+    with pytest.raises(HTTPException):
+        svc.decode_cursor("not-a-cursor")
+
+
+def test_build_user_event_denormalizes_names_and_counts():
+    ue = make_user_event("507f191e810c19729de860eb", owner_id=2,
+                         attendees=[Attendee(userId=3)], max_attendees=1)
+    stored = build_user_event(ue)
+    assert stored.id == "usr507f191e810c19729de860eb"
+    assert stored.hosts[0].fullName == "Owner Name"
+    assert stored.attendeeCount == 1
+    assert stored.hasCapacity is False
+    assert stored.attending is False
+
+
+def test_store_events_skips_unchanged_events(monkeypatch):
+    import v1.events.events_db as edb
+
+    class FakeCol:
+        def __init__(self):
+            self.docs = {}
+
+        def find(self, query, projection=None):
+            ids = query["_id"]["$in"]
+            return [d for i, d in self.docs.items() if i in ids and not d.get("deleted")]
+
+        def bulk_write(self, ops, ordered=True):
+            for op in ops:
+                doc = op._doc
+                self.docs[doc["_id"]] = doc
+
+    versions = iter(range(1, 100))
+    monkeypatch.setattr(edb, "event_collection", FakeCol())
+    monkeypatch.setattr(edb, "begin_version", lambda name: next(versions))
+    monkeypatch.setattr(edb, "end_version", lambda name, version: None)
+
+    a = build_user_event(make_user_event("507f191e810c19729de860a1", owner_id=2))
+    b = build_user_event(make_user_event("507f191e810c19729de860b2", owner_id=2))
+    assert edb.store_events([a, b]) == [a.id, b.id]
+    assert edb.store_events([a, b]) == []
+
+    renamed = b.model_copy(update={"name": "Renamed"})
+    assert edb.store_events([a, renamed]) == [b.id]
+    assert edb.event_collection.docs[a.id]["version"] == 1
+    assert edb.event_collection.docs[b.id]["version"] == 2
+
+
+def test_list_event_changes_overlays_viewer_and_returns_token(monkeypatch):
+    import pytest
+    from fastapi import HTTPException
+    import v1.events.events_service as svc
+
+    stored = build_external_event(make_external_event(404, booked=1), {5}, {5: "Booker"})
+    calls = []
+
+    def fake_changes(since, query=None, left_query=None):
+        calls.append(since)
+        return [stored], ["usr507f191e810c19729de860ea"], 12, False
+
+    monkeypatch.setattr(svc, "find_event_changes", fake_changes)
+    monkeypatch.setattr(svc, "get_users_by_ids", lambda ids: [])
+    viewer = {"userId": 5, "isMember": True, "settings": {}}
+
+    first = svc.list_event_changes(viewer)
+    assert first.reset is True
+    changes = svc.list_event_changes(viewer, since=first.token)
+    assert calls == [0, 12]
+    assert changes.events[0].attending is True
+    assert changes.deleted == ["usr507f191e810c19729de860ea"]
+    assert changes.token.startswith("12.")
+    assert changes.reset is False
+    with pytest.raises(HTTPException):
+        svc.list_event_changes(viewer, since="abc")
+
+
+def test_list_event_changes_resets_when_the_viewer_or_their_settings_differ(monkeypatch):
+    import v1.events.events_service as svc
+
+    calls = []
+    monkeypatch.setattr(svc, "find_event_changes", lambda since, query=None, left_query=None: calls.append(since) or ([], [], 12, False))
+    viewer = {"userId": 5, "isMember": True, "settings": {"show_attendance": "MEMBERS_ONLY"}}
+    token = svc.list_event_changes(viewer).token
+
+    # The viewer's own attendance setting decides the reciprocal privacy rules
+    hidden = {**viewer, "settings": {"show_attendance": "NO_ONE"}}
+    assert svc.list_event_changes(hidden, since=token).reset is True
+    assert svc.list_event_changes({**viewer, "userId": 6}, since=token).reset is True
+    # Tokens from before viewer fingerprints are no longer trusted
+    assert svc.list_event_changes(viewer, since="12").reset is True
+    assert svc.list_event_changes(viewer, since=token).reset is False
+    assert calls == [0, 0, 0, 0, 12]
+
+
+def test_list_event_changes_deletes_user_events_that_left_the_window(monkeypatch):
+    import v1.events.events_service as svc
+
+    left_queries = []
+    monkeypatch.setattr(svc, "find_event_changes",
+                        lambda since, query=None, left_query=None: left_queries.append(left_query) or ([], [], 12, False))
+    viewer = {"userId": 5, "isMember": True, "settings": {}}
+    token = svc.list_event_changes(viewer).token
+    issued_window = svc._decode_sync_token(token)[1]
+
+    later = svc.get_current_time() + datetime.timedelta(days=2)
+    monkeypatch.setattr(svc, "get_current_time", lambda: later)
+    svc.list_event_changes(viewer, since=token)
+    window_start = (later - svc.USER_EVENT_LOOKBACK).replace(tzinfo=None, second=0, microsecond=0)
+    assert left_queries == [None, {"official": False, "start": {"$gte": issued_window, "$lt": window_start}}]
+
+
+def test_compact_page_returns_summaries_without_details(monkeypatch):
+    import v1.events.events_service as svc
+    from v1.events.events_model import EventSummary
+
+    stored = build_external_event(make_external_event(505, booked=1), {5}, {5: "Booker"})
+    projections = []
+
+    def fake_find(query, after=None, limit=None, projection=None):
+        projections.append(projection)
+        return [stored]
+
+    monkeypatch.setattr(svc, "find_stored_events", fake_find)
+    monkeypatch.setattr(svc, "get_users_by_ids", lambda ids: (_ for _ in ()).throw(AssertionError("not needed")))
+
+    page, _ = svc.list_unified_events_page({"userId": 5, "isMember": True, "settings": {}}, compact=True)
+    assert isinstance(page[0], EventSummary)
+    assert page[0].attending is True
+    assert page[0].attendeeCount == 1
+    assert "description" not in page[0].model_dump()
+    assert projections[0]["description"] == 0
+
+
+def test_get_unified_event_looks_up_one_event(monkeypatch):
+    import pytest
+    from fastapi import HTTPException
+    import v1.events.events_service as svc
+
+    stored = build_external_event(make_external_event(606), set(), {})
+    monkeypatch.setattr(svc, "get_stored_event", lambda eid: stored if eid == "ext606" else None)
+    monkeypatch.setattr(svc, "get_users_by_ids", lambda ids: [])
+    viewer = {"userId": 5, "isMember": True, "settings": {}}
+
+    assert svc.get_unified_event("ext606", viewer).id == "ext606"
+    with pytest.raises(HTTPException) as missing:
+        svc.get_unified_event("ext607", viewer)
+    assert missing.value.status_code == 404
+    with pytest.raises(HTTPException) as invalid:
+        svc.get_unified_event("abc", viewer)
+    assert invalid.value.status_code == 400
+
+
 # ── book/unbook booking sync tests ──────────────────────────────────────────
 
 def test_attend_external_event_syncs_booking(monkeypatch):
@@ -259,13 +490,14 @@ def test_attend_external_event_syncs_booking(monkeypatch):
     added = []
 
     monkeypatch.setattr(svc, "book_external_event", lambda uid, eid: {"status": "OK"})
-    monkeypatch.setattr(svc, "get_all_stored_external_event_details", lambda: [ext])
-    monkeypatch.setattr(svc, "get_booked_external_events", lambda uid: [])
+    monkeypatch.setattr(svc, "get_stored_external_event_detail", lambda eid: ext if eid == 400 else None)
     monkeypatch.setattr(svc, "add_booking", lambda userId, eventId: added.append((userId, eventId)))
 
     current_user = {"userId": 5, "settings": {}, "isMember": True}
-    svc._attend_external_event("ext400", current_user)
+    event = svc._attend_external_event("ext400", current_user)
     assert (5, 400) in added
+    assert event.id == "ext400"
+    assert event.attending is True
 
 
 def test_unattend_external_event_syncs_booking(monkeypatch):
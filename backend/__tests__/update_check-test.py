@@ -0,0 +1,58 @@
+import json
+import os
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from v1.update_check_middleware import PolicyStore, UpdateCheckMiddleware
+
+POLICY = {"MobileUpdatePolicy": {"Apps": {"se.app": {"Android": {
+    "StoreUrl": "https://store/app",
+    "LatestVersion": "2.1.5",
+    "MinSupportedVersion": "2.1.1",
+    "LatestBuildNumber": 31,
+}}}}}
+
+
+def _client(tmp_path, policy=POLICY):
+    path = tmp_path / "policy.json"
+    path.write_text(json.dumps(policy))
+    store = PolicyStore(str(path), check_interval=0)
+    app = FastAPI()
+
+    @app.get("/v1/ping")
+    async def ping():
+        return {"ok": True}
+
+    app.add_middleware(UpdateCheckMiddleware, policy_store=store)
+    return TestClient(app), path
+
+
+def _headers(version, build=1, app="se.app"):
+    return {"x-application-id": app, "x-app-version": version, "x-build-number": str(build), "x-phone-os": "android"}
+
+
+def test_update_headers_and_required_response(tmp_path):
+    client, _ = _client(tmp_path)
+    response = client.get("/v1/ping", headers=_headers("2.1.4"))
+    assert response.json() == {"ok": True}
+    assert response.headers["x-update-available"] == "true"
+    assert response.headers["x-latest-version"] == "2.1.5"
+    assert response.headers["x-latest-build"] == "31"
+    assert response.headers["x-store-url"] == "https://store/app"
+
+    assert "x-update-available" not in client.get("/v1/ping", headers=_headers("2.1.5", 31)).headers
+    assert "x-update-available" not in client.get("/v1/ping", headers=_headers("2.1.4", app="other")).headers
+
+    required = client.get("/v1/ping", headers=_headers("2.0.0"))
+    assert required.status_code == 418
+    assert required.json()["updateRequired"] is True
+
+
+def test_policy_reloads_when_file_changes(tmp_path):
+    client, path = _client(tmp_path)
+    assert client.get("/v1/ping", headers=_headers("2.1.2")).status_code == 200
+    stricter = json.loads(json.dumps(POLICY))
+    stricter["MobileUpdatePolicy"]["Apps"]["se.app"]["Android"]["MinSupportedVersion"] = "2.1.5"
+    path.write_text(json.dumps(stricter))
+    os.utime(path, (1, 1))
+    assert client.get("/v1/ping", headers=_headers("2.1.2")).status_code == 418
@@ -0,0 +1,69 @@
+import datetime
+import v1.api.user_locations as user_locations
+from v1.api.user_locations import LocationSession, in_viewport
+
+VIEWER = {"userId": 1, "isMember": True, "settings": {"show_location": "MEMBERS_ONLY"}}
+STOCKHOLM = (59.0, 60.0, 17.5, 18.5)
+
+
+def _doc(user_id, lat, lng, show_location="MEMBERS_ONLY", show_profile="MEMBERS_ONLY"):
+    return {
+        "userId": user_id,
+        "location": {"latitude": lat, "longitude": lng, "accuracy": 5.0,
+                     "timestamp": datetime.datetime(2025, 11, 10, 9, 0)},
+        "settings": {"show_location": show_location, "show_profile": show_profile},
+    }
+
+
+def test_session_filters_by_viewport_and_privacy():
+    session = LocationSession(VIEWER)
+    session.viewport = STOCKHOLM
+    updates, removed = session.apply([
+        _doc(1, 59.3, 18.0),
+        _doc(2, 59.3, 18.0),
+        _doc(3, 57.7, 11.9),
+        _doc(4, 59.3, 18.0, show_location="NO_ONE"),
+        _doc(5, 59.3, 18.0, show_profile="NO_ONE"),
+    ])
+    assert [u["userId"] for u in updates] == [2]
+    assert removed == []
+
+
+def test_session_reports_users_leaving_the_viewport():
+    session = LocationSession(VIEWER)
+    session.viewport = STOCKHOLM
+    session.apply([_doc(2, 59.3, 18.0)])
+    updates, removed = session.apply([_doc(2, 57.7, 11.9), _doc(3, 57.7, 11.9)])
+    assert updates == []
+    assert removed == [2]
+
+
+def test_session_without_viewport_sends_nothing():
+    assert LocationSession(VIEWER).apply([_doc(2, 59.3, 18.0)]) == ([], [])
+
+
+def test_in_viewport_across_antimeridian():
+    assert in_viewport({"latitude": 0, "longitude": 179.5}, (-1, 1, 179, -179))
+    assert in_viewport({"latitude": 0, "longitude": -179.5}, (-1, 1, 179, -179))
+    assert not in_viewport({"latitude": 0, "longitude": 0}, (-1, 1, 179, -179))
+
+
+def test_feed_removes_users_who_stop_sharing_their_location(monkeypatch):
+    monkeypatch.setattr(user_locations, "_watermark", None)
+    monkeypatch.setattr(user_locations, "_last_timestamps", {})
+    stored = [_doc(2, 59.3, 18.0)]
+    monkeypatch.setattr(user_locations, "get_location_updates", lambda since: [dict(doc) for doc in stored])
+    session = LocationSession(VIEWER)
+    session.viewport = STOCKHOLM
+
+    user_locations._load_location_updates(None, 1)
+    monkeypatch.setattr(user_locations, "_watermark", datetime.datetime(2025, 11, 10, 8, 0))
+    updates, _ = session.apply(user_locations._load_location_updates(1, 2))
+    assert [u["userId"] for u in updates] == [2]
+
+    # The location itself is unchanged, only the setting
+    stored[0] = {**_doc(2, 59.3, 18.0, show_location="NO_ONE"),
+                 "visibilityChangedAt": datetime.datetime(2025, 11, 10, 9, 5)}
+    updates, removed = session.apply(user_locations._load_location_updates(2, 3))
+    assert updates == []
+    assert removed == [2]
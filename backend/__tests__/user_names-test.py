@@ -0,0 +1,66 @@
+import datetime
+from v1.user_events.user_events_model import UserEvent, Host, Attendee
+
+
+class FakeUserCollection:
+    def __init__(self, users):
+        self.users = users
+        self.queries = []
+
+    def find(self, query, projection=None):
+        ids = query["userId"]["$in"]
+        self.queries.append(sorted(ids))
+        return [u for u in self.users if u["userId"] in ids]
+
+
+def _use_fake_users(monkeypatch, users):
+    import v1.db.user_names as names
+    fake = FakeUserCollection(users)
+    monkeypatch.setattr(names, "user_collection", fake)
+    names.clear_display_names()
+    return fake
+
+
+def test_display_names_are_cached_and_misses_batched(monkeypatch):
+    from v1.db.user_names import get_display_names
+    fake = _use_fake_users(monkeypatch, [
+        {"userId": 1, "firstName": "Ada", "lastName": "Lovelace"},
+        {"userId": 2, "firstName": "Alan", "lastName": "Turing"},
+    ])
+
+    assert get_display_names([1, 2]) == {1: "Ada Lovelace", 2: "Alan Turing"}
+    assert get_display_names([1, 2, 3]) == {1: "Ada Lovelace", 2: "Alan Turing", 3: ""}
+    # The second lookup only queried the id that was not cached yet.
+    assert fake.queries == [[1, 2], [3]]
+
+
+def test_invalidate_display_name_refetches(monkeypatch):
+    from v1.db.user_names import get_display_name, invalidate_display_name
+    users = [{"userId": 1, "firstName": "Ada", "lastName": "Lovelace"}]
+    fake = _use_fake_users(monkeypatch, users)
+
+    assert get_display_name(1) == "Ada Lovelace"
+    users[0]["lastName"] = "King"
+    assert get_display_name(1) == "Ada Lovelace"
+    invalidate_display_name(1)
+    assert get_display_name(1) == "Ada King"
+    assert len(fake.queries) == 2
+
+
+def test_extend_user_events_tolerates_unknown_users(monkeypatch):
+    from v1.user_events.user_events_db import extend_user_events
+    _use_fake_users(monkeypatch, [{"userId": 1, "firstName": "Ada", "lastName": "Lovelace"}])
+
+    start = datetime.datetime.utcnow()
+    event = UserEvent(
+        _id="507f191e810c19729de860ea",
+        userId=1,
+        hosts=[Host(userId=1), Host(userId=99)],
+        name="Fika",
+        start=start,
+        attendees=[Attendee(userId=42)],
+    )
+    extended = extend_user_events([event])[0]
+    assert extended.ownerName == "Ada Lovelace"
+    assert extended.hostNames == ["Ada Lovelace", ""]
+    assert extended.attendeeNames == [""]
@@ -0,0 +1,81 @@
+import pytest
+from fastapi import HTTPException
+from v1.db.models.user import User, apply_profile_privacy, profile_projection, profile_visible
+from v1.shared.fieldsets import parse_fields, render_fields
+
+VIEWER = {"userId": 1, "isMember": True, "settings": {}}
+
+
+def _user(**settings):
+    return {
+        "userId": 2,
+        "firstName": "Ada",
+        "hometown": "Uppsala",
+        "gender": "female",
+        "interests": ["Konst"],
+        "contact_info": {"email": "ada@example.com", "phone": "123"},
+        "settings": settings,
+    }
+
+
+def test_apply_profile_privacy_uses_rule_defaults():
+    user = apply_profile_privacy(_user(show_email="MEMBERS_ONLY"), VIEWER)
+    assert user["contact_info"] == {"email": "ada@example.com", "phone": None}
+    assert user["hometown"] == "Uppsala"  # members only by default
+    assert user["gender"] is None  # no one by default
+    assert user["interests"] == ["Konst"]
+
+
+def test_apply_profile_privacy_only_checks_requested_fields():
+    user = apply_profile_privacy(_user(show_hometown="NO_ONE"), VIEWER, fields=["firstName", "gender"])
+    assert user["gender"] is None
+    assert user["hometown"] == "Uppsala"
+
+
+def test_own_profile_is_visible_and_unfiltered_except_contact_info():
+    own = {**_user(show_profile="NO_ONE"), "userId": 1}
+    assert profile_visible(own, VIEWER)
+    assert not profile_visible(_user(show_profile="NO_ONE"), VIEWER)
+    filtered = apply_profile_privacy(own, VIEWER)
+    assert filtered["gender"] == "female"
+    assert filtered["contact_info"]["email"] is None
+
+
+def test_profile_projection_includes_gating_settings():
+    projection = profile_projection(["firstName", "location"])
+    assert projection == {
+        "_id": 0,
+        "userId": 1,
+        "firstName": 1,
+        "location": 1,
+        "settings.show_profile": 1,
+        "settings.show_location": 1,
+    }
+    assert "settings.show_profile" not in profile_projection(["settings"])
+
+
+def test_sparse_fields_render_only_requested_fields():
+    fields = parse_fields("firstName, userId", User, always=["userId"])
+    assert fields == ("firstName", "userId")
+    response = render_fields([_user()], User, fields)
+    assert response.body == b'[{"firstName":"Ada","userId":2}]'
+    with pytest.raises(HTTPException):
+        parse_fields("firstName,password", User)
+
+
+def test_filter_profiles_matches_single_user_rules():
+    from v1.db.models.user import filter_profiles
+    import copy
+
+    users = [
+        _user(show_email="MEMBERS_ONLY"),
+        {**_user(show_hometown="NO_ONE", show_gender="EVERYONE"), "userId": 3},
+        {**_user(show_profile="NO_ONE"), "userId": 4},
+        {**_user(show_profile="NO_ONE"), "userId": 1},
+    ]
+    expected = [
+        apply_profile_privacy(copy.deepcopy(u), VIEWER)
+        for u in users if profile_visible(u, VIEWER)
+    ]
+    assert filter_profiles(copy.deepcopy(users), VIEWER) == expected
+    assert [u["userId"] for u in expected] == [2, 3, 1]
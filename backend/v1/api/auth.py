@@ -1,15 +1,17 @@
 from datetime import datetime
 import logging
 from fastapi import APIRouter, HTTPException
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
 import logging
 from v1.db.review_users import check_review_user_creds
 from v1.utilities import convert_string_to_datetime
 from v1.external.auth_api import loginm, loginb
 from v1.db.external_token_storage import save_external_token
-from v1.token_handler import create_access_token, create_refresh_token, get_token_expiry, verify_refresh_token
+from v1.token_handler import create_access_token_with_expiry, create_refresh_token, verify_refresh_token
 from v1.db.models.user import User
-from v1.db.users import create_user, get_user, update_user_from_authresponse
+from v1.db.users import get_user, upsert_user_from_authresponse
+from v1.external.login_gateway import login_gateway
 
 auth_v1 = APIRouter(prefix="/v1")
 
@@ -26,68 +28,59 @@ class AuthResponse(BaseModel):
     user: User
 
 
-@auth_v1.post("/authm")
-def authm(request: AuthRequest) -> AuthResponse:
-    response = check_review_user_creds(request.username, request.password)
+def _member_login(username: str, password: str) -> dict:
+    response = check_review_user_creds(username, password)
 
     if response is not None:
         # Important, so we can look at the logs to see when the app is being reviewed ;)
-        logging.info(f"Review user logged in! {request.username}")
+        logging.info(f"Review user logged in! {username}")
     else:
-        response = loginm(request.username, request.password)
+        response = loginm(username, password)
 
     logging.info(f"response_json: {response}")
+    return response
+
+
+def _complete_login(response: dict) -> AuthResponse:
+    """Store the user and external token from an upstream login response and issue our tokens."""
     try:
-        memberId = int(response["memberId"])
-        user = get_user(memberId)
-        if not user:
-            user = create_user(response)
-        else:
-            update_user_from_authresponse(memberId, response)
-            user = get_user(memberId)
+        user = upsert_user_from_authresponse(response)
     except KeyError as e:
         print("memberId not found in response")
         raise HTTPException(status_code=400, detail="Invalid credentials")
+    if user is None:
+        raise HTTPException(status_code=400, detail="Invalid credentials")
 
     save_external_token(user["userId"], response["token"],
                         convert_string_to_datetime(response["validThrough"]))
-    accesstoken = create_access_token(user["userId"])
+    accesstoken, expiry = create_access_token_with_expiry(user["userId"], user)
 
     authresponse = AuthResponse(
         accessToken=accesstoken,
         refreshToken=create_refresh_token(user["userId"]),
-        accessTokenExpiry=get_token_expiry(accesstoken),
+        accessTokenExpiry=expiry,
         user=user)
     return authresponse
 
 
-@auth_v1.post("/authb")
-def authb(request: AuthRequest) -> AuthResponse:
-    response = loginb(request.username, request.password)
+@auth_v1.post("/authm")
+async def authm(request: AuthRequest) -> AuthResponse:
+    response = await login_gateway.login("authm", request.username, request.password,
+                                         lambda: _member_login(request.username, request.password))
+    return await run_in_threadpool(_complete_login, response)
+
 
+def _non_member_login(username: str, password: str) -> dict:
+    response = loginb(username, password)
     logging.info(f"Non member login, response_json: {response}")
-    try:
-        memberId = int(response["memberId"])
-        user = get_user(memberId)
-        if not user:
-            user = create_user(response)
-        else:
-            update_user_from_authresponse(memberId, response)
-            user = get_user(memberId)
-    except KeyError as e:
-        print("memberId not found in response")
-        raise HTTPException(status_code=400, detail="Invalid credentials")
+    return response
 
-    save_external_token(user["userId"], response["token"],
-                        convert_string_to_datetime(response["validThrough"]))
-    accesstoken = create_access_token(user["userId"])
 
-    authresponse = AuthResponse(
-        accessToken=accesstoken,
-        refreshToken=create_refresh_token(user["userId"]),
-        accessTokenExpiry=get_token_expiry(accesstoken),
-        user=user)
-    return authresponse
+@auth_v1.post("/authb")
+async def authb(request: AuthRequest) -> AuthResponse:
+    response = await login_gateway.login("authb", request.username, request.password,
+                                         lambda: _non_member_login(request.username, request.password))
+    return await run_in_threadpool(_complete_login, response)
 
 
 class RefreshTokenRequest(BaseModel):
@@ -102,11 +95,11 @@ def refresh_token(req: RefreshTokenRequest) -> AuthResponse:
         user = get_user(int(payload.get("sub")))
         if not user:
             raise HTTPException(status_code=401, detail="Unauthorized")
-        accesstoken = create_access_token(user["userId"])
+        accesstoken, expiry = create_access_token_with_expiry(user["userId"], user)
         authresponse = AuthResponse(
             accessToken=accesstoken,
             refreshToken=create_refresh_token(user["userId"]),
-            accessTokenExpiry=get_token_expiry(accesstoken),
+            accessTokenExpiry=expiry,
             user=user)
         return authresponse
     except:
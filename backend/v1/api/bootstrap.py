@@ -0,0 +1,100 @@
+import asyncio
+import logging
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from fastapi import APIRouter, Depends, Query
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
+
+from v1.api.interests import INTEREST_CATEGORIES, INTEREST_CATEGORIES_PAYLOAD
+from v1.api.profile_options import PROFILE_OPTION_CATEGORIES, PROFILE_OPTION_CATEGORIES_PAYLOAD
+from v1.db.external_events import get_stored_external_root
+from v1.db.models.user import User
+from v1.events.events_service import list_unified_events, unified_events_etag
+from v1.request_filter import validate_request
+from v1.shared.http_cache import make_version
+
+bootstrap_v1 = APIRouter(prefix="/v1")
+
+
+class BootstrapSection(BaseModel):
+    version: Optional[str] = None
+    unchanged: bool = False
+    data: Any = None
+
+
+class Bootstrap(BaseModel):
+    user: BootstrapSection
+    interests: BootstrapSection
+    profileOptions: BootstrapSection
+    externalRoot: BootstrapSection
+    events: BootstrapSection
+
+
+# The catalogs are constant; their versions are the ETags of their own endpoints
+INTERESTS_VERSION = INTEREST_CATEGORIES_PAYLOAD.version
+PROFILE_OPTIONS_VERSION = PROFILE_OPTION_CATEGORIES_PAYLOAD.version
+
+
+def _parse_known(known: Optional[str]) -> Dict[str, str]:
+    """Parse `section:version,...` into a dictionary."""
+    result = {}
+    for part in (known or "").split(","):
+        name, _, version = part.strip().partition(":")
+        if name and version:
+            result[name] = version
+    return result
+
+
+def _user_section(current_user: dict) -> Tuple[Optional[str], Callable[[], Any]]:
+    user = User(**current_user)
+    return make_version(user.model_dump()), lambda: user
+
+
+def _external_root_section() -> Tuple[Optional[str], Callable[[], Any]]:
+    root = get_stored_external_root()
+    return make_version(root.model_dump() if root else None), lambda: root
+
+
+def _events_section(current_user: dict) -> Tuple[Optional[str], Callable[[], Any]]:
+    etag = unified_events_etag(current_user, "")
+    return (etag.strip('"') if etag else None), lambda: list_unified_events(current_user)
+
+
+async def _section(name: str, known: Dict[str, str], resolve: Callable[[], Tuple[Optional[str], Callable[[], Any]]]) -> BootstrapSection:
+    """Resolve a section's version, and load its data unless the client already has that version."""
+    try:
+        version, load = await run_in_threadpool(resolve)
+        if version is not None and known.get(name) == version:
+            return BootstrapSection(version=version, unchanged=True)
+        return BootstrapSection(version=version, data=await run_in_threadpool(load))
+    except Exception as e:
+        logging.error(f"Failed to load bootstrap section {name}: {e}")
+        return BootstrapSection()
+
+
+@bootstrap_v1.get("/bootstrap", response_model=Bootstrap)
+async def get_bootstrap(
+    known: Optional[str] = Query(None, description="Sections the client has, as section:version,..."),
+    current_user: dict = Depends(validate_request),
+):
+    """Everything the app needs on launch, in one request.
+
+    Sections are loaded concurrently. Each carries a version; sections listed in `known` with
+    their current version are returned with `unchanged` set and no data. A section that
+    fails to load has no version and no data, and can be fetched from its own endpoint.
+    """
+    known_versions = _parse_known(known)
+    user, interests, profile_options, external_root, events = await asyncio.gather(
+        _section("user", known_versions, lambda: _user_section(current_user)),
+        _section("interests", known_versions, lambda: (INTERESTS_VERSION, lambda: INTEREST_CATEGORIES)),
+        _section("profileOptions", known_versions, lambda: (PROFILE_OPTIONS_VERSION, lambda: PROFILE_OPTION_CATEGORIES)),
+        _section("externalRoot", known_versions, _external_root_section),
+        _section("events", known_versions, lambda: _events_section(current_user)),
+    )
+    return Bootstrap(
+        user=user,
+        interests=interests,
+        profileOptions=profile_options,
+        externalRoot=external_root,
+        events=events,
+    )
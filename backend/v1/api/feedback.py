@@ -3,19 +3,19 @@ import hashlib
 import logging
 import os
 import re
-import shutil
-import uuid
 from typing import List, Optional, Literal
 
 from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
 from pydantic import BaseModel, Field
+from starlette.concurrency import run_in_threadpool
 
 from v1.request_filter import validate_request
 from v1 import github_app
 from v1.db.feedback_votes import set_vote, get_tally, get_tallies
 from v1.db.feedback_user_index import register_user as register_feedback_user
+from v1.shared.image_store import store_image_file
 
-FEEDBACK_ATTACHMENT_DIR = "/static/img/feedback"
+MAX_ATTACHMENT_BYTES = 10 * 1024 * 1024
 ALLOWED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp"}
 
 logger = logging.getLogger(__name__)
@@ -160,14 +160,14 @@ async def upload_feedback_attachment(
             detail="Endast bildfiler (JPG, PNG, GIF, WEBP) tillåts.",
         )
 
-    os.makedirs(FEEDBACK_ATTACHMENT_DIR, exist_ok=True)
-    name = f"{uuid.uuid4().hex}{extension}"
-    disk_path = os.path.join(FEEDBACK_ATTACHMENT_DIR, name)
-    with open(disk_path, "wb") as out:
-        shutil.copyfileobj(file.file, out)
+    try:
+        # Hashing and disk work, off the event loop
+        image_url = await run_in_threadpool(store_image_file, file.file, extension, MAX_ATTACHMENT_BYTES)
+    except ValueError:
+        raise HTTPException(status_code=413, detail="Filen är för stor.")
 
     base = os.getenv("PUBLIC_BASE_URL", "https://app.events.mensa.se/api").rstrip("/")
-    public_url = f"{base}/static/img/feedback/{name}"
+    public_url = f"{base}{image_url}"
     return AttachmentResponse(url=public_url)
 
 
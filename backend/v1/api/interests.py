@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 from pydantic import BaseModel
 from typing import List
 from v1.db.models.user import UserInterest
-from v1.request_filter import validate_request
+from v1.request_filter import validate_token
+from v1.shared.static_payload import StaticPayload
 
 interests_v1 = APIRouter(prefix="/v1")
 
@@ -72,6 +73,9 @@ INTEREST_CATEGORIES: List[InterestCategory] = [
 ]
 
 
+INTEREST_CATEGORIES_PAYLOAD = StaticPayload(INTEREST_CATEGORIES, List[InterestCategory])
+
+
 @interests_v1.get("/interests", response_model=List[InterestCategory])
-async def get_interest_categories(current_user: dict = Depends(validate_request)):
-    return INTEREST_CATEGORIES
+async def get_interest_categories(request: Request, token: dict = Depends(validate_token)):
+    return INTEREST_CATEGORIES_PAYLOAD.response(request)
@@ -0,0 +1,89 @@
+"""
+Event site news.
+
+The refresh job stores the news and bumps the NEWS data version when it changes. The listing
+is served from an in-memory snapshot that is reloaded only when that version moves, and the
+version is read at most every SNAPSHOT_CHECK_INTERVAL seconds, so a request normally touches
+neither the database nor the upstream site.
+"""
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from fastapi import APIRouter, Depends, Query, Request, Response
+
+from v1.db.data_versions import get_versions, NEWS
+from v1.db.event_site_news import get_stored_news
+from v1.db.models.event_site_news import NewsItem
+from v1.request_filter import validate_token
+from v1.shared.http_cache import etag_matches, make_etag, not_modified
+from v1.shared.responses import fast_json
+from v1.utilities import get_current_time_zone
+
+news_v1 = APIRouter(prefix="/v1")
+
+# How often the NEWS data version is checked, in seconds
+SNAPSHOT_CHECK_INTERVAL = 30.0
+
+
+class NewsSnapshot:
+    """The stored news, newest first, reloaded when the NEWS data version changes."""
+
+    def __init__(self, check_interval: float = SNAPSHOT_CHECK_INTERVAL):
+        self.check_interval = check_interval
+        self._version: Optional[int] = None
+        self._items: List[NewsItem] = []
+        self._checked_at = float("-inf")
+        self._lock = threading.Lock()
+
+    def current(self) -> Tuple[Optional[int], List[NewsItem]]:
+        """Return the news version and items, or a None version if the news has never loaded."""
+        with self._lock:
+            now = time.monotonic()
+            if now - self._checked_at >= self.check_interval:
+                self._checked_at = now
+                self._reload_if_changed()
+            return self._version, self._items
+
+    def _reload_if_changed(self) -> None:
+        try:
+            version = get_versions([NEWS])[NEWS]
+        except Exception as e:
+            # Keep serving the previous snapshot
+            logging.error(f"Failed to read news data version: {e}")
+            return
+        if version == self._version:
+            return
+        self._items = [NewsItem(id=doc["_id"], **{key: value for key, value in doc.items() if key != "_id"})
+                       for doc in get_stored_news()]
+        self._version = version
+
+
+news_snapshot = NewsSnapshot()
+
+
+def _stored_time(value: datetime) -> datetime:
+    """Convert a query time to the naive Stockholm time the news is stored with."""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(get_current_time_zone()).replace(tzinfo=None)
+
+
+@news_v1.get("/news", response_model=List[NewsItem])
+def get_news(request: Request,
+             response: Response,
+             since: Optional[datetime] = Query(None, description="Only news published after this time"),
+             token: dict = Depends(validate_token)):
+    version, items = news_snapshot.current()
+    etag = make_etag("news", version, since.isoformat() if since else None) if version is not None else None
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    if etag:
+        response.headers["ETag"] = etag
+
+    if since is not None:
+        after = _stored_time(since)
+        items = [item for item in items if item.published > after]
+    return fast_json(items, response)
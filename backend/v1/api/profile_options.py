@@ -1,7 +1,8 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 from pydantic import BaseModel
 from typing import List
-from v1.request_filter import validate_request
+from v1.request_filter import validate_token
+from v1.shared.static_payload import StaticPayload
 
 profile_options_v1 = APIRouter(prefix="/v1")
 
@@ -57,6 +58,9 @@ PROFILE_OPTION_CATEGORIES: List[ProfileOptionCategory] = [
 ]
 
 
+PROFILE_OPTION_CATEGORIES_PAYLOAD = StaticPayload(PROFILE_OPTION_CATEGORIES, List[ProfileOptionCategory])
+
+
 @profile_options_v1.get("/profile-options", response_model=List[ProfileOptionCategory])
-async def get_profile_option_categories(current_user: dict = Depends(validate_request)):
-    return PROFILE_OPTION_CATEGORIES
+async def get_profile_option_categories(request: Request, token: dict = Depends(validate_token)):
+    return PROFILE_OPTION_CATEGORIES_PAYLOAD.response(request)
@@ -0,0 +1,269 @@
+"""
+Live user locations over a WebSocket.
+
+The client connects to `/v1/users/locations/live` and authenticates once with its first
+message, `{"type": "auth", "token": "<access token>"}`. After `{"type": "ready"}` it may send:
+
+- `{"type": "viewport", "minLatitude": .., "maxLatitude": .., "minLongitude": .., "maxLongitude": ..}`
+  to (re)subscribe to an area. The server answers with a `snapshot` of the visible users in it.
+- `{"type": "location", "latitude": .., "longitude": .., "accuracy": ..}` to update its own
+  location, like `PUT /v1/users/me/location`.
+
+The server pushes `{"type": "locations", "updates": [..], "removed": [userIds]}` whenever users
+in the viewport move, move out of it, or stop sharing their location with the viewer. Locations are filtered with the same privacy rules
+as `GET /v1/users?show_location=true`. The connection is closed with code 4401 when the
+access token expires.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from pydantic import ValidationError
+from starlette.concurrency import run_in_threadpool
+
+from v1.db.data_versions import get_versions, USER_LOCATIONS
+from v1.db.models.user import PrivacySetting, UserLocation, viewer_can_see
+from v1.db.users import get_location_updates, get_user, get_users_showing_location, update_user_location
+from v1.shared.broadcast import VersionBroadcaster
+from v1.token_handler import verify_access_token
+from v1.utilities import convert_to_tz_aware, get_current_time
+
+user_locations_v1 = APIRouter(prefix="/v1")
+
+# Seconds a new connection has to authenticate
+AUTH_TIMEOUT_SECONDS = 10
+# Own location updates more frequent than this are ignored
+MIN_UPDATE_INTERVAL_SECONDS = 1.0
+# Location updates committed out of order by concurrent writers are caught by re-reading this far back
+WATERMARK_OVERLAP = timedelta(seconds=5)
+# Pending deltas a client may have before it is sent a new snapshot instead
+MAX_PENDING_DELTAS = 32
+
+WS_UNAUTHORIZED = 4401
+
+Viewport = Tuple[float, float, float, float]
+
+
+### Shared location feed ###
+
+_watermark: Optional[datetime] = None
+_last_timestamps: Dict[int, datetime] = {}
+
+
+def _read_locations_version() -> int:
+    return get_versions([USER_LOCATIONS])[USER_LOCATIONS]
+
+
+def _load_location_updates(previous_version: Optional[int], version: int) -> List[dict]:
+    """Load the location updates since the last call, once per worker."""
+    global _watermark
+    now = datetime.utcnow()
+    if previous_version is None or _watermark is None:
+        _watermark = now
+        return []
+    docs = get_location_updates(_watermark - WATERMARK_OVERLAP)
+    updates = []
+    for doc in docs:
+        timestamp = _changed_at(doc)
+        if not timestamp or _last_timestamps.get(doc["userId"]) == timestamp:
+            continue
+        _last_timestamps[doc["userId"]] = timestamp
+        _watermark = max(_watermark, timestamp)
+        updates.append(doc)
+    horizon = _watermark - WATERMARK_OVERLAP
+    for user_id in [uid for uid, ts in _last_timestamps.items() if ts < horizon]:
+        del _last_timestamps[user_id]
+    return updates
+
+
+def _changed_at(doc: dict) -> Optional[datetime]:
+    """The latest location update or visibility change of a user document, as naive UTC."""
+    times = [t.replace(tzinfo=None) for t in ((doc.get("location") or {}).get("timestamp"), doc.get("visibilityChangedAt")) if t]
+    return max(times) if times else None
+
+
+location_broadcaster = VersionBroadcaster(
+    "user locations", _read_locations_version, poll_interval=1.0, load_changes=_load_location_updates)
+
+
+def notify_location_changes() -> None:
+    """Push location changes to this worker's live location clients now."""
+    location_broadcaster.poke()
+
+
+### Per connection state ###
+
+
+def can_see_location(target: dict, viewer: dict) -> bool:
+    """Return True if `viewer` may see the location of `target`, as in GET /v1/users."""
+    settings = target.get("settings") or {}
+    return viewer_can_see(
+        settings.get("show_location", PrivacySetting.NO_ONE.value), viewer, "show_location"
+    ) and viewer_can_see(
+        settings.get("show_profile", PrivacySetting.MEMBERS_ONLY.value), viewer, "show_profile"
+    )
+
+
+def in_viewport(location: dict, viewport: Viewport) -> bool:
+    min_lat, max_lat, min_lng, max_lng = viewport
+    lat, lng = location.get("latitude"), location.get("longitude")
+    if lat is None or lng is None or not min_lat <= lat <= max_lat:
+        return False
+    if min_lng <= max_lng:
+        return min_lng <= lng <= max_lng
+    # The viewport crosses the antimeridian
+    return lng >= min_lng or lng <= max_lng
+
+
+def _location_payload(doc: dict) -> dict:
+    location = doc["location"]
+    timestamp = location.get("timestamp")
+    return {
+        "userId": doc["userId"],
+        "latitude": location.get("latitude"),
+        "longitude": location.get("longitude"),
+        "accuracy": location.get("accuracy"),
+        "timestamp": timestamp.isoformat() if timestamp else None,
+    }
+
+
+class LocationSession:
+    def __init__(self, viewer: dict):
+        self.viewer = viewer
+        self.viewport: Optional[Viewport] = None
+        self.shown: set = set()
+        self.last_update = 0.0
+
+    def apply(self, docs: List[dict]) -> Tuple[List[dict], List[int]]:
+        """
+        Filter user location documents for this viewer.
+
+        :param docs: Documents with userId, location and settings.
+        :return: The visible location updates, and the IDs of users no longer visible.
+        """
+        updates, removed = [], []
+        if self.viewport is None:
+            return updates, removed
+        for doc in docs:
+            user_id = doc.get("userId")
+            if user_id == self.viewer.get("userId"):
+                continue
+            location = doc.get("location")
+            if location and in_viewport(location, self.viewport) and can_see_location(doc, self.viewer):
+                updates.append(_location_payload(doc))
+                self.shown.add(user_id)
+            elif user_id in self.shown:
+                self.shown.discard(user_id)
+                removed.append(user_id)
+        return updates, removed
+
+
+def _parse_viewport(message: dict) -> Viewport:
+    viewport = tuple(float(message[key]) for key in ("minLatitude", "maxLatitude", "minLongitude", "maxLongitude"))
+    if viewport[0] > viewport[1]:
+        raise ValueError("minLatitude is above maxLatitude")
+    return viewport
+
+
+async def _authenticate(websocket: WebSocket) -> Tuple[Optional[dict], float]:
+    """Wait for the auth message. Returns the user and the token expiry (epoch seconds)."""
+    try:
+        message = await asyncio.wait_for(websocket.receive_json(), timeout=AUTH_TIMEOUT_SECONDS)
+    except (asyncio.TimeoutError, ValueError):
+        return None, 0
+    if not isinstance(message, dict) or message.get("type") != "auth":
+        return None, 0
+    valid, payload = verify_access_token(message.get("token") or "")
+    if not valid:
+        return None, 0
+    user = await run_in_threadpool(get_user, int(payload.get("sub")))
+    return user, float(payload.get("exp", 0))
+
+
+@user_locations_v1.websocket("/users/locations/live")
+async def live_locations(websocket: WebSocket):
+    await websocket.accept()
+    viewer, expires_at = await _authenticate(websocket)
+    if not viewer:
+        await websocket.close(code=WS_UNAUTHORIZED)
+        return
+
+    session = LocationSession(viewer)
+    subscription = location_broadcaster.subscribe(MAX_PENDING_DELTAS)
+    send_lock = asyncio.Lock()
+
+    async def send(message: dict):
+        async with send_lock:
+            await websocket.send_json(message)
+
+    async def send_snapshot():
+        session.shown = set()
+        users, _ = session.apply(await run_in_threadpool(get_users_showing_location))
+        await send({"type": "snapshot", "users": users})
+
+    async def receive():
+        while True:
+            try:
+                message = await websocket.receive_json()
+            except ValueError:
+                await send({"type": "error", "detail": "Messages must be JSON"})
+                continue
+            kind = message.get("type") if isinstance(message, dict) else None
+            if kind == "viewport":
+                try:
+                    session.viewport = _parse_viewport(message)
+                except (KeyError, TypeError, ValueError):
+                    await send({"type": "error", "detail": "Invalid viewport"})
+                    continue
+                await send_snapshot()
+            elif kind == "location":
+                if time.monotonic() - session.last_update < MIN_UPDATE_INTERVAL_SECONDS:
+                    continue
+                try:
+                    location = UserLocation(**{**message, "timestamp": None})
+                except (TypeError, ValidationError):
+                    await send({"type": "error", "detail": "Invalid location"})
+                    continue
+                session.last_update = time.monotonic()
+                update_dict = location.model_dump(exclude_unset=True)
+                update_dict["timestamp"] = convert_to_tz_aware(get_current_time())
+                await run_in_threadpool(update_user_location, viewer["userId"], update_dict)
+                notify_location_changes()
+            else:
+                await send({"type": "error", "detail": "Unknown message type"})
+
+    receiver = asyncio.create_task(receive())
+    try:
+        await send({"type": "ready"})
+        while not receiver.done():
+            timeout = expires_at - time.time()
+            if timeout <= 0:
+                await websocket.close(code=WS_UNAUTHORIZED)
+                return
+            getter = asyncio.ensure_future(subscription.queue.get())
+            done, _ = await asyncio.wait({getter, receiver}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if getter not in done:
+                getter.cancel()
+                continue
+            if subscription.overflowed:
+                # Too far behind for deltas: drop them and start over from a snapshot
+                while not subscription.queue.empty():
+                    subscription.queue.get_nowait()
+                subscription.overflowed = False
+                await send_snapshot()
+                continue
+            updates, removed = session.apply(getter.result())
+            if updates or removed:
+                await send({"type": "locations", "updates": updates, "removed": removed})
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        logging.error(f"Live location connection failed: {e}")
+    finally:
+        location_broadcaster.unsubscribe(subscription)
+        receiver.cancel()
+        if receiver.done() and not receiver.cancelled() and not isinstance(receiver.exception(), WebSocketDisconnect):
+            logging.error(f"Live location receiver failed: {receiver.exception()}")
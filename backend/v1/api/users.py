@@ -1,128 +1,107 @@
 import logging
-import shutil
 import os
-from typing import List
-from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
+from typing import List, Optional
+from pydantic import TypeAdapter
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, Response, UploadFile
+from starlette.concurrency import run_in_threadpool
 from v1.utilities import convert_to_tz_aware, get_current_time
-from v1.db.models.user import User, UserLocation, UserUpdate, PrivacySetting, viewer_can_see, effective_setting
-from v1.request_filter import validate_request
-from v1.db.users import get_users as db_get_users, get_user, get_users_showing_location, update_user
+from v1.db.models.user import User, UserLocation, UserUpdate, apply_profile_privacy, effective_setting, filter_profiles, profile_projection, profile_visible
+from v1.request_filter import remember_viewer, validate_claims, validate_request
+from v1.db.data_versions import get_versions, USER_LOCATIONS, USER_PROFILES
+from v1.shared.avatars import MAX_AVATAR_BYTES, release_avatar, store_avatar
+from v1.shared.fieldsets import parse_fields, render_fields
+from v1.shared.http_cache import etag_matches, make_etag, not_modified
+from v1.shared.responses import fast_response, preferred_media_type, variant_etag
+from v1.api.user_locations import notify_location_changes
+from v1.events.events_db import touch_events_attended_by
+from v1.db.users import get_user, get_users_by_ids, get_users_showing_location, mark_location_visibility_changed, update_user, update_user_location as db_update_user_location
 
 users_v1 = APIRouter(prefix="/v1")
 
 
+def _users_etag(current_user: dict, query_string: str) -> Optional[str]:
+    """Build the ETag of a user listing from data versions and the viewer, without reading the users."""
+    try:
+        versions = get_versions([USER_PROFILES, USER_LOCATIONS])
+    except Exception as e:
+        logging.error(f"Failed to read user data versions: {e}")
+        return None
+    viewer_settings = current_user.get("settings") or {}
+    viewer = (
+        current_user.get("userId"),
+        current_user.get("isMember", False),
+        sorted((key, str(value)) for key, value in viewer_settings.items()),
+    )
+    return make_etag("users", sorted(versions.items()), viewer, query_string)
+
+
+# Maximum number of users per GET /v1/users?ids= request
+MAX_BATCH_USERS = 200
+
+USER_LIST = TypeAdapter(List[User])
+
+# Settings that decide who sees a user's location, see user_locations.can_see_location
+LOCATION_VISIBILITY_SETTINGS = ("show_location", "show_profile")
+
+
+def _parse_user_ids(ids: str) -> List[int]:
+    try:
+        user_ids = list(dict.fromkeys(int(part) for part in ids.split(",") if part.strip()))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be comma separated user IDs")
+    if len(user_ids) > MAX_BATCH_USERS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_USERS} ids per request")
+    return user_ids
+
+
 @users_v1.get("/users", response_model=List[User])
-async def get_users(show_location: bool = None,
-                    current_user: dict = Depends(validate_request)):
-    if show_location:
-        users_list = get_users_showing_location()
-    else:
+async def get_users(request: Request,
+                    response: Response,
+                    show_location: bool = None,
+                    ids: Optional[str] = Query(None, description=f"Comma separated user IDs to look up, at most {MAX_BATCH_USERS}"),
+                    fields: Optional[str] = Query(None, description="Comma separated User fields to return, e.g. userId,firstName,lastName,location"),
+                    current_user: dict = Depends(validate_claims)):
+    if ids is None and not show_location:
         raise HTTPException(
             status_code=400,
             detail="show_location parameter must be set to True to retrieve users."
         )
-        users_list = db_get_users()
-    # Enforce privacy: hide email/phone/location if disabled, filter by profile visibility
-    result = []
-    for user in users_list:
-        settings = user.get("settings", {})
-        # ensure contact_info dict exists
-        contact = user.get("contact_info") or {}
-        if not viewer_can_see(settings.get("show_email", PrivacySetting.NO_ONE.value), current_user, "show_email"):
-            contact["email"] = None
-        if not viewer_can_see(settings.get("show_phone", PrivacySetting.NO_ONE.value), current_user, "show_phone"):
-            contact["phone"] = None
-        user["contact_info"] = contact
-        if user.get("userId") != current_user.get("userId") and not viewer_can_see(
-                settings.get("show_location", PrivacySetting.NO_ONE.value), current_user, "show_location"):
-            user["location"] = None
-        if not viewer_can_see(settings.get("show_interests", PrivacySetting.MEMBERS_ONLY.value), current_user, "show_interests") and user.get("userId") != current_user.get("userId"):
-            user["interests"] = []
-        if user.get("userId") != current_user.get("userId") and not viewer_can_see(
-                settings.get("show_hometown", PrivacySetting.MEMBERS_ONLY.value), current_user, "show_hometown"):
-            user["hometown"] = None
-        if user.get("userId") != current_user.get("userId") and not viewer_can_see(
-                settings.get("show_birthdate", PrivacySetting.MEMBERS_ONLY.value), current_user, "show_birthdate"):
-            user["birthdate"] = None
-        if user.get("userId") != current_user.get("userId") and not viewer_can_see(
-                settings.get("show_gender", PrivacySetting.NO_ONE.value), current_user, "show_gender"):
-            user["gender"] = None
-        if user.get("userId") != current_user.get("userId") and not viewer_can_see(
-                settings.get("show_sexuality", PrivacySetting.NO_ONE.value), current_user, "show_sexuality"):
-            user["sexuality"] = None
-        if user.get("userId") != current_user.get("userId") and not viewer_can_see(
-                settings.get("show_relationship_style", PrivacySetting.NO_ONE.value), current_user, "show_relationship_style"):
-            user["relationship_style"] = None
-        if user.get("userId") != current_user.get("userId") and not viewer_can_see(
-                settings.get("show_relationship_status", PrivacySetting.NO_ONE.value), current_user, "show_relationship_status"):
-            user["relationship_status"] = None
-        if user.get("userId") != current_user.get("userId") and not viewer_can_see(
-                settings.get("show_social_vibes", PrivacySetting.MEMBERS_ONLY.value), current_user, "show_social_vibes"):
-            user["social_vibes"] = []
-        if user.get("userId") != current_user.get("userId") and not viewer_can_see(
-                settings.get("show_pronomen", PrivacySetting.NO_ONE.value), current_user, "show_pronomen"):
-            user["pronomen"] = None
-        if user.get("userId") == current_user.get("userId") or viewer_can_see(
-                settings.get("show_profile", PrivacySetting.MEMBERS_ONLY.value), current_user, "show_profile"):
-            result.append(user)
-    return result
+    user_ids = _parse_user_ids(ids) if ids is not None else None
+    selected = parse_fields(fields, User, always=["userId"])
+    media_type = preferred_media_type(request)
+    etag = variant_etag(_users_etag(current_user, request.url.query), media_type)
+    if etag_matches(request, etag):
+        return not_modified(etag, {"Vary": "Accept"})
+    if etag:
+        response.headers["ETag"] = etag
+
+    projection = profile_projection(selected) if selected else None
+    if user_ids is not None:
+        users_list = get_users_by_ids(user_ids, projection) if user_ids else []
+        order = {user_id: index for index, user_id in enumerate(user_ids)}
+        users_list.sort(key=lambda user: order.get(user.get("userId"), len(order)))
+    else:
+        users_list = get_users_showing_location(projection)
+    # Enforce privacy: hide fields the viewer may not see, filter by profile visibility
+    result = filter_profiles(users_list, current_user, selected)
+    if selected:
+        return render_fields(result, User, selected, response, media_type)
+    # Validate once here and encode the models directly, instead of the response_model round trip
+    return fast_response(USER_LIST.validate_python(result), media_type, response)
 
 
 @users_v1.get("/users/{user_id}", response_model=User)
 async def get_user_by_id(user_id: int,
-                         current_user: dict = Depends(validate_request)):
+                         current_user: dict = Depends(validate_claims)):
     user = get_user(user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    settings = user.get("settings", {})
-    if user.get("userId") != current_user.get("userId") and not viewer_can_see(
-            settings.get("show_profile", PrivacySetting.MEMBERS_ONLY.value), current_user, "show_profile"):
+    if not profile_visible(user, current_user):
         raise HTTPException(status_code=403, detail="Profile not visible")
 
-    # Enforce privacy: hide email/phone based on viewer's access
-    contact = user.get("contact_info") or {}
-    if not viewer_can_see(settings.get("show_email", PrivacySetting.NO_ONE.value), current_user, "show_email"):
-        contact["email"] = None
-    if not viewer_can_see(settings.get("show_phone", PrivacySetting.NO_ONE.value), current_user, "show_phone"):
-        contact["phone"] = None
-    user["contact_info"] = contact
-
-    # Hide location if user doesn't want to show it
-    if user.get("userId") != current_user.get("userId") and not viewer_can_see(
-            settings.get("show_location", PrivacySetting.NO_ONE.value), current_user, "show_location"):
-        user["location"] = None
-
-    if user.get("userId") != current_user.get("userId") and not viewer_can_see(
-            settings.get("show_interests", PrivacySetting.MEMBERS_ONLY.value), current_user, "show_interests"):
-        user["interests"] = []
-
-    if user.get("userId") != current_user.get("userId") and not viewer_can_see(
-            settings.get("show_hometown", PrivacySetting.MEMBERS_ONLY.value), current_user, "show_hometown"):
-        user["hometown"] = None
-    if user.get("userId") != current_user.get("userId") and not viewer_can_see(
-            settings.get("show_birthdate", PrivacySetting.MEMBERS_ONLY.value), current_user, "show_birthdate"):
-        user["birthdate"] = None
-    if user.get("userId") != current_user.get("userId") and not viewer_can_see(
-            settings.get("show_gender", PrivacySetting.NO_ONE.value), current_user, "show_gender"):
-        user["gender"] = None
-    if user.get("userId") != current_user.get("userId") and not viewer_can_see(
-            settings.get("show_sexuality", PrivacySetting.NO_ONE.value), current_user, "show_sexuality"):
-        user["sexuality"] = None
-    if user.get("userId") != current_user.get("userId") and not viewer_can_see(
-            settings.get("show_relationship_style", PrivacySetting.NO_ONE.value), current_user, "show_relationship_style"):
-        user["relationship_style"] = None
-    if user.get("userId") != current_user.get("userId") and not viewer_can_see(
-            settings.get("show_relationship_status", PrivacySetting.NO_ONE.value), current_user, "show_relationship_status"):
-        user["relationship_status"] = None
-    if user.get("userId") != current_user.get("userId") and not viewer_can_see(
-            settings.get("show_social_vibes", PrivacySetting.MEMBERS_ONLY.value), current_user, "show_social_vibes"):
-        user["social_vibes"] = []
-    if user.get("userId") != current_user.get("userId") and not viewer_can_see(
-            settings.get("show_pronomen", PrivacySetting.NO_ONE.value), current_user, "show_pronomen"):
-        user["pronomen"] = None
-
-    return user
+    # Enforce privacy: hide fields based on viewer's access
+    return apply_profile_privacy(user, current_user)
 
 
 @users_v1.put("/users/me/location", response_model=User)
@@ -133,8 +112,10 @@ async def update_user_location(location: UserLocation,
     update_dict['timestamp'] = convert_to_tz_aware(
         get_current_time())  # Set timestamp to current time
     current_user['location'] = update_dict
+    db_update_user_location(current_user['userId'], update_dict)
+    notify_location_changes()
 
-    return update_user(current_user['userId'], current_user)
+    return current_user
 
 
 @users_v1.get("/users/me", response_model=User)
@@ -146,44 +127,45 @@ async def get_current_user(current_user: User = Depends(validate_request)):
 async def update_current_user(user_update: UserUpdate,
                               current_user: User = Depends(validate_request)):
     update_dict = user_update.model_dump(exclude_unset=True)
+    visibility_changed = attendance_changed = False
     if 'settings' in update_dict:
         existing_settings = current_user.get('settings', {})
         update_dict['settings'] = {**existing_settings, **update_dict['settings']}
+        visibility_changed = any(update_dict['settings'].get(key) != existing_settings.get(key)
+                                 for key in LOCATION_VISIBILITY_SETTINGS)
+        attendance_changed = (effective_setting(update_dict['settings'], "show_attendance")
+                              != effective_setting(existing_settings, "show_attendance"))
     current_user.update(update_dict)
 
-    return update_user(current_user['userId'], current_user)
+    updated = update_user(current_user['userId'], current_user)
+    remember_viewer(updated)
+    if visibility_changed:
+        # Live location clients drop or add the user's position right away
+        mark_location_visibility_changed(current_user['userId'])
+        notify_location_changes()
+    if attendance_changed:
+        # Delta sync clients fetch the events the user attends again, with the new filtering
+        touch_events_attended_by(current_user['userId'])
+    return updated
 
 
 @users_v1.post("/users/me/avatar", response_model=User)
 async def update_user_avatar(file: UploadFile = File(...),
                              current_user: User = Depends(validate_request)):
     logging.info(f"file: {file.filename}")
-    logging.info(f"current_user: {current_user}")
-    file_extension = os.path.splitext(file.filename)[1].lower()
+    file_extension = os.path.splitext(file.filename or "")[1].lower()
     if file_extension not in [".jpg", ".jpeg", ".png"]:
         raise HTTPException(status_code=400, detail="Invalid file type. Only JPG and PNG are allowed.")
-    current_timestamp = int(get_current_time().timestamp())
-    file_path = f"/static/img/{current_user['userId']}_avatar_{current_timestamp}{file_extension}"
-    logging.info(f"file_path: {file_path}")
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-
-    current_user['avatar_url'] = file_path
-
-    # Keep the three most recent avatar files, delete older ones
-    keep = [file_path]
-    user_id_prefix = f"/static/img/{current_user['userId']}_avatar_"
-    for fname in os.listdir("/static/img/"):
-        if fname.startswith(f"{current_user['userId']}_avatar_"):
-            full_path = os.path.join("/static/img/", fname)
-            if full_path != file_path:
-                keep.append(full_path)
-    keep = sorted(keep, reverse=True)[:3]  # Keep only the three most recent
-    for fname in os.listdir("/static/img/"):
-        if fname.startswith(f"{current_user['userId']}_avatar_"):
-            full_path = os.path.join("/static/img/", fname)
-            if full_path not in keep:
-                os.remove(full_path)
-                logging.info(f"Deleted old avatar file: {full_path}")
-
-    return update_user(current_user['userId'], current_user)
+    if file.size is not None and file.size > MAX_AVATAR_BYTES:
+        raise HTTPException(status_code=413, detail="Avatar is too large")
+
+    # Disk and image work, off the event loop
+    avatar_url, thumbnails = await run_in_threadpool(store_avatar, file.file)
+    logging.info(f"avatar_url: {avatar_url}")
+
+    previous = (current_user.get('avatar_url'), current_user.get('avatar_thumbnails'))
+    current_user['avatar_url'] = avatar_url
+    current_user['avatar_thumbnails'] = thumbnails
+    updated = await run_in_threadpool(update_user, current_user['userId'], current_user)
+    await run_in_threadpool(release_avatar, *previous)
+    return updated
@@ -0,0 +1,128 @@
+"""
+Response compression.
+
+Responses of at least MIN_SIZE bytes are compressed with brotli or gzip, whichever the client
+prefers (brotli when both are equally acceptable). Streamed responses such as the SSE change
+stream, responses that already have a Content-Encoding, images and 304s pass through untouched.
+
+A response with an ETag is the same bytes for as long as the tag is, so its compressed body is
+kept in a small LRU cache keyed by path, ETag and encoding. A catalog version, a static payload
+or a per-viewer list is then compressed once rather than on every request.
+"""
+import gzip
+from collections import OrderedDict
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from v1.shared.http_cache import accept_weights
+
+try:
+    import brotli
+except ImportError:  # Without brotli only gzip is offered
+    brotli = None
+
+MIN_SIZE = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+CACHE_SIZE = 256
+
+_SKIPPED_CONTENT_TYPES = ("text/event-stream", "image/", "video/", "audio/", "application/zip", "application/gzip")
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Pick the content coding for a request.
+
+    :param accept_encoding: The Accept-Encoding header.
+    :return: "br", "gzip" or None for no compression.
+    """
+    weights = accept_weights(accept_encoding)
+    wildcard = weights.get("*", 0.0)
+    br_q = weights.get("br", wildcard) if brotli is not None else 0.0
+    gzip_q = weights.get("gzip", wildcard)
+    if br_q > 0 and br_q >= gzip_q:
+        return "br"
+    if gzip_q > 0:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp, minimum_size: int = MIN_SIZE, cache_size: int = CACHE_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[tuple, bytes]" = OrderedDict()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+        passthrough = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                # Hold the headers back until the body shows whether to compress it
+                start = message
+                return
+            if message["type"] != "http.response.body" or start is None:
+                await send(message)
+                return
+
+            held, start = start, None
+            headers = MutableHeaders(raw=held["headers"])
+            body = message.get("body", b"")
+            if message.get("more_body", False) or not self._compressible(held["status"], headers, body):
+                passthrough = True
+                await send(held)
+                await send(message)
+                return
+
+            compressed = self._compressed_body(scope["path"], held["status"], headers.get("etag"), body, encoding)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            await send(held)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
+
+    def _compressible(self, status: int, headers: MutableHeaders, body: bytes) -> bool:
+        if status in (204, 304) or len(body) < self.minimum_size:
+            return False
+        if "content-encoding" in headers:
+            return False
+        content_type = headers.get("content-type", "")
+        return not content_type.startswith(_SKIPPED_CONTENT_TYPES)
+
+    def _compressed_body(self, path: str, status: int, etag: Optional[str], body: bytes, encoding: str) -> bytes:
+        if status != 200 or not etag:
+            return compress(body, encoding)
+        key = (path, etag, encoding)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            return cached
+        compressed = compress(body, encoding)
+        self._cache[key] = compressed
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return compressed
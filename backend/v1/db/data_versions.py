@@ -0,0 +1,135 @@
+"""
+Monotonic data version counters, shared by all worker processes.
+
+Each counter is bumped whenever the data it covers changes, so that caches and
+ETags can be validated with one small query instead of re-reading the data.
+"""
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional
+
+from pymongo import ReturnDocument
+
+from v1.db.mongo import db
+
+data_versions_collection = db["data_versions"]
+
+# External events catalog (refresh job)
+EVENT_CATALOG = "event_catalog"
+# User events (any mutation in user_events_db)
+USER_EVENTS = "user_events"
+# Local external booking cache
+BOOKINGS = "bookings"
+# User profiles, names and settings
+USER_PROFILES = "user_profiles"
+# User locations
+USER_LOCATIONS = "user_locations"
+# Change version stamped on stored unified events (events_db), reserved with begin_version
+EVENT_CHANGES = "event_changes"
+# Newest change version of the pruned event tombstones
+EVENT_TOMBSTONES_PRUNED = "event_tombstones_pruned"
+# Stored event site news (refresh job)
+NEWS = "news"
+
+
+def bump_version(name: str) -> int:
+    """
+    Increment a version counter.
+
+    :param name: The counter name.
+    :return: The new version, or 0 if the counter could not be updated.
+    """
+    try:
+        doc = data_versions_collection.find_one_and_update(
+            {"_id": name},
+            {"$inc": {"value": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        return doc["value"]
+    except Exception as e:
+        logging.error(f"Failed to bump data version {name}: {e}")
+        return 0
+
+
+# How long a reserved version may stay uncommitted before it is considered abandoned
+PENDING_VERSION_TIMEOUT = timedelta(minutes=5)
+
+
+def begin_version(name: str) -> int:
+    """
+    Reserve the next version of a counter for a write that stamps it on documents.
+
+    Until :func:`end_version` is called, :func:`get_versions` reports the counter as one below
+    the oldest reserved version, so a reader never gets a version that a slower concurrent
+    write has yet to commit. Reservations older than :data:`PENDING_VERSION_TIMEOUT` are dropped.
+
+    :param name: The counter name.
+    :return: The reserved version.
+    :raises PyMongoError: If the counter could not be updated; the write must not go ahead.
+    """
+    timeout_ms = int(PENDING_VERSION_TIMEOUT.total_seconds() * 1000)
+    doc = data_versions_collection.find_one_and_update(
+        {"_id": name},
+        [
+            {"$set": {"value": {"$add": [{"$ifNull": ["$value", 0]}, 1]}}},
+            {"$set": {"pending": {"$concatArrays": [
+                {"$filter": {
+                    "input": {"$ifNull": ["$pending", []]},
+                    "cond": {"$gt": ["$$this.at", {"$subtract": ["$$NOW", timeout_ms]}]},
+                }},
+                [{"version": "$value", "at": "$$NOW"}],
+            ]}}},
+        ],
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    return doc["value"]
+
+
+def end_version(name: str, version: int) -> None:
+    """
+    Release a version reserved with :func:`begin_version`, once its write has finished or failed.
+
+    :param name: The counter name.
+    :param version: The reserved version.
+    """
+    try:
+        data_versions_collection.update_one({"_id": name}, {"$pull": {"pending": {"version": version}}})
+    except Exception as e:
+        logging.error(f"Failed to release data version {name} {version}: {e}")
+
+
+def committed_version(doc: dict, now: Optional[datetime] = None) -> int:
+    """Return a counter document's value, held below its oldest live reserved version."""
+    cutoff = (now or datetime.utcnow()) - PENDING_VERSION_TIMEOUT
+    pending = [entry["version"] for entry in doc.get("pending") or () if entry["at"] > cutoff]
+    return min(pending) - 1 if pending else doc["value"]
+
+
+def raise_version(name: str, value: int) -> None:
+    """
+    Raise a version counter to at least `value`.
+
+    :param name: The counter name.
+    :param value: The minimum version.
+    """
+    try:
+        data_versions_collection.update_one({"_id": name}, {"$max": {"value": value}}, upsert=True)
+    except Exception as e:
+        logging.error(f"Failed to raise data version {name}: {e}")
+
+
+def get_versions(names: Iterable[str]) -> Dict[str, int]:
+    """
+    Read version counters in one query. Counters that were never bumped are 0, and counters
+    with uncommitted reserved versions read as the last committed version.
+
+    :param names: The counter names.
+    :return: A dictionary of counter names and versions.
+    """
+    names = list(names)
+    versions = {name: 0 for name in names}
+    for doc in data_versions_collection.find({"_id": {"$in": names}}):
+        versions[doc["_id"]] = committed_version(doc)
+    return versions
@@ -0,0 +1,68 @@
+"""Upstream event image URLs and their cached copies, see v1/external/event_images.py."""
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from v1.db.mongo import db
+
+event_images_collection = db["event_images"]
+
+
+def get_event_images(upstream_urls: Iterable[str]) -> Dict[str, dict]:
+    """
+    Retrieves the cache entries of upstream image URLs.
+
+    :param upstream_urls: The upstream URLs.
+    :return: The entries, with `url` (None if fetching failed) and `checkedAt`, by upstream URL.
+    :raises PyMongoError: If the entries can't be read. Not swallowed, since treating every
+        image as uncached would fetch and reference all of them again.
+    """
+    return {doc["_id"]: doc for doc in event_images_collection.find({"_id": {"$in": list(upstream_urls)}})}
+
+
+def has_failed_event_images(checked_before: datetime) -> bool:
+    """
+    Checks for images that failed to fetch and are due for another try.
+
+    :param checked_before: Only count failures checked before this time.
+    :return: True if there are such images, or if that could not be checked.
+    """
+    try:
+        return event_images_collection.find_one({"url": None, "checkedAt": {"$lt": checked_before}}, {"_id": 1}) is not None
+    except Exception as e:
+        logging.error(f"Failed to check failed event images: {e}")
+        return True
+
+
+def store_event_image(upstream_url: str, url: Optional[str], checked_at: datetime) -> None:
+    """
+    Stores the cached copy of an upstream image.
+
+    :param upstream_url: The upstream URL.
+    :param url: The cached image URL, or None if fetching failed.
+    :param checked_at: When the upstream image was fetched.
+    """
+    try:
+        event_images_collection.update_one(
+            {"_id": upstream_url}, {"$set": {"url": url, "checkedAt": checked_at}}, upsert=True
+        )
+    except Exception as e:
+        logging.error(f"Failed to store event image {upstream_url}: {e}")
+
+
+def remove_event_images_except(upstream_urls: Iterable[str]) -> List[dict]:
+    """
+    Removes the cache entries of images no event uses anymore.
+
+    :param upstream_urls: The upstream URLs still in use.
+    :return: The removed entries.
+    """
+    try:
+        query = {"_id": {"$nin": list(upstream_urls)}}
+        removed = list(event_images_collection.find(query))
+        if removed:
+            event_images_collection.delete_many({"_id": {"$in": [doc["_id"] for doc in removed]}})
+        return removed
+    except Exception as e:
+        logging.error(f"Failed to remove unused event images: {e}")
+        return []
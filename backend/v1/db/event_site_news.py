@@ -0,0 +1,68 @@
+"""Event site news, stored by the refresh job and served by v1/api/news.py."""
+import hashlib
+import logging
+from datetime import datetime
+from typing import List, Optional
+
+from pymongo import UpdateOne
+
+from v1.db.models.event_site_news import EventSiteNews
+from v1.db.mongo import db
+
+event_site_news_collection = db["event_site_news"]
+
+
+def news_document(news: EventSiteNews) -> Optional[dict]:
+    """
+    Build the stored document of a validated news item, keyed by a hash of its content.
+
+    :param news: The news item, with `date` combined with its time by get_event_site_news.
+    :return: The document, or None if the item has no publication time.
+    """
+    if not isinstance(news.date, datetime):
+        return None
+    content = repr((news.date.isoformat(), news.title, news.description, news.by))
+    return {
+        "_id": hashlib.sha256(content.encode("utf-8")).hexdigest()[:32],
+        "published": news.date,
+        "title": news.title,
+        "description": news.description,
+        "by": news.by,
+    }
+
+
+def store_news(news: List[EventSiteNews]) -> bool:
+    """
+    Stores the current news: new items are inserted and items no longer published are removed.
+    Items that are already stored are not written again.
+
+    :param news: All current news items.
+    :return: True if anything was inserted or removed.
+    """
+    documents = [doc for doc in map(news_document, news) if doc is not None]
+    try:
+        changed = False
+        if documents:
+            result = event_site_news_collection.bulk_write(
+                [UpdateOne({"_id": doc["_id"]}, {"$setOnInsert": doc}, upsert=True) for doc in documents],
+                ordered=False,
+            )
+            changed = result.upserted_count > 0
+        removed = event_site_news_collection.delete_many({"_id": {"$nin": [doc["_id"] for doc in documents]}})
+        return changed or removed.deleted_count > 0
+    except Exception as e:
+        logging.error(f"Failed to store event site news: {e}")
+        return False
+
+
+def get_stored_news() -> List[dict]:
+    """
+    Retrieves the stored news, newest first.
+
+    :return: The news documents.
+    """
+    try:
+        return list(event_site_news_collection.find({}).sort("published", -1))
+    except Exception as e:
+        logging.error(f"Failed to retrieve event site news: {e}")
+        return []
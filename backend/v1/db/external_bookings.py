@@ -3,13 +3,13 @@ import logging
 from typing import Dict, List, Set
 from pymongo import UpdateOne
 from v1.db.mongo import external_event_bookings_collection
+from v1.db.data_versions import bump_version, BOOKINGS
 
 
-def upsert_user_bookings(userId: int, event_ids: List[int]) -> None:
-    """Replace all bookings for userId with the given event_ids."""
+def upsert_user_bookings(userId: int, event_ids: List[int]) -> bool:
+    """Replace all bookings for userId with the given event_ids. Returns True if any booking changed."""
     if not event_ids:
-        delete_user_bookings(userId)
-        return
+        return delete_user_bookings(userId)
     ops = [
         UpdateOne(
             {"userId": userId, "eventId": eid},
@@ -19,20 +19,24 @@ def upsert_user_bookings(userId: int, event_ids: List[int]) -> None:
         for eid in event_ids
     ]
     try:
-        external_event_bookings_collection.bulk_write(ops, ordered=False)
-        external_event_bookings_collection.delete_many(
+        written = external_event_bookings_collection.bulk_write(ops, ordered=False)
+        deleted = external_event_bookings_collection.delete_many(
             {"userId": userId, "eventId": {"$nin": event_ids}}
         )
+        return bool(written.upserted_count or deleted.deleted_count)
     except Exception as e:
         logging.error(f"[external_bookings] upsert_user_bookings failed for userId={userId}: {e}")
+        return False
 
 
-def delete_user_bookings(userId: int) -> None:
-    """Remove all booking records for a user."""
+def delete_user_bookings(userId: int) -> bool:
+    """Remove all booking records for a user. Returns True if any booking was removed."""
     try:
-        external_event_bookings_collection.delete_many({"userId": userId})
+        result = external_event_bookings_collection.delete_many({"userId": userId})
+        return bool(result and result.deleted_count)
     except Exception as e:
         logging.error(f"[external_bookings] delete_user_bookings failed for userId={userId}: {e}")
+        return False
 
 
 def delete_booking(userId: int, eventId: int) -> None:
@@ -41,6 +45,7 @@ def delete_booking(userId: int, eventId: int) -> None:
         external_event_bookings_collection.delete_one({"userId": userId, "eventId": eventId})
     except Exception as e:
         logging.error(f"[external_bookings] delete_booking failed userId={userId} eventId={eventId}: {e}")
+    _booking_changed(eventId)
 
 
 def add_booking(userId: int, eventId: int) -> None:
@@ -53,6 +58,18 @@ def add_booking(userId: int, eventId: int) -> None:
         )
     except Exception as e:
         logging.error(f"[external_bookings] add_booking failed userId={userId} eventId={eventId}: {e}")
+    _booking_changed(eventId)
+
+
+def _booking_changed(eventId: int) -> None:
+    """Keep the materialized unified event's attendees and the bookings version in step with a booking change."""
+    # Imported here, the unified events store is built on top of this module.
+    from v1.events.events_db import sync_external_event
+    try:
+        sync_external_event(eventId)
+    except Exception as e:
+        logging.error(f"[external_bookings] unified event sync failed eventId={eventId}: {e}")
+    bump_version(BOOKINGS)
 
 
 def get_bookings_by_event_ids(event_ids: List[int]) -> Dict[int, Set[int]]:
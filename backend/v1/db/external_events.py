@@ -1,5 +1,7 @@
 import logging
-from typing import List
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from pymongo import UpdateOne
 from v1.db.models.external_events import ExternalEventDetails, ExternalRoot
 from v1.db.mongo import external_event_collection, external_root_collection
 
@@ -39,31 +41,26 @@ def get_stored_external_root() -> ExternalRoot:
         return None
 
 
-def store_external_event_details(events: List[ExternalEventDetails]):
+def store_external_event_details(events: List[ExternalEventDetails]) -> bool:
     """
     Stores external event details in the MongoDB database.
 
-    :param event: The external event details.
+    :param events: The external event details.
+    :return: True if the events were stored.
     """
-    # not yet sure if i want to update or not so thats why this is still here.
-    # try:
-    #     external_event_collection.insert_many(event.model_dump() for event in events)
-    # except Exception as e:
-    #     logging.error(f"Failed to insert events: {e}")
-
-    ## Update the existing event if it exists, otherwise insert a new event
+    if not events:
+        return True
     try:
-        for event in events:
-            event_dict = event.model_dump()
-            # Print the title
-            logging.info(f"Storing event: {event_dict['titel']}")
-            external_event_collection.update_one(
-                {'eventId': event_dict['eventId']},  # filter
-                {'$set': event_dict},  # update
-                upsert=True  # insert if doesn't exist
-            )
+        # The cached image is set separately by the refresh job, see set_cached_image_urls
+        external_event_collection.bulk_write([
+            UpdateOne({'eventId': event.eventId}, {'$set': event.model_dump(exclude={"cachedImageUrl"})}, upsert=True)
+            for event in events
+        ], ordered=False)
+        logging.info(f"Stored {len(events)} external events.")
+        return True
     except Exception as e:
         logging.error(f"Failed to insert/update events: {e}")
+        return False
 
 
 def get_stored_external_event_details(
@@ -91,6 +88,16 @@ def get_stored_external_event_details(
         return []
 
 
+def get_stored_external_event_detail(event_id: int) -> ExternalEventDetails | None:
+    """Return a single stored external event, or None if it is not stored."""
+    try:
+        event = external_event_collection.find_one({"eventId": event_id})
+        return ExternalEventDetails(**event) if event else None
+    except Exception as e:
+        logging.error(f"Failed to retrieve event {event_id}: {e}")
+        return None
+
+
 def get_all_stored_external_event_details() -> List[ExternalEventDetails]:
     """Return all stored external events from MongoDB."""
     try:
@@ -99,6 +106,40 @@ def get_all_stored_external_event_details() -> List[ExternalEventDetails]:
         logging.error(f"Failed to retrieve all external events: {e}")
         return []
 
+def get_stored_external_event_details_for_date(date: str) -> List[ExternalEventDetails]:
+    """
+    Return the stored external events of one upstream date.
+
+    :param date: The date as listed by the external root, e.g. "2026-05-01".
+    :return: The external event details.
+    """
+    try:
+        day = datetime.strptime(date, '%Y-%m-%d')
+        return [
+            ExternalEventDetails(**event) for event in
+            external_event_collection.find({"eventDate": {"$gte": day, "$lt": day + timedelta(days=1)}})
+        ]
+    except Exception as e:
+        logging.error(f"Failed to retrieve events for {date}: {e}")
+        return []
+
+def set_cached_image_urls(urls: Dict[int, Optional[str]]):
+    """
+    Stores the locally cached image URLs of external events.
+
+    :param urls: The cached image URL, or None, by event ID.
+    """
+    if not urls:
+        return
+    try:
+        external_event_collection.bulk_write([
+            UpdateOne({"eventId": event_id, "cachedImageUrl": {"$ne": url}}, {"$set": {"cachedImageUrl": url}})
+            for event_id, url in urls.items()
+        ], ordered=False)
+    except Exception as e:
+        logging.error(f"Failed to store cached image URLs: {e}")
+
+
 def clean_external_events(keeping: List[ExternalEventDetails]):
     """
     Cleans the external events in the MongoDB database.
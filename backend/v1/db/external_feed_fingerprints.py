@@ -0,0 +1,53 @@
+"""Fingerprints of the upstream per-date event feeds, keyed by date. See v1/external/event_api.py."""
+import logging
+from typing import Dict, Iterable, List
+
+from pymongo import ReplaceOne
+
+from v1.db.mongo import db
+
+external_feed_fingerprints_collection = db["external_feed_fingerprints"]
+
+
+def get_feed_fingerprints() -> Dict[str, dict]:
+    """
+    Retrieves the recorded feed fingerprints.
+
+    :return: The fingerprint documents, with `fingerprint`, `etag` and `lastModified`, by date.
+    """
+    try:
+        return {doc["_id"]: doc for doc in external_feed_fingerprints_collection.find({})}
+    except Exception as e:
+        logging.error(f"Failed to read external feed fingerprints: {e}")
+        return {}
+
+
+def store_feed_fingerprints(fingerprints: List[dict]) -> None:
+    """
+    Records the fingerprints of feeds that have been fully processed.
+
+    :param fingerprints: The fingerprint documents, with the date as `_id`.
+    """
+    if not fingerprints:
+        return
+    try:
+        external_feed_fingerprints_collection.bulk_write(
+            [ReplaceOne({"_id": doc["_id"]}, doc, upsert=True) for doc in fingerprints],
+            ordered=False,
+        )
+    except Exception as e:
+        logging.error(f"Failed to store external feed fingerprints: {e}")
+
+
+def remove_feed_fingerprints_except(dates: Iterable[str]) -> int:
+    """
+    Removes the fingerprints of dates that are no longer listed upstream.
+
+    :param dates: The dates to keep.
+    :return: The number of removed fingerprints.
+    """
+    try:
+        return external_feed_fingerprints_collection.delete_many({"_id": {"$nin": list(dates)}}).deleted_count
+    except Exception as e:
+        logging.error(f"Failed to remove external feed fingerprints: {e}")
+        return 0
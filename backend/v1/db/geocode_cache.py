@@ -0,0 +1,45 @@
+"""Persisted geocoding results, keyed by normalized address. See v1/google_maps_api/geocoder.py."""
+import logging
+from datetime import datetime
+from typing import Optional
+
+from v1.db.mongo import db
+
+geocode_cache_collection = db["geocode_cache"]
+
+
+def initialize_indexes() -> None:
+    # Expired entries are also ignored on read; the TTL index only cleans them up
+    geocode_cache_collection.create_index("expiresAt", expireAfterSeconds=0)
+
+
+def get_cached_geocode(key: str) -> Optional[dict]:
+    """
+    Retrieves a cached geocoding result.
+
+    :param key: The normalized address.
+    :return: The cache entry with `location` (None for "no result") and `expiresAt`, or None if not cached.
+    """
+    try:
+        return geocode_cache_collection.find_one({"_id": key}, {"_id": 0, "location": 1, "expiresAt": 1})
+    except Exception as e:
+        logging.error(f"Failed to read geocode cache for {key!r}: {e}")
+        return None
+
+
+def store_geocode(key: str, location: Optional[dict], expires_at: datetime) -> None:
+    """
+    Stores a geocoding result.
+
+    :param key: The normalized address.
+    :param location: The GeoLocation as a dict, or None if the address has no result.
+    :param expires_at: When the entry expires.
+    """
+    try:
+        geocode_cache_collection.update_one(
+            {"_id": key},
+            {"$set": {"location": location, "expiresAt": expires_at}},
+            upsert=True,
+        )
+    except Exception as e:
+        logging.error(f"Failed to store geocode cache for {key!r}: {e}")
@@ -0,0 +1,51 @@
+"""Reference counts of content-addressed images, see v1/shared/image_store.py."""
+import logging
+
+from pymongo import ReturnDocument
+
+from v1.db.mongo import db
+
+image_refs_collection = db["image_refs"]
+
+
+def add_image_ref(key: str) -> None:
+    """
+    Records one more reference to an image.
+
+    :param key: The image's path in the store, its content hash and extension.
+    """
+    image_refs_collection.update_one({"_id": key}, {"$inc": {"refs": 1}}, upsert=True)
+
+
+def release_image_ref(key: str) -> bool:
+    """
+    Drops one reference to an image.
+
+    :param key: The image's path in the store, its content hash and extension.
+    :return: True if that was the last reference and the image can be deleted.
+    """
+    try:
+        doc = image_refs_collection.find_one_and_update(
+            {"_id": key}, {"$inc": {"refs": -1}}, return_document=ReturnDocument.AFTER
+        )
+        if doc is None or doc["refs"] > 0:
+            return False
+        # Only delete if no new reference arrived in the meantime
+        return image_refs_collection.delete_one({"_id": key, "refs": {"$lte": 0}}).deleted_count == 1
+    except Exception as e:
+        logging.error(f"Failed to release image reference {key}: {e}")
+        return False
+
+
+def has_image_ref(key: str) -> bool:
+    """
+    Checks whether an image is referenced.
+
+    :param key: The image's path in the store, its content hash and extension.
+    :return: True if the image is referenced, or if that could not be checked.
+    """
+    try:
+        return image_refs_collection.find_one({"_id": key, "refs": {"$gt": 0}}, {"_id": 1}) is not None
+    except Exception as e:
+        logging.error(f"Failed to check image reference {key}: {e}")
+        return True
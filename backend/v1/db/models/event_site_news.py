@@ -1,4 +1,5 @@
-from pydantic import BaseModel
+from datetime import datetime
+from pydantic import BaseModel, Field
 from typing import List, Optional
 from pydantic import BaseModel
 
@@ -8,3 +9,11 @@ class EventSiteNews(BaseModel):
     title: Optional[str] = None
     description: str
     by: str
+
+
+class NewsItem(BaseModel):
+    id: str = Field(description="Content hash of the news item", example="3fa1c2d4e5b6a7980f1e2d3c4b5a6978")
+    published: datetime
+    title: Optional[str] = None
+    description: str
+    by: str
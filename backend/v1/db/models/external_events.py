@@ -45,6 +45,8 @@ class ExternalEventDetails(BaseModel):
     imageUrl150: Optional[str] = None
     imageUrl300: Optional[str] = None
     eventUrl: str
+    # Locally cached copy of the event image, set by the refresh job (v1/external/event_images.py)
+    cachedImageUrl: Optional[str] = None
 
 class ExternalEvent(BaseModel):
     eventId: int
@@ -1,6 +1,7 @@
+import hashlib
 from enum import Enum
 from pydantic import BaseModel, Field, field_validator
-from typing import Optional, List
+from typing import Any, Callable, Dict, Iterable, NamedTuple, Optional, List
 from datetime import datetime
 
 
@@ -162,6 +163,11 @@ def effective_setting(settings: dict, key: str, default: str = PrivacySetting.ME
     return val or default
 
 
+def settings_version(settings: Optional[dict]) -> str:
+    """Return a short hash of a user's stored settings, carried in access tokens as `sv`."""
+    return hashlib.sha256(repr(sorted((settings or {}).items())).encode("utf-8")).hexdigest()[:16]
+
+
 def viewer_can_see(target_setting: str, viewer: dict | None, setting_key: str) -> bool:
     """Return True if `viewer` is allowed to see data gated by `target_setting`."""
     viewer_is_member = viewer is not None and viewer.get("isMember", False)
@@ -182,6 +188,138 @@ def viewer_can_see(target_setting: str, viewer: dict | None, setting_key: str) -
     return viewer_is_member
 
 
+class PrivacyRule(NamedTuple):
+    field: str                    # Dotted path in the user document
+    setting: str                  # Privacy setting gating the field
+    default: str                  # Value used when the user has not set the setting
+    hidden: Callable[[], Any]     # Returns the value shown instead
+    applies_to_self: bool = False
+
+
+# Fields hidden from viewers the owner's privacy settings don't allow
+PROFILE_PRIVACY_RULES: List[PrivacyRule] = [
+    PrivacyRule("contact_info.email", "show_email", PrivacySetting.NO_ONE.value, lambda: None, applies_to_self=True),
+    PrivacyRule("contact_info.phone", "show_phone", PrivacySetting.NO_ONE.value, lambda: None, applies_to_self=True),
+    PrivacyRule("location", "show_location", PrivacySetting.NO_ONE.value, lambda: None),
+    PrivacyRule("interests", "show_interests", PrivacySetting.MEMBERS_ONLY.value, list),
+    PrivacyRule("hometown", "show_hometown", PrivacySetting.MEMBERS_ONLY.value, lambda: None),
+    PrivacyRule("birthdate", "show_birthdate", PrivacySetting.MEMBERS_ONLY.value, lambda: None),
+    PrivacyRule("gender", "show_gender", PrivacySetting.NO_ONE.value, lambda: None),
+    PrivacyRule("sexuality", "show_sexuality", PrivacySetting.NO_ONE.value, lambda: None),
+    PrivacyRule("relationship_style", "show_relationship_style", PrivacySetting.NO_ONE.value, lambda: None),
+    PrivacyRule("relationship_status", "show_relationship_status", PrivacySetting.NO_ONE.value, lambda: None),
+    PrivacyRule("social_vibes", "show_social_vibes", PrivacySetting.MEMBERS_ONLY.value, list),
+    PrivacyRule("pronomen", "show_pronomen", PrivacySetting.NO_ONE.value, lambda: None),
+]
+
+# Whole profiles are only listed for viewers allowed by show_profile
+PROFILE_VISIBILITY_SETTING = "show_profile"
+PROFILE_VISIBILITY_DEFAULT = PrivacySetting.MEMBERS_ONLY.value
+
+
+def _rules_for(fields: Optional[Iterable[str]]) -> List[PrivacyRule]:
+    if fields is None:
+        return PROFILE_PRIVACY_RULES
+    fields = set(fields)
+    return [rule for rule in PROFILE_PRIVACY_RULES if rule.field.split(".")[0] in fields]
+
+
+def _hide(user: dict, rule: PrivacyRule) -> None:
+    *parents, name = rule.field.split(".")
+    target = user
+    for parent in parents:
+        target[parent] = target.get(parent) or {}
+        target = target[parent]
+    target[name] = rule.hidden()
+
+
+def profile_visible(user: dict, viewer: dict) -> bool:
+    """Return True if `viewer` may see the profile of `user` at all."""
+    if user.get("userId") == viewer.get("userId"):
+        return True
+    settings = user.get("settings") or {}
+    return viewer_can_see(
+        settings.get(PROFILE_VISIBILITY_SETTING, PROFILE_VISIBILITY_DEFAULT), viewer, PROFILE_VISIBILITY_SETTING)
+
+
+def apply_profile_privacy(user: dict, viewer: dict, fields: Optional[Iterable[str]] = None) -> dict:
+    """
+    Hide the fields of a user document that `viewer` may not see, in place.
+
+    :param user: The user document, including the settings of the fields to check.
+    :param viewer: The viewing user.
+    :param fields: Only check these top level fields; all when None.
+    :return: The user document.
+    """
+    settings = user.get("settings") or {}
+    is_self = user.get("userId") == viewer.get("userId")
+    for rule in _rules_for(fields):
+        if is_self and not rule.applies_to_self:
+            continue
+        if viewer_can_see(settings.get(rule.setting, rule.default), viewer, rule.setting):
+            continue
+        _hide(user, rule)
+    return user
+
+
+def filter_profiles(users: Iterable[dict], viewer: dict, fields: Optional[Iterable[str]] = None) -> List[dict]:
+    """
+    Apply :func:`profile_visible` and :func:`apply_profile_privacy` to many users at once.
+
+    What the viewer may see is resolved once per setting and value, instead of once per
+    user and field.
+
+    :param users: The user documents.
+    :param viewer: The viewing user.
+    :param fields: Only check these top level fields; all when None.
+    :return: The visible user documents, with hidden fields cleared in place.
+    """
+    rules = _rules_for(fields)
+    allowed = {
+        (setting, value.value): viewer_can_see(value.value, viewer, setting)
+        for setting in {PROFILE_VISIBILITY_SETTING, *(rule.setting for rule in rules)}
+        for value in PrivacySetting
+    }
+
+    def can_see(settings: dict, setting: str, default: str) -> bool:
+        value = settings.get(setting, default)
+        key = (setting, value)
+        return allowed[key] if key in allowed else viewer_can_see(value, viewer, setting)
+
+    viewer_id = viewer.get("userId")
+    result = []
+    for user in users:
+        settings = user.get("settings") or {}
+        is_self = user.get("userId") == viewer_id
+        if not is_self and not can_see(settings, PROFILE_VISIBILITY_SETTING, PROFILE_VISIBILITY_DEFAULT):
+            continue
+        for rule in rules:
+            if (is_self and not rule.applies_to_self) or can_see(settings, rule.setting, rule.default):
+                continue
+            _hide(user, rule)
+        result.append(user)
+    return result
+
+
+def profile_projection(fields: Iterable[str]) -> dict:
+    """
+    Build a MongoDB projection for the given top level fields, plus what is needed to
+    apply the privacy rules to them.
+
+    :param fields: The requested top level user fields.
+    :return: The projection.
+    """
+    projection = {"_id": 0, "userId": 1, f"settings.{PROFILE_VISIBILITY_SETTING}": 1}
+    for field in fields:
+        projection[field] = 1
+    for rule in _rules_for(fields):
+        projection[f"settings.{rule.setting}"] = 1
+    if "settings" in projection:
+        # A parent and its sub paths can't both be projected
+        projection = {k: v for k, v in projection.items() if not k.startswith("settings.")}
+    return projection
+
+
 class ContactInfo(BaseModel):
     email: Optional[str] = Field(None, example="johndoe@example.com")
     phone: Optional[str] = Field(None, example="+1234567890")
@@ -208,6 +346,11 @@ class User(BaseModel):
     slogan: Optional[str] = Field(None, example="Live and Let Live")
     avatar_url: Optional[str] = Field(None,
                                       example="https://example.com/avatar.jpg")
+    avatar_thumbnails: Optional[Dict[str, str]] = Field(
+        None,
+        example={"64": "/static/img/cas/3f/a1/3fa1...e9.jpg", "256": "/static/img/cas/0b/7c/0b7c...42.jpg"},
+        description="Square thumbnails of the avatar by size in pixels",
+    )
     firstName: Optional[str] = Field(None, example="John Doe")
     lastName: Optional[str] = Field(None, example="John Doe")
     interests: List[UserInterest] = Field(default_factory=list, example=[])
@@ -7,6 +7,7 @@ from pydantic import BaseModel
 from v1.db.models.tokenstorage import TokenStorage
 from v1.db.models.user import User
 from v1.user_events.user_events_model import UserEvent
+from v1.events.events_model import Event
 from v1.db.models.external_events import ExternalEventDetails, ExternalRoot, ExternalEventBooking
 from v1.db.review_users import review_users
 
@@ -25,6 +26,7 @@ user_event_collection = db[get_collection_name(UserEvent)]
 external_event_collection = db[get_collection_name(ExternalEventDetails)]
 external_root_collection = db[get_collection_name(ExternalRoot)]
 external_event_bookings_collection = db[get_collection_name(ExternalEventBooking)]
+event_collection = db[get_collection_name(Event)]
 
 def initialize_db():
 
@@ -42,6 +44,7 @@ def initialize_db():
 
         initialize_collection(ExternalEventDetails, db)
         external_event_collection.create_index("eventId", unique=True)
+        external_event_collection.create_index("eventDate")
 
         initialize_collection(ExternalEventBooking, db)
         external_event_bookings_collection.create_index(
@@ -52,6 +55,9 @@ def initialize_db():
         initialize_collection(ExternalRoot, db)
 
         initialize_collection(UserEvent, db)
+        user_event_collection.create_index("start")
+
+        initialize_collection(Event, db)
 
         # Check if in local test mode
         if TEST_MODE.lower() == 'true':
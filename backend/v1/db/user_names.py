@@ -0,0 +1,98 @@
+"""
+Cached userId -> display name lookups.
+
+Every user event read path decorates events with the names of the owner, hosts
+and attendees. The set of names involved is small and almost never changes, so
+names are kept in a bounded in-process LRU and only cache misses are fetched,
+in one projected `$in` query.
+
+Entries expire after `NAME_TTL_SECONDS` so that name changes made through another
+worker process are eventually picked up; changes made through this process are
+applied immediately via :func:`invalidate_display_name`.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable
+
+from v1.db.mongo import user_collection
+
+UNKNOWN_USER_NAME = ""
+MAX_CACHED_NAMES = 4096
+NAME_TTL_SECONDS = 600
+
+_cache: "OrderedDict[int, tuple[str, float]]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def format_display_name(user: dict) -> str:
+    """Build the display name (`firstName lastName`) for a user document."""
+    parts = [user.get("firstName"), user.get("lastName")]
+    return " ".join(part for part in parts if part)
+
+
+def get_display_names(user_ids: Iterable[int]) -> Dict[int, str]:
+    """
+    Resolve display names for the given user IDs.
+
+    Unknown user IDs resolve to `UNKNOWN_USER_NAME` and are not cached, so a user
+    created later is picked up on the next lookup.
+
+    :param user_ids: The user IDs to resolve.
+    :return: A dictionary of user IDs and display names, with an entry for every requested ID.
+    """
+    names: Dict[int, str] = {}
+    misses = []
+    now = time.monotonic()
+    with _lock:
+        for user_id in set(user_ids):
+            entry = _cache.get(user_id)
+            if entry is None or entry[1] < now:
+                misses.append(user_id)
+                continue
+            _cache.move_to_end(user_id)
+            names[user_id] = entry[0]
+
+    if misses:
+        try:
+            found = {
+                user["userId"]: format_display_name(user)
+                for user in user_collection.find(
+                    {"userId": {"$in": misses}},
+                    {"_id": 0, "userId": 1, "firstName": 1, "lastName": 1},
+                )
+            }
+        except Exception as e:
+            logging.error(f"Failed to resolve user names for {len(misses)} users: {e}")
+            found = {}
+
+        expires_at = now + NAME_TTL_SECONDS
+        with _lock:
+            for user_id, name in found.items():
+                _cache[user_id] = (name, expires_at)
+                _cache.move_to_end(user_id)
+            while len(_cache) > MAX_CACHED_NAMES:
+                _cache.popitem(last=False)
+
+        for user_id in misses:
+            names[user_id] = found.get(user_id, UNKNOWN_USER_NAME)
+
+    return names
+
+
+def get_display_name(user_id: int) -> str:
+    """Resolve the display name for a single user ID."""
+    return get_display_names([user_id])[user_id]
+
+
+def invalidate_display_name(user_id: int) -> None:
+    """Drop a cached display name, e.g. after the user's name has been updated."""
+    with _lock:
+        _cache.pop(user_id, None)
+
+
+def clear_display_names() -> None:
+    """Drop all cached display names."""
+    with _lock:
+        _cache.clear()
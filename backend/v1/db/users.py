@@ -1,8 +1,13 @@
 import json
+import logging
+from datetime import datetime
 from typing import Optional
 from pydantic import ValidationError
+from pymongo import ReturnDocument
 from v1.db.models.user import ContactInfo, PrivacySetting, User, UserSettings
 from v1.db.mongo import user_collection
+from v1.db.user_names import invalidate_display_name
+from v1.db.data_versions import bump_version, USER_LOCATIONS, USER_PROFILES
 
 
 def get_user(user_id: int) -> User:
@@ -27,9 +32,52 @@ def update_user(user_id: int, user: User) -> User:
     :return: The user document.
     """
     user_collection.update_one({"userId": user_id}, {"$set": user})
+    bump_version(USER_PROFILES)
     return user
 
 
+def update_user_location(user_id: int, location: dict) -> None:
+    """
+    Updates only the location of a user document in the MongoDB database.
+
+    :param user_id: The user ID.
+    :param location: The location document.
+    """
+    user_collection.update_one({"userId": user_id}, {"$set": {"location": location}})
+    bump_version(USER_LOCATIONS)
+
+
+def mark_location_visibility_changed(user_id: int) -> None:
+    """
+    Records that who may see a user's location changed, so that live location clients
+    re-check it, see :func:`get_location_updates`.
+
+    :param user_id: The user ID.
+    """
+    user_collection.update_one({"userId": user_id}, {"$set": {"visibilityChangedAt": datetime.utcnow()}})
+    bump_version(USER_LOCATIONS)
+
+
+def get_location_updates(since) -> list[dict]:
+    """
+    Retrieves the locations of users sharing their location that were updated at or after a time,
+    and the users whose location visibility changed at or after it, including those who stopped
+    sharing their location.
+
+    :param since: The earliest location timestamp or visibility change to include.
+    :return: Documents with userId, location, settings and visibilityChangedAt.
+    """
+    query = {"$or": [
+        {
+            "location.timestamp": {"$gte": since},
+            "settings.show_location": {"$ne": PrivacySetting.NO_ONE.value},
+        },
+        {"visibilityChangedAt": {"$gte": since}},
+    ]}
+    projection = {"_id": 0, "userId": 1, "location": 1, "settings": 1, "visibilityChangedAt": 1}
+    return list(user_collection.find(query, projection))
+
+
 def create_user(response_json: dict) -> User:
     """
     Creates a new user document in the MongoDB database
@@ -40,6 +88,7 @@ def create_user(response_json: dict) -> User:
     """
     newuser = map_authresponse_to_user(response_json)
     user_collection.insert_one(newuser)
+    bump_version(USER_PROFILES)
     return newuser
 
 
@@ -56,34 +105,78 @@ def get_users(show_location: Optional[bool] = None) -> list[User]:
     return list(user_collection.find(query))
 
 
-def get_users_by_ids(user_ids: list[int]) -> list[dict]:
-    return list(user_collection.find({"userId": {"$in": user_ids}}))
+def get_users_by_ids(user_ids: list[int], projection: Optional[dict] = None) -> list[dict]:
+    return list(user_collection.find({"userId": {"$in": user_ids}}, projection))
 
 
-def get_users_showing_location() -> list[User]:
+def get_users_showing_location(projection: Optional[dict] = None) -> list[User]:
     """
     Retrieves all user documents from the MongoDB database where ShowLocation is not no_one.
 
+    :param projection: Optional MongoDB projection.
     :return: The user documents.
     """
     query = {"settings.show_location": {"$ne": PrivacySetting.NO_ONE.value}}
-    return list(user_collection.find(query))
+    return list(user_collection.find(query, projection))
+
+
+def upsert_user_from_authresponse(response_json: dict) -> Optional[dict]:
+    """
+    Creates or updates the user logging in, in a single round trip.
 
+    The name, email and membership from the login response are set on every login; the rest of
+    a new user's document is only written when the user is created.
 
-def update_user_from_authresponse(user_id: int, response_json: dict) -> None:
+    :param response_json: The login response from the member API.
+    :return: The user document after the login, or None if the response is not a valid user.
+    """
+    newuser = map_authresponse_to_user(response_json)
+    if newuser is None:
+        return None
+    user_id = newuser["userId"]
     updates = {
-        "firstName": response_json.get("firstName"),
-        "lastName": response_json.get("lastName"),
-        "contact_info.email": response_json.get("email"),
-        "isMember": response_json.get("type") == "M",
+        "firstName": newuser["firstName"],
+        "lastName": newuser["lastName"],
+        "contact_info.email": newuser["contact_info"]["email"],
+        "isMember": newuser["isMember"],
     }
-    user_collection.update_one({"userId": user_id}, {"$set": updates})
+    on_insert = {key: value for key, value in newuser.items()
+                 if key not in ("userId", "firstName", "lastName", "isMember", "contact_info")}
+    on_insert["contact_info.phone"] = newuser["contact_info"]["phone"]
+
+    before = user_collection.find_one_and_update(
+        {"userId": user_id},
+        {"$set": updates, "$setOnInsert": on_insert},
+        upsert=True,
+        return_document=ReturnDocument.BEFORE,
+    )
+    if before is None:
+        bump_version(USER_PROFILES)
+        return newuser
+
+    user = {
+        **before,
+        "firstName": updates["firstName"],
+        "lastName": updates["lastName"],
+        "isMember": updates["isMember"],
+        "contact_info": {**(before.get("contact_info") or {}), "email": updates["contact_info.email"]},
+    }
+    if user != before:
+        invalidate_display_name(user_id)
+        bump_version(USER_PROFILES)
+        # Imported here, the unified events store depends on this module.
+        from v1.events.events_db import sync_events_involving_user
+        try:
+            sync_events_involving_user(user_id)
+        except Exception as e:
+            logging.error(f"Failed to sync unified events for user {user_id}: {e}")
+    return user
 
 
 def map_authresponse_to_user(response_json: dict) -> User:
     user = User(
         userId=response_json["memberId"],
-        isMember=response_json["type"] == "M",
+        isMember=response_json.get("type") == "M",
         settings=UserSettings(),  # Default values
     )
 
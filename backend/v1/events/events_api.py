@@ -1,10 +1,16 @@
 from __future__ import annotations
-from typing import List, Optional
-from fastapi import APIRouter, Depends, Query
+from datetime import datetime
+from typing import List, Literal, Optional, Union
+from fastapi import APIRouter, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
 
-from v1.events.events_model import Event
+from v1.events.events_model import Event, EventChanges, EventSummary
 from v1.events.events_service import (
+    get_unified_event,
+    list_event_changes,
     list_unified_events,
+    list_unified_events_page,
+    unified_events_etag,
     create_user_event_via_unified,
     update_user_event_via_unified,
     delete_user_event_via_unified,
@@ -12,25 +18,81 @@ from v1.events.events_service import (
     unattend_event_via_unified,
 )
 from v1.events.events_model import Event as UnifiedEvent
+from v1.events.events_stream import stream_event_changes
 from fastapi import HTTPException
-from v1.request_filter import validate_request
+from v1.request_filter import validate_claims, validate_request, validate_token
+from v1.shared.fieldsets import parse_fields, render_fields
+from v1.shared.http_cache import etag_matches, not_modified
+from v1.shared.responses import fast_json, fast_response, preferred_media_type, variant_etag
 
 
 unified_events_v1 = APIRouter(prefix="/v1")
 
 
-@unified_events_v1.get("/events", response_model=List[Event])
+@unified_events_v1.get("/events", response_model=List[Union[Event, EventSummary]])
 async def get_events(
+    request: Request,
+    response: Response,
     attending: Optional[bool] = Query(None),
     bookable: Optional[bool] = Query(None),
     official: Optional[bool] = Query(None),
-    current_user: dict = Depends(validate_request),
+    start_from: Optional[datetime] = Query(None, alias="from", description="Only events starting at or after this time"),
+    start_to: Optional[datetime] = Query(None, alias="to", description="Only events starting before this time"),
+    limit: Optional[int] = Query(None, ge=1, le=500, description="Page size; omit to get all events"),
+    cursor: Optional[str] = Query(None, description="Cursor from the x-next-cursor header of the previous page"),
+    view: Literal["full", "compact"] = Query("full", description="compact leaves out descriptions, hosts, attendees and extras"),
+    fields: Optional[str] = Query(None, description="Comma separated Event fields to return; overrides view"),
+    current_user: dict = Depends(validate_claims),
 ):
-    return list_unified_events(
+    selected = parse_fields(fields, Event, always=["id"])
+    media_type = preferred_media_type(request)
+    etag = variant_etag(unified_events_etag(current_user, request.url.query), media_type)
+    if etag_matches(request, etag):
+        return not_modified(etag, {"Vary": "Accept"})
+
+    events, next_cursor = list_unified_events_page(
         current_user=current_user,
         attending=attending,
         bookable=bookable,
         official=official,
+        start_from=start_from,
+        start_to=start_to,
+        limit=limit,
+        cursor=cursor,
+        compact=view == "compact",
+        fields=selected,
+    )
+    if next_cursor:
+        response.headers["x-next-cursor"] = next_cursor
+    if etag:
+        response.headers["ETag"] = etag
+    if selected:
+        return render_fields(events, Event, selected, response, media_type)
+    # The events are built by the service from stored models, so skip re-validating them
+    return fast_response(events, media_type, response)
+
+
+@unified_events_v1.get("/events/changes", response_model=EventChanges)
+async def get_event_changes(
+    request: Request,
+    since: Optional[str] = Query(None, description="Token from the previous response; omit for a full sync"),
+    current_user: dict = Depends(validate_claims),
+):
+    """Events created, updated or deleted since `since`, and the token to pass next time."""
+    return fast_response(list_event_changes(current_user, since), preferred_media_type(request))
+
+
+@unified_events_v1.get("/events/stream")
+async def get_event_stream(request: Request, token: dict = Depends(validate_token)):
+    """Server-Sent Events: a `changes` event with the current sync token whenever events change.
+
+    A `resync` event means the client fell behind and was disconnected; it should fetch
+    the changes and reconnect.
+    """
+    return StreamingResponse(
+        stream_event_changes(request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
 
@@ -50,18 +112,18 @@ async def delete_event_proxy(event_id: str, current_user: dict = Depends(validat
 
 
 @unified_events_v1.get("/events/attending", response_model=List[Event])
-async def get_events_attending(current_user: dict = Depends(validate_request)):
-    return list_unified_events(current_user=current_user, attending=True)
+async def get_events_attending(current_user: dict = Depends(validate_claims)):
+    return fast_json(list_unified_events(current_user=current_user, attending=True))
 
 
 @unified_events_v1.get("/events/official", response_model=List[Event])
-async def get_events_official(current_user: dict = Depends(validate_request)):
-    return list_unified_events(current_user=current_user, official=True)
+async def get_events_official(current_user: dict = Depends(validate_claims)):
+    return fast_json(list_unified_events(current_user=current_user, official=True))
 
 
 @unified_events_v1.get("/events/unofficial", response_model=List[Event])
-async def get_events_unofficial(current_user: dict = Depends(validate_request)):
-    return list_unified_events(current_user=current_user, official=False)
+async def get_events_unofficial(current_user: dict = Depends(validate_claims)):
+    return fast_json(list_unified_events(current_user=current_user, official=False))
 
 
 @unified_events_v1.post("/events/{event_id}/attend", response_model=Event)
@@ -81,3 +143,10 @@ async def attend_event(event_id: str, current_user: dict = Depends(validate_requ
 async def unattend_event(event_id: str, current_user: dict = Depends(validate_request)):
     """Unattend an event. Works for both user events (usr prefix) and external events (ext prefix)."""
     return unattend_event_via_unified(event_id, current_user)
+
+
+# Declared last so that the fixed /events/... paths above take precedence.
+@unified_events_v1.get("/events/{event_id}", response_model=Event)
+async def get_event(event_id: str, current_user: dict = Depends(validate_claims)):
+    """Fetch one event (usr or ext prefix) with all its details."""
+    return fast_json(get_unified_event(event_id, current_user))
@@ -0,0 +1,419 @@
+"""
+Materialized unified events.
+
+The event collection holds ready-to-serve unified events for both sources, keyed by
+their unified id (`usr<mongoId>` / `ext<eventId>`), with host and attendee names and
+attendee counts denormalized. Documents are viewer independent (see
+:class:`StoredEvent`); the per-viewer overlay is applied in events_service.
+
+Documents are written whenever their source changes: by the user event mutations in
+user_events_db, by add_booking / delete_booking and by the external events refresh job.
+
+Every write that changes a document stamps it with a new change version (see
+:data:`EVENT_CHANGES`), and removed events are kept as tombstones (`deleted: True`) for
+:data:`TOMBSTONE_RETENTION`, so clients can fetch what changed since a version they have seen.
+"""
+import hashlib
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from pymongo import ReplaceOne
+
+from v1.db.data_versions import begin_version, end_version, get_versions, raise_version, EVENT_CHANGES, EVENT_TOMBSTONES_PRUNED
+from v1.db.mongo import event_collection, user_event_collection
+from v1.db.external_events import get_all_stored_external_event_details, get_stored_external_event_detail
+from v1.db.external_bookings import get_bookings_by_event_ids
+from v1.db.models.external_events import ExternalEventDetails
+from v1.db.user_names import get_display_names, UNKNOWN_USER_NAME
+from v1.events.events_mappers import map_external_event, map_user_event
+from v1.events.events_model import StoredEvent
+from v1.events.events_stream import notify_event_changes
+from v1.user_events.user_events_model import ExtendedUserEvent, UserEvent
+from v1.user_events.user_events_db import extend_user_events, get_safe_user_event, remove_secrets_from_user_events
+
+# Events are listed by start, then case-insensitive name, then id. The sort key fields
+# are stored on each document and covered by an index, so pages can be read by keyset.
+EVENT_SORT = [("start", 1), ("sortName", 1), ("_id", 1)]
+EventSortKey = Tuple[datetime, str, str]
+
+# Deleted events are kept as tombstones for this long, for clients syncing changes.
+TOMBSTONE_RETENTION = timedelta(days=30)
+
+# Tombstones are excluded from every read except the change feed.
+NOT_DELETED = {"deleted": {"$ne": True}}
+
+
+# Fields a compact listing does not need. Attendee IDs are kept for the viewer's `attending`.
+COMPACT_EXCLUDED_FIELDS = {"description": 0, "hosts": 0, "queue": 0, "extras": 0}
+
+
+# Fields needed to sort stored events and to apply the viewer overlay to them
+OVERLAY_FIELDS = ("id", "name", "start", "sortName", "official", "admin", "attendees",
+                  "showAttendees", "bookingStart", "bookingEnd", "hasCapacity")
+
+
+def fields_projection(fields: Iterable[str]) -> dict:
+    """
+    Build a MongoDB projection for the given event fields, plus the overlay fields.
+
+    :param fields: The requested event fields.
+    :return: The projection.
+    """
+    return {name: 1 for name in (*OVERLAY_FIELDS, *fields)}
+
+
+def initialize_indexes() -> None:
+    event_collection.create_index(EVENT_SORT)
+    event_collection.create_index([("official", 1)] + EVENT_SORT)
+    event_collection.create_index("version")
+
+
+def sort_key(event: StoredEvent) -> EventSortKey:
+    """Return the (start, sortName, id) key that events are listed by."""
+    return event.start, event.name.lower(), event.id
+
+
+def build_user_event(ue: ExtendedUserEvent) -> StoredEvent:
+    """
+    Build the stored unified event for a user event.
+
+    :param ue: The extended (safe) user event.
+    :return: The viewer independent unified event.
+    """
+    event = map_user_event(ue, current_user_id=None)
+    has_capacity = ue.maxAttendees is None or len(ue.attendees) < ue.maxAttendees
+    return StoredEvent(**event.model_dump(), hasCapacity=has_capacity)
+
+
+def build_external_event(details: ExternalEventDetails,
+                         attendee_user_ids: Optional[Set[int]],
+                         user_names: Dict[int, str]) -> Optional[StoredEvent]:
+    """
+    Build the stored unified event for an external event.
+
+    All booked users are stored as attendees; whether they are shown is decided per viewer.
+
+    :param details: The external event details.
+    :param attendee_user_ids: The IDs of the users who have booked the event.
+    :param user_names: A dictionary of user IDs and names, covering the attendees.
+    :return: The viewer independent unified event, or None if the event could not be mapped.
+    """
+    event = map_external_event(details, current_user_id=None, booked_ids=set(),
+                               attendee_user_ids=set(attendee_user_ids or []))
+    if not event:
+        return None
+    attendees = sorted(event.attendees, key=lambda a: a.userId)
+    extras = {
+        **event.extras,
+        "attendeeNames": [user_names.get(a.userId, UNKNOWN_USER_NAME) for a in attendees],
+    }
+    has_capacity = not details.isLimited or details.stock > 0
+    return StoredEvent(**event.model_dump(exclude={"attendees", "extras"}),
+                       attendees=attendees,
+                       extras=extras,
+                       hasCapacity=has_capacity)
+
+
+def content_hash(event: StoredEvent) -> str:
+    """Return a hash of the stored content of an event, to detect unchanged rewrites."""
+    raw = json.dumps(event.model_dump(), sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def store_events(events: List[StoredEvent]) -> List[str]:
+    """
+    Upsert stored unified events. Events whose content is unchanged are not rewritten,
+    the others get a new change version.
+
+    :param events: The events to store.
+    :return: The IDs of the events that were written.
+    """
+    if not events:
+        return []
+    hashes = {event.id: content_hash(event) for event in events}
+    current = {
+        doc["_id"]: doc.get("contentHash")
+        for doc in event_collection.find(
+            {"_id": {"$in": list(hashes)}, **NOT_DELETED}, {"contentHash": 1})
+    }
+    changed = [event for event in events if current.get(event.id) != hashes[event.id]]
+    if not changed:
+        return []
+
+    version = begin_version(EVENT_CHANGES)
+    try:
+        ops = []
+        for event in changed:
+            doc = event.model_dump()
+            doc["_id"] = event.id
+            doc["sortName"] = event.name.lower()
+            doc["contentHash"] = hashes[event.id]
+            doc["version"] = version
+            ops.append(ReplaceOne({"_id": event.id}, doc, upsert=True))
+        event_collection.bulk_write(ops, ordered=False)
+    finally:
+        end_version(EVENT_CHANGES, version)
+    notify_event_changes()
+    return [event.id for event in changed]
+
+
+def delete_stored_events(event_ids: Iterable[str]) -> int:
+    """
+    Replace stored unified events with tombstones.
+
+    :param event_ids: The unified event IDs.
+    :return: The number of events that were deleted.
+    """
+    return _delete_matching({"_id": {"$in": list(event_ids)}})
+
+
+def _delete_matching(query: dict) -> int:
+    """Replace the live stored events matching `query` with tombstones."""
+    query = {"$and": [query, NOT_DELETED]}
+    if not event_collection.find_one(query, {"_id": 1}):
+        return 0
+    version = begin_version(EVENT_CHANGES)
+    try:
+        result = event_collection.update_many(query, {
+            "$set": {"deleted": True, "deletedAt": datetime.utcnow(), "version": version},
+            "$unset": {"contentHash": ""},
+        })
+    finally:
+        end_version(EVENT_CHANGES, version)
+    notify_event_changes()
+    return result.modified_count
+
+
+def prune_tombstones() -> None:
+    """Drop tombstones older than :data:`TOMBSTONE_RETENTION` and record the pruned version."""
+    try:
+        query = {"deleted": True, "deletedAt": {"$lt": datetime.utcnow() - TOMBSTONE_RETENTION}}
+        newest = event_collection.find_one(query, {"version": 1}, sort=[("version", -1)])
+        if not newest:
+            return
+        # Record the horizon first, so no client skips a tombstone that is about to go.
+        raise_version(EVENT_TOMBSTONES_PRUNED, newest["version"])
+        event_collection.delete_many(query)
+    except Exception as e:
+        logging.error(f"Failed to prune event tombstones: {e}")
+
+
+def get_stored_event(event_id: str) -> StoredEvent | None:
+    """
+    Retrieve a single stored unified event.
+
+    :param event_id: The unified event ID.
+    :return: The stored event or None.
+    """
+    doc = event_collection.find_one({"_id": event_id, **NOT_DELETED})
+    return StoredEvent(**doc) if doc else None
+
+
+def find_stored_events(query: dict,
+                       after: Optional[EventSortKey] = None,
+                       limit: Optional[int] = None,
+                       projection: Optional[dict] = None) -> List[StoredEvent]:
+    """
+    Retrieve stored unified events matching a query, in listing order.
+
+    :param query: The MongoDB query.
+    :param after: Only return events sorting after this (start, sortName, id) key.
+    :param limit: The maximum number of events to return.
+    :param projection: Optional MongoDB projection; left out fields get their defaults.
+    :return: The stored events.
+    """
+    if after:
+        start, sort_name, event_id = after
+        query = {"$and": [query, {"$or": [
+            {"start": {"$gt": start}},
+            {"start": start, "sortName": {"$gt": sort_name}},
+            {"start": start, "sortName": sort_name, "_id": {"$gt": event_id}},
+        ]}]}
+    query = {"$and": [query, NOT_DELETED]}
+    cursor = event_collection.find(query, projection).sort(EVENT_SORT)
+    if limit:
+        cursor = cursor.limit(limit)
+    return [StoredEvent(**doc) for doc in cursor]
+
+
+def find_event_changes(since: int,
+                       query: Optional[dict] = None,
+                       left_query: Optional[dict] = None) -> Tuple[List[StoredEvent], List[str], int, bool]:
+    """
+    Retrieve the stored unified events changed after a change version.
+
+    :param since: The last change version the client has seen, 0 for none.
+    :param query: Only return live events matching this MongoDB query. Changed live events
+        that don't match it are returned as deleted.
+    :param left_query: Live events matching this MongoDB query are returned as deleted too,
+        e.g. the events that dropped out of `query` since the client's last sync.
+    :return: The changed live events, the IDs of deleted events, the current change version
+        and whether the client has to discard its copy (`since` is older than the oldest
+        retained tombstone).
+    """
+    versions = get_versions([EVENT_CHANGES, EVENT_TOMBSTONES_PRUNED])
+    current = versions[EVENT_CHANGES]
+    reset = since > current or (since > 0 and since < versions[EVENT_TOMBSTONES_PRUNED])
+    events, deleted = [], []
+    if since <= 0 or reset:
+        changes = {"version": {"$lte": current}, "$and": [query or {}, NOT_DELETED]}
+        for doc in event_collection.find(changes).sort([("version", 1), ("_id", 1)]):
+            events.append(StoredEvent(**doc))
+        return events, deleted, current, reset
+
+    docs = list(event_collection.find({"version": {"$gt": since, "$lte": current}}).sort([("version", 1), ("_id", 1)]))
+    live_ids = [doc["_id"] for doc in docs if not doc.get("deleted")]
+    if query and live_ids:
+        matching = {doc["_id"] for doc in event_collection.find({"$and": [{"_id": {"$in": live_ids}}, query]}, {"_id": 1})}
+    else:
+        matching = set(live_ids)
+    for doc in docs:
+        if doc["_id"] in matching:
+            events.append(StoredEvent(**doc))
+        else:
+            deleted.append(doc["_id"])
+
+    if left_query:
+        unchanged = {"$and": [left_query, NOT_DELETED, {"version": {"$lte": since}}]}
+        deleted.extend(doc["_id"] for doc in event_collection.find(unchanged, {"_id": 1}))
+    return events, deleted, current, reset
+
+
+def touch_events_attended_by(user_id: int) -> int:
+    """
+    Stamp a new change version on the live stored events a user attends, so that delta sync
+    clients fetch them again, e.g. after the user's attendance privacy changed.
+
+    :param user_id: The attendee's user ID.
+    :return: The number of events that were touched.
+    """
+    query = {"$and": [{"attendees.userId": user_id}, NOT_DELETED]}
+    if not event_collection.find_one(query, {"_id": 1}):
+        return 0
+    version = begin_version(EVENT_CHANGES)
+    try:
+        result = event_collection.update_many(query, {"$set": {"version": version}})
+    finally:
+        end_version(EVENT_CHANGES, version)
+    notify_event_changes()
+    return result.modified_count
+
+
+def get_transition_times(user_event_lookback: timedelta) -> List[datetime]:
+    """
+    Return the sorted instants at which a stored event's time dependent state changes:
+    its start and booking window bounds, and for user events the moment it drops out of
+    the default listing window.
+
+    :param user_event_lookback: How long user events stay listed after their start.
+    :return: The transition times.
+    """
+    times = []
+    projection = {"start": 1, "bookingStart": 1, "bookingEnd": 1, "official": 1}
+    for doc in event_collection.find(NOT_DELETED, projection):
+        times.extend(t for t in (doc.get("start"), doc.get("bookingStart"), doc.get("bookingEnd")) if t)
+        if not doc.get("official") and doc.get("start"):
+            times.append(doc["start"] + user_event_lookback)
+    return sorted(times)
+
+
+### Synchronization ###
+
+
+def sync_user_event(event_id: str) -> bool:
+    """
+    Rebuild the stored unified event for a user event, or remove it if the user event is gone.
+
+    :param event_id: The user event ID (without prefix).
+    :return: True if the stored event changed.
+    """
+    event = get_safe_user_event(event_id)
+    if not event:
+        return delete_stored_events([f"usr{event_id}"]) > 0
+    return bool(store_events([build_user_event(event)]))
+
+
+def sync_user_events(events: List[UserEvent]) -> bool:
+    """
+    Rebuild the stored unified events for a list of user events.
+
+    :param events: The (unsafe) user events.
+    :return: True if any stored event changed.
+    """
+    extended = extend_user_events(remove_secrets_from_user_events(events))
+    return bool(store_events([build_user_event(event) for event in extended]))
+
+
+def sync_external_events(events: List[ExternalEventDetails]) -> bool:
+    """
+    Rebuild the stored unified events for the given external events and remove
+    stored external events that are no longer in the list.
+
+    :param events: All current external event details.
+    :return: True if any stored event changed.
+    """
+    bookings = get_bookings_by_event_ids([e.eventId for e in events])
+    user_names = get_display_names({uid for ids in bookings.values() for uid in ids})
+    stored = [
+        build_external_event(e, bookings.get(e.eventId), user_names)
+        for e in events
+    ]
+    stored = [e for e in stored if e]
+    written = store_events(stored)
+    deleted = _delete_matching({
+        "official": True,
+        "_id": {"$nin": [e.id for e in stored]},
+    })
+    return bool(written or deleted)
+
+
+def sync_external_event(event_id: int) -> bool:
+    """
+    Rebuild the stored unified event for a single external event.
+
+    :param event_id: The external event ID.
+    :return: True if the stored event changed.
+    """
+    details = get_stored_external_event_detail(event_id)
+    if not details:
+        return delete_stored_events([f"ext{event_id}"]) > 0
+    attendee_ids = get_bookings_by_event_ids([event_id]).get(event_id, set())
+    event = build_external_event(details, attendee_ids, get_display_names(attendee_ids))
+    return bool(event and store_events([event]))
+
+
+def sync_events_involving_user(user_id: int) -> None:
+    """
+    Rebuild the stored unified events that show a user's name, e.g. after a name change.
+
+    :param user_id: The user ID.
+    """
+    query = {**NOT_DELETED, "$or": [
+        {"admin": user_id},
+        {"hosts.userId": user_id},
+        {"attendees.userId": user_id},
+    ]}
+    for doc in event_collection.find(query, {"_id": 1}):
+        event_id = doc["_id"]
+        if event_id.startswith("usr"):
+            sync_user_event(event_id[3:])
+        elif event_id.startswith("ext"):
+            sync_external_event(int(event_id[3:]))
+
+
+def rebuild_events() -> None:
+    """Rebuild the whole event collection from both sources."""
+    try:
+        user_events = [UserEvent(**e) for e in user_event_collection.find({})]
+        sync_user_events(user_events)
+        _delete_matching({
+            "official": False,
+            "_id": {"$nin": [f"usr{e.id}" for e in user_events]},
+        })
+        sync_external_events(get_all_stored_external_event_details())
+        prune_tombstones()
+        logging.info("Rebuilt unified events.")
+    except Exception as e:
+        logging.error(f"Failed to rebuild unified events: {e}")
@@ -5,7 +5,7 @@ import logging
 
 from v1.db.models.external_events import ExternalEventDetails
 from v1.user_events.user_events_model import ExtendedUserEvent, UserEvent, Location, Host, Attendee
-from v1.events.events_model import Event, EventAttendee, EventHost, ShowAttendees, Tag
+from v1.events.events_model import Event, EventAttendee, EventHost, EventSummary, ShowAttendees, Tag
 from v1.utilities import get_current_time, convert_to_tz_aware, get_current_time_zone
 
 
@@ -64,7 +64,7 @@ def map_external_event(
     booked_ids: Set[int],
     attendee_user_ids: Optional[Set[int]] = None,
 ) -> Optional[Event]:
-    # eventDate already combined in event_api.get_external_event_details
+    # eventDate already combined in event_api.validate_external_event_details
     if not details.eventDate:
         logging.warning(f"External event missing eventDate: {details.eventId}")
         return None
@@ -91,7 +91,7 @@ def map_external_event(
             capacity_ok = details.stock > 0
         bookable = within_window and capacity_ok and start_dt >= now
 
-        image_url = details.imageUrl300 or details.imageUrl150
+        image_url = details.cachedImageUrl or details.imageUrl300 or details.imageUrl150
 
         # Convert adminsRaw (strings) to int user IDs where possible
         admin_ids = []
@@ -144,6 +144,7 @@ def map_external_event(
                 if attendee_user_ids is not None
                 else []
             ),
+            attendeeCount=details.booked,
             queue=[],
             maxAttendees=(details.booked + details.stock) if details.isLimited else None,
             price=float(details.price) if not details.isFree else 0.0,
@@ -173,12 +174,16 @@ def map_user_event(ue: ExtendedUserEvent, current_user_id: int) -> Event:
     if max_att is not None:
         capacity_ok = len(ue.attendees) < max_att
     bookable = capacity_ok and not attending and ue.start >= now
+    host_names = getattr(ue, "hostNames", [])
 
     return Event(
         id=f"usr{ue.id}",
         parentEvent=None,
         admin=[ue.userId],
-        hosts=[EventHost(userId=h.userId, fullName="") for h in (ue.hosts or [])],
+        hosts=[
+            EventHost(userId=h.userId, fullName=host_names[i] if i < len(host_names) else "")
+            for i, h in enumerate(ue.hosts or [])
+        ],
         name=ue.name,
         tags=[],
         locationDescription=ue.location.description if ue.location else None,
@@ -195,6 +200,7 @@ def map_user_event(ue: ExtendedUserEvent, current_user_id: int) -> Event:
         bookingEnd=ue.start,
         showAttendees=ShowAttendees.all,
         attendees=[EventAttendee(userId=a.userId) for a in ue.attendees],
+        attendeeCount=len(ue.attendees),
         queue=[],
         maxAttendees=max_att,
         price=0.0,
@@ -210,6 +216,11 @@ def map_user_event(ue: ExtendedUserEvent, current_user_id: int) -> Event:
     )
 
 
+def map_event_summary(event: Event) -> EventSummary:
+    """Map a unified event to its compact list representation."""
+    return EventSummary.model_construct(**{name: getattr(event, name) for name in EventSummary.model_fields})
+
+
 # TEMPORARY reverse mapping until unified events are stored natively
 # Once unified storage exists, this proxy and reverse mapping can be removed,
 # and the user_events endpoints can be deprecated.
@@ -60,6 +60,7 @@ class Event(BaseModel):
     bookingEnd: Optional[datetime] = None
     showAttendees: ShowAttendees = ShowAttendees.none
     attendees: List[EventAttendee] = Field(default_factory=list)
+    attendeeCount: int = Field(0, description="Number of attendees, including those hidden from the current user")
     queue: List[EventAttendee] = Field(default_factory=list)
     maxAttendees: Optional[int] = None
     price: float = 0.0
@@ -109,3 +110,47 @@ class Event(BaseModel):
             }
         }
 
+
+
+class StoredEvent(Event):
+    """Viewer independent unified event, as materialized in the event collection.
+
+    `attending` and `bookable` are left at their defaults and all attendees are kept;
+    they are resolved per viewer when the event is served.
+    """
+    hasCapacity: bool = Field(True, description="Event has places left, regardless of who is asking")
+
+
+class EventChanges(BaseModel):
+    """Unified events changed since a client's sync token."""
+    events: List[Event] = Field(default_factory=list, description="Created or updated events")
+    deleted: List[str] = Field(default_factory=list, description="IDs of deleted events")
+    token: str = Field(..., description="Pass as `since` on the next request")
+    reset: bool = Field(False, description="The client's copy is stale: replace it with `events`")
+
+
+class EventSummary(BaseModel):
+    """Compact unified event for list views (`GET /v1/events?view=compact`).
+
+    Leaves out the description, hosts, attendees and source specific extras; fetch
+    `GET /v1/events/{id}` for the full event.
+    """
+    id: str
+    name: str
+    tags: List[Tag] = Field(default_factory=list)
+    locationDescription: Optional[str] = None
+    address: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    start: datetime
+    end: Optional[datetime] = None
+    cancelled: Optional[datetime] = None
+    imageUrl: Optional[str] = None
+    bookingStart: Optional[datetime] = None
+    bookingEnd: Optional[datetime] = None
+    attendeeCount: int = 0
+    maxAttendees: Optional[int] = None
+    price: float = 0.0
+    official: bool
+    attending: bool = False
+    bookable: bool = False
@@ -1,15 +1,26 @@
 from __future__ import annotations
-from typing import List, Optional
+from typing import List, Optional, Tuple, Union
 from datetime import datetime, timedelta
+import base64
+import bisect
+import json
 import logging
 
-from v1.events.events_model import Event
-from v1.events.events_mappers import map_external_event, map_user_event, map_event_to_user_event
-from v1.db.external_events import get_stored_external_event_details, get_all_stored_external_event_details
-from v1.external.event_api import get_booked_external_events, book_external_event, unbook_external_event
+from v1.events.events_model import Event, EventChanges, EventSummary, ShowAttendees, StoredEvent
+from v1.events.events_db import (
+    COMPACT_EXCLUDED_FIELDS,
+    EventSortKey,
+    fields_projection,
+    find_event_changes,
+    find_stored_events,
+    get_stored_event,
+    get_transition_times,
+    sort_key,
+)
+from v1.events.events_mappers import map_external_event, map_user_event, map_event_to_user_event, map_event_summary
+from v1.db.external_events import get_stored_external_event_detail
+from v1.external.event_api import book_external_event, unbook_external_event
 from v1.user_events.user_events_db import (
-    get_safe_future_user_events,
-    get_safe_user_events_since,
     create_user_event as db_create_user_event,
     update_user_event as db_update_user_event,
     delete_user_event as db_delete_user_event,
@@ -18,22 +29,29 @@ from v1.user_events.user_events_db import (
     remove_attendee_from_user_event as db_remove_attendee_from_user_event,
 )
 from v1.user_events.user_events_model import UserEvent, Host as UEHost, Attendee as UEAttendee, Location as UELocation
-from v1.utilities import get_current_time
+from v1.utilities import get_current_time, get_current_time_zone
 from v1.db.users import get_users_by_ids
-from v1.db.external_bookings import get_bookings_by_event_ids, add_booking, delete_booking
+from v1.db.external_bookings import add_booking, delete_booking
 from v1.db.models.user import PrivacySetting, viewer_can_see, effective_setting
+from v1.db.data_versions import get_versions, BOOKINGS, EVENT_CATALOG, USER_EVENTS, USER_PROFILES
+from v1.shared.http_cache import make_etag, make_version
 from fastapi import HTTPException
 
 
-def _filter_event_attendees(event: Event, current_user: dict) -> Event:
-    """Remove attendees whose show_attendance setting hides them from this viewer."""
+def _filter_event_attendees(event: Event, current_user: dict, user_docs: Optional[dict] = None) -> Event:
+    """Remove attendees whose show_attendance setting hides them from this viewer.
+
+    `user_docs` may hold prefetched attendee user documents keyed by userId; they are
+    fetched when omitted.
+    """
     if not event.attendees:
         return event
     current_user_id = current_user.get("userId")
     other_ids = [a.userId for a in event.attendees if a.userId != current_user_id]
     if not other_ids:
         return event
-    user_docs = {u["userId"]: u for u in get_users_by_ids(other_ids)}
+    if user_docs is None:
+        user_docs = {u["userId"]: u for u in get_users_by_ids(other_ids)}
     viewer_settings = current_user.get("settings", {})
     resolved_viewer = {
         **current_user,
@@ -61,89 +79,274 @@ def _filter_event_attendees(event: Event, current_user: dict) -> Event:
     return event.model_copy(update={"attendees": filtered_attendees, "extras": new_extras})
 
 
-def list_unified_events(
-    current_user: dict,
-    attending: Optional[bool] = None,
-    bookable: Optional[bool] = None,
-    official: Optional[bool] = None,
-) -> List[Event]:
-    """Fetch, map, merge and filter events from both sources.
+def _apply_viewer_state(stored: StoredEvent, current_user_id: int, now: datetime) -> Event:
+    """Resolve the viewer dependent fields of a stored event.
 
-    Filters follow semantics: if param is None -> include both states; else match exact state.
+    Sets `attending` and `bookable` for the viewer, and hides the attendees of events
+    that don't show them unless the viewer is an admin.
+    """
+    attending = any(a.userId == current_user_id for a in stored.attendees)
+    within_window = (not stored.bookingStart or stored.bookingStart <= now) and (
+        not stored.bookingEnd or now <= stored.bookingEnd)
+    # Official events are bookable for the viewer even when already booked, as before.
+    bookable = stored.hasCapacity and within_window and stored.start >= now and (
+        stored.official or not attending)
+
+    fields = {name: getattr(stored, name) for name in Event.model_fields}
+    fields.update(attending=attending, bookable=bookable)
+    if stored.showAttendees == ShowAttendees.none and current_user_id not in stored.admin:
+        fields["attendees"] = []
+        fields["extras"] = {**stored.extras, "attendeeNames": []}
+    return Event.model_construct(**fields)
+
+
+def overlay_viewer(stored_events: List[StoredEvent], current_user: dict, filter_attendees: bool = True) -> List[Event]:
+    """Turn stored events into the events as seen by `current_user`.
+
+    With `filter_attendees` False the attendees' privacy settings are not applied; only
+    use it when the attendees are not returned.
     """
     current_user_id = current_user["userId"]
-
-    # External events
+    now = get_current_time().replace(tzinfo=None)
+    events = [_apply_viewer_state(e, current_user_id, now) for e in stored_events]
+    if not filter_attendees:
+        return events
+
+    # Fetch the privacy settings of all visible attendees in one query
+    attendee_ids = {
+        a.userId for e in events for a in e.attendees if a.userId != current_user_id
+    }
     try:
-        booked_external = get_booked_external_events(current_user_id)
-        booked_ids = {e.eventId for e in booked_external}
+        user_docs = {u["userId"]: u for u in get_users_by_ids(list(attendee_ids))} if attendee_ids else {}
     except Exception as e:
-        logging.error(f"Failed to fetch booked external events: {e}")
-        booked_ids = set()
+        logging.error(f"Failed to fetch attendee settings: {e}")
+        user_docs = {}
+    return [_filter_event_attendees(e, current_user, user_docs) for e in events]
 
-    try:
-        # Now fetch ALL external events (not just booked/admin)
-        external_events_details = get_all_stored_external_event_details()
-    except Exception as e:
-        logging.error(f"Failed to fetch all external events: {e}")
-        external_events_details = []
 
-    # Bulk-fetch attendee user IDs for all external events in one DB query
+# User events stay in the default listing for this long after their start.
+USER_EVENT_LOOKBACK = timedelta(days=30)
+# Listing window start in sync tokens
+SYNC_WINDOW_FORMAT = "%Y%m%d%H%M"
+
+# Transition times of the stored events, for the data versions they were read at.
+_transition_times: Tuple[tuple, List[datetime]] = ((), [])
+
+
+def unified_events_etag(current_user: dict, query_string: str) -> Optional[str]:
+    """Build the ETag of an event listing from data versions, without reading the events.
+
+    The tag covers the external catalog, user events, bookings and user profiles (names and
+    attendance privacy), the viewer, the request parameters, and how many time dependent
+    transitions (event start, booking window) have passed.
+
+    :return: The ETag, or None if the data versions are unavailable.
+    """
+    global _transition_times
     try:
-        all_event_ids = [d.eventId for d in external_events_details]
-        bookings_by_event = get_bookings_by_event_ids(all_event_ids)
+        versions = get_versions([EVENT_CATALOG, USER_EVENTS, BOOKINGS, USER_PROFILES])
+        key = tuple(sorted(versions.items()))
+        if _transition_times[0] != key:
+            _transition_times = (key, get_transition_times(USER_EVENT_LOOKBACK))
     except Exception as e:
-        logging.error(f"Failed to fetch external event bookings: {e}")
-        bookings_by_event = {}
-
-    external_events: List[Event] = []
-    for d in external_events_details:
-        # Determine if attendees should be exposed for this event
-        admin_ids: List[int] = []
-        if d.admins:
-            for a in d.admins:
-                try:
-                    admin_ids.append(int(a))
-                except (ValueError, TypeError):
-                    pass
-        user_is_admin = current_user_id in admin_ids
-        should_show_attendees = d.showBooked or user_is_admin
-
-        attendee_user_ids = bookings_by_event.get(d.eventId) if should_show_attendees else None
-
-        mapped = map_external_event(d, current_user_id, booked_ids, attendee_user_ids)
-        if mapped:
-            external_events.append(_filter_event_attendees(mapped, current_user))
-
-    # User events (already filtered to future via db function)
+        logging.error(f"Failed to read event data versions: {e}")
+        return None
+
+    now = get_current_time().replace(tzinfo=None)
+    passed = bisect.bisect_right(_transition_times[1], now)
+    viewer_settings = current_user.get("settings", {})
+    viewer = (
+        current_user["userId"],
+        current_user.get("isMember", False),
+        effective_setting(viewer_settings, "show_attendance"),
+    )
+    return make_etag("events", key, passed, viewer, query_string)
+
+
+def _to_local_naive(value: datetime) -> datetime:
+    """Convert a datetime to the naive application time that events are stored in."""
+    if value.tzinfo is not None:
+        return value.astimezone(get_current_time_zone()).replace(tzinfo=None)
+    return value
+
+
+def _window_start() -> datetime:
+    """Return the earliest start of the user events in the default listing."""
+    return (get_current_time() - USER_EVENT_LOOKBACK).replace(tzinfo=None)
+
+
+def _default_window_query(window_start: Optional[datetime] = None) -> dict:
+    """Match all external events and the user events from one month back, or from `window_start`."""
+    return {"$or": [{"official": True}, {"start": {"$gte": window_start or _window_start()}}]}
+
+
+def encode_cursor(key: EventSortKey) -> str:
+    """Encode a (start, sortName, id) key as an opaque page cursor."""
+    start, sort_name, event_id = key
+    raw = json.dumps([start.isoformat(), sort_name, event_id])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> EventSortKey:
+    """Decode a page cursor created by :func:`encode_cursor`."""
     try:
-        # Include events starting from one month back
-        one_month_back = get_current_time() - timedelta(days=30)
-        user_events = get_safe_user_events_since(one_month_back.replace(tzinfo=None))
-    except Exception as e:
-        logging.error(f"Failed to fetch user events since range: {e}")
-        user_events = []
-    user_events_mapped = [
-        _filter_event_attendees(map_user_event(u, current_user_id), current_user)
-        for u in user_events
-    ]
+        start, sort_name, event_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return datetime.fromisoformat(start), str(sort_name), str(event_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def list_unified_events_page(
+    current_user: dict,
+    attending: Optional[bool] = None,
+    bookable: Optional[bool] = None,
+    official: Optional[bool] = None,
+    start_from: Optional[datetime] = None,
+    start_to: Optional[datetime] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    compact: bool = False,
+    fields: Optional[Tuple[str, ...]] = None,
+) -> Tuple[List[Union[Event, EventSummary]], Optional[str]]:
+    """Fetch the materialized events, apply the viewer overlay and filter, one page at a time.
 
-    merged = external_events + user_events_mapped
+    Filters follow semantics: if param is None -> include both states; else match exact state.
+    Events are ordered by (start, name, id). `start_from` / `start_to` bound the event start
+    for both sources; without `start_from` all external events and user events from one
+    month back are included. Without `limit` all matching events are returned. With
+    `compact` the events are returned as :class:`EventSummary`. With `fields` only those
+    fields (and what the viewer overlay needs) are read; the other fields keep their defaults.
 
-    # Do not filter to future only; keep all external events and user events from one month back.
+    :return: The events, and the cursor of the next page or None if this is the last page.
+    """
+    if start_from is not None:
+        query: dict = {"start": {"$gte": _to_local_naive(start_from)}}
+    else:
+        query = _default_window_query()
+    if start_to is not None:
+        query = {"$and": [query, {"start": {"$lt": _to_local_naive(start_to)}}]}
+    if official is not None:
+        query = {"$and": [query, {"official": official}]}
 
     def passes(flag_val: Optional[bool], actual: bool) -> bool:
         return flag_val is None or flag_val == actual
 
-    filtered = [
-        e for e in merged
-        if passes(attending, e.attending) and passes(bookable, e.bookable)
-        and passes(official, e.official)
-    ]
+    after = decode_cursor(cursor) if cursor else None
+    projection = COMPACT_EXCLUDED_FIELDS if compact else None
+    if fields:
+        projection = fields_projection(fields)
+        compact = False
+    # Attendee privacy only matters when attendees or their names are returned
+    filter_attendees = not compact and (not fields or bool({"attendees", "extras"} & set(fields)))
+    page: List[Union[Event, EventSummary]] = []
+    page_keys: List[EventSortKey] = []
+    while True:
+        try:
+            stored_events = find_stored_events(query, after=after, limit=limit, projection=projection)
+        except Exception as e:
+            logging.error(f"Failed to fetch unified events: {e}")
+            stored_events = []
+
+        events = overlay_viewer(stored_events, current_user, filter_attendees=filter_attendees)
+        for stored, event in zip(stored_events, events):
+            if passes(attending, event.attending) and passes(bookable, event.bookable):
+                page.append(map_event_summary(event) if compact else event)
+                page_keys.append(sort_key(stored))
+
+        # The viewer dependent filters may drop events, so keep reading until the page is full.
+        # Earlier batches count towards the page, so check it before a short batch ends the listing.
+        exhausted = not limit or len(stored_events) < limit
+        if limit and (len(page) > limit or (len(page) == limit and not exhausted)):
+            return page[:limit], encode_cursor(page_keys[limit - 1])
+        if exhausted:
+            return page, None
+        after = sort_key(stored_events[-1])
 
-    filtered.sort(key=lambda e: (e.start, e.name.lower()))
-    return filtered
 
+def list_unified_events(
+    current_user: dict,
+    attending: Optional[bool] = None,
+    bookable: Optional[bool] = None,
+    official: Optional[bool] = None,
+) -> List[Event]:
+    """Fetch all matching events, see :func:`list_unified_events_page`."""
+    events, _ = list_unified_events_page(
+        current_user, attending=attending, bookable=bookable, official=official)
+    return events
+
+
+def get_unified_event(unified_event_id: str, current_user: dict) -> Event:
+    """Fetch a single event by its unified id, as seen by `current_user`."""
+    if not unified_event_id.startswith(("usr", "ext")):
+        raise HTTPException(status_code=400, detail="Invalid event ID format")
+    try:
+        stored = get_stored_event(unified_event_id)
+    except Exception as e:
+        logging.error(f"Failed to fetch unified event {unified_event_id}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to fetch event")
+    if not stored:
+        raise HTTPException(status_code=404, detail="Event not found")
+    return overlay_viewer([stored], current_user)[0]
+
+
+def _viewer_sync_key(current_user: dict) -> str:
+    """Fingerprint what the viewer dependent overlay depends on: who the viewer is and their
+    own attendance setting, which the reciprocal privacy rules compare against."""
+    settings = current_user.get("settings") or {}
+    return make_version(
+        current_user.get("userId"),
+        current_user.get("isMember", False),
+        effective_setting(settings, "show_attendance"),
+    )[:12]
+
+
+def _encode_sync_token(version: int, window_start: datetime, viewer_key: str) -> str:
+    return f"{version}.{window_start.strftime(SYNC_WINDOW_FORMAT)}.{viewer_key}"
+
+
+def _decode_sync_token(token: str) -> Tuple[int, Optional[datetime], Optional[str]]:
+    """Decode a sync token into its change version, listing window start and viewer key.
+    Tokens from before the window and viewer were included decode with None for both."""
+    try:
+        parts = token.split(".")
+        if len(parts) == 1:
+            return int(parts[0]), None, None
+        version, window_start, viewer_key = parts
+        return int(version), datetime.strptime(window_start, SYNC_WINDOW_FORMAT), viewer_key
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid sync token")
+
+
+def list_event_changes(current_user: dict, since: Optional[str] = None) -> EventChanges:
+    """Fetch the events changed since a sync token, as seen by `current_user`.
+
+    Without a token, with one older than the retained tombstones, or with one issued for
+    another viewer or under other viewer settings, all events in the default listing window
+    are returned with `reset` set. User events that dropped out of the window since the
+    token was issued are returned as deleted. Time dependent fields (`bookable`) are not
+    change tracked; they are current for the returned events only.
+    """
+    since_version, since_window, since_viewer = _decode_sync_token(since) if since else (0, None, None)
+    viewer_key = _viewer_sync_key(current_user)
+    if since_viewer != viewer_key:
+        since_version = 0
+    # To the minute, as carried in the token
+    window_start = _window_start().replace(second=0, microsecond=0)
+    left_query = None
+    if since_window is not None and since_window < window_start:
+        left_query = {"official": False, "start": {"$gte": since_window, "$lt": window_start}}
+    try:
+        stored_events, deleted, version, reset = find_event_changes(
+            since_version, _default_window_query(window_start), left_query)
+    except Exception as e:
+        logging.error(f"Failed to fetch unified event changes: {e}")
+        raise HTTPException(status_code=503, detail="Event changes are unavailable")
+    return EventChanges(
+        events=overlay_viewer(stored_events, current_user),
+        deleted=deleted,
+        token=_encode_sync_token(version, window_start, viewer_key),
+        reset=reset or since_version <= 0,
+    )
 
 
 def create_user_event_via_unified(event: Event, current_user: dict) -> Event:
@@ -282,43 +485,15 @@ def _attend_external_event(unified_event_id: str, current_user: dict) -> Event:
         except Exception as e:
             logging.error(f"Failed to sync booking to cache for userId={current_user['userId']} eventId={event_id}: {e}")
 
-        # Try to find the event in our stored external events to return proper data
-        try:
-            external_events_details = get_all_stored_external_event_details()
-            for event_detail in external_events_details:
-                if event_detail.eventId == event_id:  # Compare as int
-                    # Create booked_ids set that definitely includes this event
-                    booked_ids = {event_id}  # Use int eventId
-                    
-                    # Also try to get existing booked events (but don't fail if this doesn't work)
-                    try:
-                        existing_booked = get_booked_external_events(current_user["userId"])
-                        booked_ids.update(e.eventId for e in existing_booked)
-                        logging.info(f"Found {len(existing_booked)} existing booked events for user {current_user['userId']}")
-                    except Exception as e:
-                        logging.warning(f"Could not fetch existing booked events, using just current booking: {e}")
-                    
-                    logging.info(f"Mapping external event {event_id} with booked_ids: {booked_ids}")
-                    
-                    # Map the external event with updated booking status
-                    mapped_event = map_external_event(event_detail, current_user["userId"], booked_ids)
-                    if mapped_event:
-                        # Double-check: Force attending to True since we just successfully booked
-                        mapped_event.attending = True
-                        logging.info(f"Returning mapped event with attending: {mapped_event.attending}")
-                        return mapped_event
-                    else:
-                        logging.error(f"map_external_event returned None for event {event_id}")
-            
-            # If we can't find the specific event, create a basic response
-            logging.warning(f"Could not find external event {event_id} in stored events, total stored: {len(external_events_details)}")
-            
-        except Exception as e:
-            logging.error(f"Failed to fetch updated external event data: {e}", exc_info=True)
-        
-        logging.error(f"Booking succeeded but could not retrieve event details for {event_id}")
-        raise HTTPException(status_code=500, detail="Event booked but could not retrieve updated details")
-        
+        # Return the booked event; `attending` is set since the booking just succeeded
+        event_detail = get_stored_external_event_detail(event_id)
+        mapped_event = map_external_event(event_detail, current_user["userId"], {event_id}) if event_detail else None
+        if not mapped_event:
+            logging.error(f"Booking succeeded but could not retrieve event details for {event_id}")
+            raise HTTPException(status_code=500, detail="Event booked but could not retrieve updated details")
+        mapped_event.attending = True
+        return mapped_event
+
     except HTTPException:
         raise
     except Exception as e:
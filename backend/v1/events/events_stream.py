@@ -0,0 +1,68 @@
+"""
+Server-Sent Events stream of unified event changes.
+
+Clients keep one `GET /v1/events/stream` connection open and receive a `changes` event
+with the current change version whenever stored unified events change, in any worker. They
+then fetch the changes with `GET /v1/events/changes?since=<token>`, passing the token of
+their last changes response: the stream's version is not bound to the viewer.
+"""
+import asyncio
+from typing import AsyncIterator
+
+from fastapi import Request
+from starlette.concurrency import run_in_threadpool
+
+from v1.db.data_versions import get_versions, EVENT_CHANGES
+from v1.shared.broadcast import VersionBroadcaster
+
+# Seconds between keep-alive comments, below common proxy idle timeouts
+HEARTBEAT_SECONDS = 15
+# Notifications a client may have pending before it is told to resync and dropped
+MAX_PENDING_NOTIFICATIONS = 16
+# Reconnect delay suggested to clients, in milliseconds
+RETRY_MILLISECONDS = 5000
+
+
+def _read_event_changes_version() -> int:
+    return get_versions([EVENT_CHANGES])[EVENT_CHANGES]
+
+
+event_changes_broadcaster = VersionBroadcaster("event changes", _read_event_changes_version)
+
+
+def notify_event_changes() -> None:
+    """Push the latest event change version to this worker's stream clients now."""
+    event_changes_broadcaster.poke()
+
+
+def _sse(event: str, data: str) -> str:
+    return f"event: {event}\ndata: {data}\n\n"
+
+
+async def stream_event_changes(request: Request) -> AsyncIterator[str]:
+    """Yield SSE messages until the client disconnects or falls behind."""
+    subscription = event_changes_broadcaster.subscribe(MAX_PENDING_NOTIFICATIONS)
+    try:
+        yield f"retry: {RETRY_MILLISECONDS}\n\n"
+        version = event_changes_broadcaster.version
+        if version is None:
+            version = await run_in_threadpool(_read_event_changes_version)
+        yield _sse("changes", f'{{"token": "{version}"}}')
+        sent = version
+
+        while not await request.is_disconnected():
+            try:
+                version = await asyncio.wait_for(subscription.queue.get(), timeout=HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if subscription.overflowed:
+                yield _sse("resync", "{}")
+                return
+            # The broadcaster's first publish repeats the token sent on connect
+            if version == sent:
+                continue
+            yield _sse("changes", f'{{"token": "{version}"}}')
+            sent = version
+    finally:
+        event_changes_broadcaster.unsubscribe(subscription)
@@ -1,6 +1,7 @@
 import requests
 import logging
 from fastapi import HTTPException
+from v1.db.external_events import get_stored_external_root
 from v1.external.event_api import get_external_root
 from v1.env_constants import LOGINM_SEED, LOGINB_SEED, URL_MEMBER_API
 from v1.utilities import calc_hash, get_current_time_formatted
@@ -37,7 +38,8 @@ def loginm(username, password):
 
 def loginb(user, password):
 
-    root = get_external_root()
+    # The refresh jobs keep the stored root current; only fetch it when there is none yet
+    root = get_stored_external_root() or get_external_root()
 
     client = 'swagapp'
     timestamp = get_current_time_formatted()
@@ -1,7 +1,7 @@
 from datetime import datetime
-import json
+import hashlib
 import logging
-from typing import List
+from typing import List, NamedTuple, Optional
 import requests
 from fastapi import HTTPException
 from v1.utilities import convert_string_to_datetime
@@ -154,51 +154,92 @@ def get_external_root() -> ExternalRoot:
     store_external_root(root)
     return root
 
-def get_external_event_details(url: str, date: str) -> List[ExternalEventDetails]:
+class ExternalEventFeed(NamedTuple):
+    """One date's events feed from the external API."""
+    date: str
+    # The validated and stored events, or None if the feed is unchanged or could not be read
+    events: Optional[List[ExternalEventDetails]]
+    # The fingerprint document to record once the events are processed, or None if nothing is to be recorded
+    fingerprint: Optional[dict]
+
+
+def validate_external_event_details(events: list, date: str) -> List[ExternalEventDetails]:
+    """
+    Validate the raw events of one date's feed, dropping events that fail validation.
+
+    :param events: The decoded `events` of the feed.
+    :param date: The feed's date, combined with each event's start time into its eventDate.
+    :return: The validated events.
+    """
+    eventdate = convert_string_to_datetime(date)
+    validated_events: List[ExternalEventDetails] = []
+    for event in events:
+        try:
+            validated = ExternalEventDetails.model_validate(event)
+
+            # Convert startTime string to time object
+            start_time = datetime.strptime(validated.startTime,
+                                           '%H:%M').time()
+
+            # Combine eventDate and startTime
+            validated.eventDate = datetime.combine(eventdate, start_time)
+
+            validated_events.append(validated)
+
+        except Exception as e:
+            logging.error(f"Failed to validate event: {e}")
+    return validated_events
+
+
+def get_external_event_details(url: str, date: str, previous: Optional[dict] = None) -> ExternalEventFeed:
+    """
+    Fetch one date's events feed, and validate and store its events if the feed changed.
+
+    The feed is fingerprinted by a hash of the raw response. When `previous` is given its
+    ETag and Last-Modified are sent as conditional headers, and a 304 or an unchanged
+    fingerprint skips validation and storage.
+
+    :param url: The external REST URL.
+    :param date: The date, e.g. "2026-05-01".
+    :param previous: The fingerprint recorded for the date by the last processed refresh.
+    :return: The feed.
+    """
     parameters = {
         'operation': 'events',
         'date': date,
         'token': EVENT_API_TOKEN,
     }
     headers = {'Content-Type': 'application/json'}
+    if previous:
+        if previous.get("etag"):
+            headers['If-None-Match'] = previous["etag"]
+        if previous.get("lastModified"):
+            headers['If-Modified-Since'] = previous["lastModified"]
     response = requests.post(url,
                              json=parameters,
                              headers=headers,
                              verify=False)
 
+    if response.status_code == 304:
+        return ExternalEventFeed(date, None, None)
     if response.status_code != 200:
         raise HTTPException(status_code=400, detail="Invalid credentials")
 
-    eventdate = convert_string_to_datetime(date)
+    fingerprint = hashlib.sha256(response.content).hexdigest()
+    if previous and previous.get("fingerprint") == fingerprint:
+        return ExternalEventFeed(date, None, None)
 
     try:
-        response_json = response.json()
-        events = response_json['events']
-        validated_events: List[ExternalEventDetails] = []
-        for event in events:
-            try:
-                event_json = json.dumps(event)
-                validated = ExternalEventDetails.model_validate_json(
-                    event_json)
-
-                # Convert startTime string to time object
-                start_time = datetime.strptime(validated.startTime,
-                                               '%H:%M').time()
-
-                # Combine eventDate and startTime
-                validated.eventDate = datetime.combine(eventdate, start_time)
-
-                validated_events.append(validated)
-
-            except Exception as e:
-                logging.error(f"Failed to validate event: {e}")
+        validated_events = validate_external_event_details(response.json()['events'], date)
     except Exception as e:
         logging.error(f"Failed to validate external event details: {e}")
-        return
-
-    try:
-        store_external_event_details(validated_events)
-        logging.info("Successfully stored external event details.")
-        return validated_events
-    except Exception as e:
-        logging.error(f"Failed to store external event details: {e}")
+        return ExternalEventFeed(date, None, None)
+
+    if not store_external_event_details(validated_events):
+        return ExternalEventFeed(date, None, None)
+    return ExternalEventFeed(date, validated_events, {
+        "_id": date,
+        "fingerprint": fingerprint,
+        "etag": response.headers.get("ETag"),
+        "lastModified": response.headers.get("Last-Modified"),
+    })
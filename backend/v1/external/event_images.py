@@ -0,0 +1,101 @@
+"""
+Local copies of external event images.
+
+Official events link their images on the upstream event site, which is slow at peak and
+serves them at whatever size they were uploaded. The refresh job calls
+:func:`cache_event_images`, which fetches each image once, scales it down to
+EVENT_IMAGE_WIDTH and stores it in the content-addressed image store
+(v1/shared/image_store.py). The events then carry the cached copy as `cachedImageUrl`, which
+the mapper prefers over the upstream URLs. Images that fail to fetch keep the upstream URL
+and are retried after RETRY_FAILED_IMAGE_AFTER.
+"""
+import io
+import logging
+from datetime import timedelta
+from typing import List, Optional
+
+import requests
+from PIL import Image, ImageOps
+
+from v1.db.event_images import get_event_images, has_failed_event_images, remove_event_images_except, store_event_image
+from v1.db.external_events import set_cached_image_urls
+from v1.db.models.external_events import ExternalEventDetails
+from v1.shared.image_store import release_image, store_image_bytes
+from v1.utilities import get_current_time
+
+# Twice the 300 px the upstream list size is named after, for high density screens
+EVENT_IMAGE_WIDTH = 600
+MAX_EVENT_IMAGE_BYTES = 8 * 1024 * 1024
+FETCH_TIMEOUT = 10
+RETRY_FAILED_IMAGE_AFTER = timedelta(hours=1)
+
+
+def upstream_image_url(event: ExternalEventDetails) -> Optional[str]:
+    return event.imageUrl300 or event.imageUrl150
+
+
+def fetch_event_image(upstream_url: str) -> bytes:
+    """
+    Fetch an upstream image and scale it down to EVENT_IMAGE_WIDTH.
+
+    :param upstream_url: The image URL.
+    :return: The image as JPEG.
+    :raises Exception: If the image can't be fetched or decoded.
+    """
+    with requests.get(upstream_url, timeout=FETCH_TIMEOUT, stream=True, verify=False) as response:
+        response.raise_for_status()
+        buffer = io.BytesIO()
+        for chunk in response.iter_content(64 * 1024):
+            buffer.write(chunk)
+            if buffer.tell() > MAX_EVENT_IMAGE_BYTES:
+                raise ValueError(f"Image is larger than {MAX_EVENT_IMAGE_BYTES} bytes")
+
+    buffer.seek(0)
+    with Image.open(buffer) as image:
+        image = ImageOps.exif_transpose(image).convert("RGB")
+        if image.width > EVENT_IMAGE_WIDTH:
+            height = round(image.height * EVENT_IMAGE_WIDTH / image.width)
+            image = image.resize((EVENT_IMAGE_WIDTH, height), Image.Resampling.LANCZOS)
+        output = io.BytesIO()
+        image.save(output, "JPEG", quality=82, optimize=True, progressive=True)
+    return output.getvalue()
+
+
+def event_images_due() -> bool:
+    """Return True if images that failed to fetch are due for another try, see :func:`cache_event_images`."""
+    return has_failed_event_images(get_current_time().replace(tzinfo=None) - RETRY_FAILED_IMAGE_AFTER)
+
+
+def cache_event_images(events: List[ExternalEventDetails]) -> None:
+    """
+    Set `cachedImageUrl` on the events, fetching images that aren't cached yet, and release
+    the images no event uses anymore.
+
+    :param events: All current external events; updated in place and in the database.
+    :raises PyMongoError: If the cached images can't be looked up; nothing is fetched then.
+    """
+    upstream_urls = {upstream_image_url(event) for event in events} - {None}
+    entries = get_event_images(upstream_urls)
+    now = get_current_time().replace(tzinfo=None)
+
+    for upstream_url in upstream_urls:
+        entry = entries.get(upstream_url)
+        if entry is not None and (entry["url"] or now - entry["checkedAt"] < RETRY_FAILED_IMAGE_AFTER):
+            continue
+        try:
+            url = store_image_bytes(fetch_event_image(upstream_url), ".jpg")
+        except Exception as e:
+            logging.warning(f"Failed to cache event image {upstream_url}: {e}")
+            url = None
+        store_event_image(upstream_url, url, now)
+        entries[upstream_url] = {"url": url, "checkedAt": now}
+
+    cached_urls = {}
+    for event in events:
+        upstream_url = upstream_image_url(event)
+        event.cachedImageUrl = entries[upstream_url]["url"] if upstream_url else None
+        cached_urls[event.eventId] = event.cachedImageUrl
+    set_cached_image_urls(cached_urls)
+
+    for removed in remove_event_images_except(upstream_urls):
+        release_image(removed.get("url"))
@@ -54,6 +54,6 @@ def get_event_site_news(url: str|bool) -> list[EventSiteNews]:
         logging.error(f"Failed to validate external news details: {e}")
         return
 
-    logging.info(f"Validated news: {validated}")
+    logging.info(f"Validated news: {validated_news}")
 
     return validated_news
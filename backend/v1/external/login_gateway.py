@@ -0,0 +1,95 @@
+"""
+Admission control for logins against the member API.
+
+At the start of a gathering hundreds of members log in within minutes. Every login is a
+synchronous call to the member API, so without a limit they pile up as blocked threadpool
+workers. The :class:`LoginGateway` lets at most `max_concurrent` upstream calls run at once.
+Further logins wait on the event loop, not in a thread, for at most `queue_timeout` seconds,
+and concurrent logins with the same credentials share one upstream call. A login that can't
+get a slot in time, or arrives while `max_waiting` others are already queued, gets a
+503 with Retry-After.
+"""
+import asyncio
+import hashlib
+import logging
+from typing import Any, Callable, Dict, Tuple
+
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+
+MAX_CONCURRENT_LOGINS = 8
+MAX_WAITING_LOGINS = 200
+LOGIN_QUEUE_TIMEOUT = 10.0
+LOGIN_RETRY_AFTER = 5
+
+
+class LoginGateway:
+    def __init__(self,
+                 max_concurrent: int = MAX_CONCURRENT_LOGINS,
+                 max_waiting: int = MAX_WAITING_LOGINS,
+                 queue_timeout: float = LOGIN_QUEUE_TIMEOUT,
+                 retry_after: int = LOGIN_RETRY_AFTER):
+        self.max_concurrent = max_concurrent
+        self.max_waiting = max_waiting
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.waiting = 0
+        # Created lazily so that it belongs to the running event loop
+        self._semaphore = None
+        self._in_flight: Dict[Tuple[str, str, bytes], asyncio.Future] = {}
+
+    async def login(self, kind: str, username: str, password: str, call: Callable[[], Any]) -> Any:
+        """
+        Run the blocking upstream login `call`, or join an identical one that is in flight.
+
+        :param kind: The login endpoint, "authm" (members) or "authb" (non-members).
+        :param username: The username.
+        :param password: The password; part of the coalescing key, so only identical credentials share a call.
+        :param call: The blocking upstream call, run in the threadpool.
+        :return: The result of `call`.
+        :raises HTTPException: 503 with Retry-After when the gateway is saturated, or what `call` raised.
+        """
+        key = (kind, username, hashlib.sha256(password.encode("utf-8")).digest())
+        task = self._in_flight.get(key)
+        if task is None:
+            # The upstream call runs as its own task, so a cancelled caller neither cancels it
+            # for the others nor frees its slot while the call is still running in its thread
+            task = asyncio.ensure_future(self._admit(call))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Tuple[str, str, bytes], task: asyncio.Future) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved when every caller was cancelled
+            task.exception()
+
+    async def _admit(self, call: Callable[[], Any]) -> Any:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        if self._semaphore.locked() and self.waiting >= self.max_waiting:
+            raise self._saturated()
+
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise self._saturated()
+        finally:
+            self.waiting -= 1
+
+        try:
+            return await run_in_threadpool(call)
+        finally:
+            self._semaphore.release()
+
+    def _saturated(self) -> HTTPException:
+        logging.warning(f"Login gateway saturated, {self.waiting} logins waiting")
+        return HTTPException(status_code=503,
+                             detail="Too many logins right now, try again shortly",
+                             headers={"Retry-After": str(self.retry_after)})
+
+
+login_gateway = LoginGateway()
@@ -0,0 +1,121 @@
+"""
+Geocoding behind a small interface, with a cache.
+
+Event creators type the same hotel and restaurant addresses again and again, and every
+Google geocode is a paid, slow API call. :class:`CachedGeocoder` answers repeated addresses
+from an in-memory LRU in front of the `geocode_cache` collection, keyed by the normalized
+address. Results are kept for GEOCODE_TTL, addresses without a result for NEGATIVE_GEOCODE_TTL.
+"""
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional, Protocol, Tuple
+
+from v1.google_maps_api.geolocation_model import GeoLocation
+
+GEOCODE_TTL = timedelta(days=90)
+NEGATIVE_GEOCODE_TTL = timedelta(hours=1)
+MEMORY_CACHE_SIZE = 1024
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+class Geocoder(Protocol):
+    def geocode(self, address: str) -> Optional[GeoLocation]:
+        """Return the location of an address, or None if it has no result."""
+        ...
+
+
+class GoogleGeocoder:
+    def __init__(self, client):
+        """
+        :param client: A googlemaps.Client.
+        """
+        self.client = client
+
+    def geocode(self, address: str) -> Optional[GeoLocation]:
+        geocode_result = self.client.geocode(address)
+        if not geocode_result:
+            return None
+        return GeoLocation(
+            formatted_address=geocode_result[0]['formatted_address'],
+            latitude=geocode_result[0]['geometry']['location']['lat'],
+            longitude=geocode_result[0]['geometry']['location']['lng'],
+        )
+
+
+def normalize_address(address: str) -> str:
+    """Fold case, diacritics and whitespace, so that spellings of the same address share a cache key."""
+    decomposed = unicodedata.normalize("NFKD", address)
+    folded = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return _WHITESPACE.sub(" ", folded.casefold()).strip(" ,.")
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _as_utc(value: datetime) -> datetime:
+    """Pymongo returns naive datetimes in UTC."""
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
+class CachedGeocoder:
+    def __init__(self,
+                 backend: Geocoder,
+                 load: Optional[Callable[[str], Optional[dict]]] = None,
+                 save: Optional[Callable] = None,
+                 memory_size: int = MEMORY_CACHE_SIZE):
+        """
+        :param backend: The geocoder asked on a cache miss.
+        :param load: Reads a persisted entry, see :func:`v1.db.geocode_cache.get_cached_geocode`.
+        :param save: Persists an entry, see :func:`v1.db.geocode_cache.store_geocode`.
+        :param memory_size: Number of addresses kept in memory.
+        """
+        if load is None or save is None:
+            # Imported here so that a geocoder without persistence doesn't need the database
+            from v1.db.geocode_cache import get_cached_geocode, store_geocode
+            load = load or get_cached_geocode
+            save = save or store_geocode
+        self.backend = backend
+        self.load = load
+        self.save = save
+        self.memory_size = memory_size
+        # Normalized address -> (location or None, monotonic expiry time)
+        self._memory: "OrderedDict[str, Tuple[Optional[GeoLocation], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def geocode(self, address: str) -> Optional[GeoLocation]:
+        key = normalize_address(address)
+        if not key:
+            return None
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and entry[1] > time.monotonic():
+                self._memory.move_to_end(key)
+                return entry[0]
+
+        stored = self.load(key)
+        now = _now()
+        expires_at = _as_utc(stored["expiresAt"]) if stored is not None else None
+        if expires_at is not None and expires_at > now:
+            location = GeoLocation(**stored["location"]) if stored["location"] else None
+            self._remember(key, location, (expires_at - now).total_seconds())
+            return location
+
+        location = self.backend.geocode(address)
+        ttl = GEOCODE_TTL if location is not None else NEGATIVE_GEOCODE_TTL
+        self.save(key, location.model_dump() if location is not None else None, now + ttl)
+        self._remember(key, location, ttl.total_seconds())
+        return location
+
+    def _remember(self, key: str, location: Optional[GeoLocation], ttl_seconds: float) -> None:
+        with self._lock:
+            self._memory[key] = (location, time.monotonic() + ttl_seconds)
+            self._memory.move_to_end(key)
+            if len(self._memory) > self.memory_size:
+                self._memory.popitem(last=False)
@@ -1,8 +1,7 @@
-
-from http.client import HTTPException
 import logging
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException
 import googlemaps
+from v1.google_maps_api.geocoder import CachedGeocoder, GoogleGeocoder
 from v1.google_maps_api.geolocation_model import GeoLocation
 from v1.request_filter import validate_request
 from v1.env_constants import GOOGLE_MAPS_API_KEY
@@ -10,31 +9,21 @@ from v1.env_constants import GOOGLE_MAPS_API_KEY
 
 geolocation_v1 = APIRouter(prefix="/v1")
 
+geocoder = None
 if GOOGLE_MAPS_API_KEY and GOOGLE_MAPS_API_KEY != "":
-    gmaps = googlemaps.Client(key=GOOGLE_MAPS_API_KEY)
+    geocoder = CachedGeocoder(GoogleGeocoder(googlemaps.Client(key=GOOGLE_MAPS_API_KEY)))
 
 @geolocation_v1.get("/geolocation/{address}")
 def getLocationByAdress(address : str, current_user: dict = Depends(validate_request)) -> GeoLocation:
-    if not GOOGLE_MAPS_API_KEY or GOOGLE_MAPS_API_KEY == "":
+    if geocoder is None:
         raise HTTPException(status_code=500, detail="Google Maps API key is not configured")
     
-    # This function will get the location of the given address
-    
-    # Geocoding an address
-    geocode_result = gmaps.geocode(address)
+    # This function will get the location of the given address, from the cache when it was looked up before
+    location = geocoder.geocode(address)
 
-    # Check if geocode_result is empty
-    if not geocode_result:
+    # Check if a location was found
+    if location is None:
         raise HTTPException(status_code=404, detail="No geolocation data found for this address")
 
-    logging.info(f"Geolocation found {geocode_result}")
-    
-    # Extract the formatted_address and location
-    location = GeoLocation(
-        formatted_address=geocode_result[0]['formatted_address'],
-        latitude=geocode_result[0]['geometry']['location']['lat'],
-        longitude=geocode_result[0]['geometry']['location']['lng']
-    )
-
     logging.info(f"Location found {location}")
-    return location
\ No newline at end of file
+    return location
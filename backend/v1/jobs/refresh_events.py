@@ -1,14 +1,22 @@
 from v1.db.external_events import (
     clean_external_events,
-    get_stored_external_event_details,
+    get_stored_external_event_details_for_date,
+)
+from v1.db.external_feed_fingerprints import (
+    get_feed_fingerprints,
+    remove_feed_fingerprints_except,
+    store_feed_fingerprints,
 )
 from v1.external.event_api import (
     get_external_root,
     get_external_event_details,
     get_booked_external_events,
 )
+from v1.external.event_images import cache_event_images, event_images_due
 from v1.db.external_bookings import upsert_user_bookings, delete_user_bookings
 from v1.db.mongo import tokenstorage_collection
+from v1.events.events_db import prune_tombstones, sync_external_events
+from v1.db.data_versions import bump_version, BOOKINGS, EVENT_CATALOG
 import logging
 
 def refresh_external_events():
@@ -17,42 +25,77 @@ def refresh_external_events():
         logging.error("Failed to fetch external root or missing data.")
         return
 
+    # Feeds whose fingerprint is unchanged are neither validated nor stored again
+    fingerprints = get_feed_fingerprints()
+    feeds = [get_external_event_details(root.restUrl, date, fingerprints.get(date)) for date in root.dates]
+    # A feed that keeps failing records no fingerprint, so compare only new events and dropped dates
+    feeds_changed = any(feed.events is not None for feed in feeds) or bool(set(fingerprints) - set(root.dates))
+
+    # Refresh per-user booking cache, the attendees of the unified events
+    bookings_changed = refresh_external_bookings()
+
+    # Images that failed to fetch are retried even when the feeds are unchanged
+    images_due = not feeds_changed and event_images_due()
+
+    if not feeds_changed and not bookings_changed and not images_due:
+        logging.info("External event feeds and bookings are unchanged.")
+        prune_tombstones()
+        return
+
     all_external_events = []
-    for date in root.dates:
-        date_external_events = get_external_event_details(root.restUrl, date)
-        if date_external_events:
-            all_external_events.extend(date_external_events)
-
-    # Remove external events that are not in the list of all_external_events
-    clean_external_events(keeping=all_external_events)
-
-    # Triple checking. Check that each of all_external_events is still in the database,
-    # using get_stored_external_event_details
-    for event in all_external_events:
-        event_id = event.eventId
-        # Check if the event is in the database
-        stored_event = get_stored_external_event_details(event_ids=[event_id])
-        if not stored_event:
-            logging.error(f"Event {event_id} not found in the database after cleaning.")
-            continue
-
-    # Refresh per-user booking cache after events are updated
-    refresh_external_bookings()
-
-
-def refresh_external_bookings():
-    """Refresh the external_event_bookings collection for all users with stored tokens."""
+    for feed in feeds:
+        if feed.events is not None:
+            all_external_events.extend(feed.events)
+        else:
+            all_external_events.extend(get_stored_external_event_details_for_date(feed.date))
+
+    if feeds_changed:
+        # Remove external events that are not in the list of all_external_events
+        clean_external_events(keeping=all_external_events)
+
+    if feeds_changed or images_due:
+        # Point the events at local copies of their images
+        try:
+            cache_event_images(all_external_events)
+        except Exception as e:
+            logging.error(f"Failed to cache external event images: {e}")
+
+    # Rebuild the materialized unified events from the refreshed events and bookings
+    try:
+        changed = sync_external_events(all_external_events)
+    except Exception as e:
+        logging.error(f"Failed to sync unified external events: {e}")
+        changed = True
+    else:
+        # Only a fully processed feed is skipped by the next refresh
+        store_feed_fingerprints([feed.fingerprint for feed in feeds if feed.fingerprint])
+        remove_feed_fingerprints_except(root.dates)
+    if changed:
+        bump_version(EVENT_CATALOG)
+    prune_tombstones()
+
+
+def refresh_external_bookings() -> bool:
+    """
+    Refresh the external_event_bookings collection for all users with stored tokens.
+
+    :return: True if any user's bookings changed.
+    """
     try:
         user_ids = [doc["userId"] for doc in tokenstorage_collection.find({}, {"userId": 1})]
     except Exception as e:
         logging.error(f"[refresh_external_bookings] Failed to fetch token holders: {e}")
-        return
+        return False
 
     logging.info(f"[refresh_external_bookings] Refreshing bookings for {len(user_ids)} users")
+    changed = False
     for user_id in user_ids:
         try:
             booked = get_booked_external_events(user_id)
             event_ids = [e.eventId for e in booked]
-            upsert_user_bookings(userId=user_id, event_ids=event_ids)
+            changed = upsert_user_bookings(userId=user_id, event_ids=event_ids) or changed
         except Exception as e:
             logging.warning(f"[refresh_external_bookings] Skipping userId={user_id}: {e}")
+    if changed:
+        bump_version(BOOKINGS)
+    return changed
@@ -1,5 +1,7 @@
 from v1.external.event_api import get_external_root
 from v1.external.event_site_news import get_event_site_news
+from v1.db.event_site_news import store_news
+from v1.db.data_versions import bump_version, NEWS
 import logging
 
 def refresh_external_news():
@@ -8,4 +10,8 @@ def refresh_external_news():
         logging.error("Failed to fetch external root or missing restUrl.")
         return
 
-    get_event_site_news(root.restUrl)
\ No newline at end of file
+    news = get_event_site_news(root.restUrl)
+    if news is None:
+        return
+    if store_news(news):
+        bump_version(NEWS)
@@ -1,6 +1,10 @@
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
 from fastapi import Depends, HTTPException
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from v1.token_handler import verify_access_token
+from v1.db.models.user import settings_version
 from v1.db.users import get_user
 import logging
 
@@ -8,6 +12,30 @@ logger = logging.getLogger(__name__)
 
 bearer_scheme = HTTPBearer()
 
+# Viewer settings by user id, as (settings version, settings, time stored), for validate_claims.
+# Entries expire so that a settings change made through another worker is seen within the TTL.
+VIEWER_CACHE_TTL = 60.0
+VIEWER_CACHE_SIZE = 10000
+_viewer_settings: "OrderedDict[int, Tuple[str, dict, float]]" = OrderedDict()
+
+
+def remember_viewer(user: Optional[dict]) -> None:
+    """Record a freshly read or written user's settings for :func:`validate_claims`."""
+    if not user:
+        return
+    settings = user.get("settings") or {}
+    _viewer_settings[user["userId"]] = (settings_version(settings), settings, time.monotonic())
+    _viewer_settings.move_to_end(user["userId"])
+    if len(_viewer_settings) > VIEWER_CACHE_SIZE:
+        _viewer_settings.popitem(last=False)
+
+
+def _cached_viewer_settings(user_id: int, version: str) -> Optional[dict]:
+    entry = _viewer_settings.get(user_id)
+    if entry is None or entry[0] != version or time.monotonic() - entry[2] > VIEWER_CACHE_TTL:
+        return None
+    return entry[1]
+
 
 async def validate_request(
         bearer: HTTPAuthorizationCredentials = Depends(bearer_scheme)):
@@ -18,6 +46,7 @@ async def validate_request(
                 logger.error("Invalid token: ", bearer.credentials)
                 raise HTTPException(status_code=401, detail="Unauthorized")
             user = get_user(int(payload.get("sub")))
+            remember_viewer(user)
             return user
         except Exception as e:
             logging.error("Error validating token: ", bearer.credentials)
@@ -28,6 +57,49 @@ async def validate_request(
         raise HTTPException(status_code=403, detail="Unauthorized")
 
 
+async def validate_token(
+        bearer: HTTPAuthorizationCredentials = Depends(bearer_scheme)):
+    """Check the access token without fetching the user; returns the token payload.
+
+    For endpoints that only need an authenticated caller, not the caller's data.
+    """
+    valid, payload = verify_access_token(bearer.credentials)
+    if not valid:
+        logging.error(f"Invalid token: {payload}")
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    return payload
+
+
+async def validate_claims(
+        bearer: HTTPAuthorizationCredentials = Depends(bearer_scheme)):
+    """Authenticate from the access token's claims; returns the viewer's userId, isMember and settings.
+
+    For endpoints that only need to know who is looking, not the full user. Tokens carrying a
+    settings version (`sv`) that matches the settings this worker last saw for the user are
+    accepted without a database read. Older tokens and stale versions fall back to fetching
+    the user, like :func:`validate_request`.
+    """
+    valid, payload = verify_access_token(bearer.credentials)
+    if not valid:
+        logging.error(f"Invalid token: {payload}")
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    try:
+        user_id = int(payload.get("sub"))
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=401, detail="Unauthorized")
+
+    version = payload.get("sv")
+    settings = _cached_viewer_settings(user_id, version) if version else None
+    if settings is not None:
+        return {"userId": user_id, "isMember": payload.get("mem", False), "settings": settings}
+
+    user = get_user(user_id)
+    if not user:
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    remember_viewer(user)
+    return user
+
+
 async def require_member(
         current_user: dict = Depends(validate_request)):
     if not current_user or not current_user['isMember']:
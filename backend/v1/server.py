@@ -12,12 +12,15 @@ import logging
 from v1.jobs.scheduler import create_scheduler
 from v1.google_maps_api.geolocation_api import geolocation_v1
 from v1.api.auth import auth_v1
+from v1.api.bootstrap import bootstrap_v1
 from v1.api.health import health_v1
 from v1.api.users import users_v1
+from v1.api.user_locations import user_locations_v1
 from v1.api.interests import interests_v1
 from v1.api.profile_options import profile_options_v1
 from v1.api.external_events import events_v1
 from v1.api.feedback import feedback_v1
+from v1.api.news import news_v1
 from v1.events.events_api import unified_events_v1
 from v1.external.event_site_news import get_event_site_news
 from v1.external.event_api import get_external_root, get_external_event_details
@@ -27,6 +30,8 @@ from v1.db.mongo import initialize_db
 from migrations.rename_privacy_settings import run as run_migrations
 from v1.dev.exception_handlers import register_exception_handlers
 from v1.update_check_middleware import UpdateCheckMiddleware
+from v1.compression_middleware import CompressionMiddleware
+from v1.shared.image_store import IMAGE_STORE_ROOT, IMAGE_STORE_URL_PREFIX, ImmutableStaticFiles
 from v1.utilities import get_current_time_formatted
 
 # Initialize logging
@@ -49,16 +54,21 @@ app.add_middleware(
         "x-latest-version",
         "x-latest-build",
         "x-store-url",
+        "x-next-cursor",
+        "etag",
     ],
 )
 
 register_exception_handlers(app)
 
 app.add_middleware(UpdateCheckMiddleware)
+app.add_middleware(CompressionMiddleware)
 
 app.include_router(auth_v1)
+app.include_router(bootstrap_v1)
 app.include_router(health_v1)
 app.include_router(users_v1)
+app.include_router(user_locations_v1)
 app.include_router(interests_v1)
 app.include_router(profile_options_v1)
 app.include_router(events_v1)
@@ -66,6 +76,9 @@ app.include_router(unified_events_v1)
 app.include_router(user_events_v1)
 app.include_router(geolocation_v1)
 app.include_router(feedback_v1)
+app.include_router(news_v1)
+# Content-addressed images first, so that they get immutable caching headers
+app.mount(IMAGE_STORE_URL_PREFIX, ImmutableStaticFiles(directory=IMAGE_STORE_ROOT, check_dir=False), name="image_store")
 app.mount("/static/img", StaticFiles(directory="/static/img"), name="static")
 
 if os.getenv("ENABLE_DEV_ENDPOINTS") == "true":
@@ -81,6 +94,11 @@ def initialize_app():
     init_feedback_votes()
     from v1.db.feedback_user_index import initialize_indexes as init_feedback_user_index
     init_feedback_user_index()
+    from v1.db.geocode_cache import initialize_indexes as init_geocode_cache
+    init_geocode_cache()
+    from v1.events.events_db import initialize_indexes as init_events, rebuild_events
+    init_events()
+    rebuild_events()
 
     scheduler = create_scheduler()
     scheduler.start()
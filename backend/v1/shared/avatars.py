@@ -0,0 +1,89 @@
+"""
+Avatar storage.
+
+An upload is read with a size cap, validated by decoding it with Pillow, and stored in the
+content-addressed image store (v1/shared/image_store.py) together with square thumbnails in
+AVATAR_THUMBNAIL_SIZES for the map and attendee lists. Replacing an avatar releases the
+previous images. The functions here block on image work; call them from the threadpool.
+"""
+import io
+from typing import BinaryIO, Dict, Optional, Tuple
+
+from fastapi import HTTPException
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from v1.shared.image_store import release_image, store_image_bytes
+
+MAX_AVATAR_BYTES = 10 * 1024 * 1024
+MAX_AVATAR_PIXELS = 40_000_000
+AVATAR_THUMBNAIL_SIZES = (64, 256)
+
+_CHUNK_SIZE = 64 * 1024
+_FORMATS = {"JPEG": ".jpg", "PNG": ".png"}
+
+
+def _read_capped(source: BinaryIO, max_bytes: int) -> bytes:
+    buffer = io.BytesIO()
+    while chunk := source.read(_CHUNK_SIZE):
+        if buffer.tell() + len(chunk) > max_bytes:
+            raise HTTPException(status_code=413, detail=f"Avatar is larger than {max_bytes // (1024 * 1024)} MB")
+        buffer.write(chunk)
+    return buffer.getvalue()
+
+
+def _validate(data: bytes) -> str:
+    """Check that the data is a JPEG or PNG image Pillow can decode; returns its file extension."""
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            if image.format not in _FORMATS:
+                raise HTTPException(status_code=400, detail="Invalid file type. Only JPG and PNG are allowed.")
+            if image.width * image.height > MAX_AVATAR_PIXELS:
+                raise HTTPException(status_code=400, detail="Avatar image is too large")
+            image.verify()
+            extension = _FORMATS[image.format]
+        # verify() barely checks JPEG data, so decode the pixels to catch truncated uploads
+        with Image.open(io.BytesIO(data)) as image:
+            image.load()
+        return extension
+    except (UnidentifiedImageError, OSError, SyntaxError, Image.DecompressionBombError):
+        raise HTTPException(status_code=400, detail="Invalid image file")
+
+
+def _thumbnails(data: bytes, extension: str) -> Dict[str, bytes]:
+    """Render square thumbnails of the image by size in pixels."""
+    thumbnails = {}
+    with Image.open(io.BytesIO(data)) as image:
+        image = ImageOps.exif_transpose(image)
+        if extension == ".jpg" and image.mode != "RGB":
+            image = image.convert("RGB")
+        for size in AVATAR_THUMBNAIL_SIZES:
+            thumbnail = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+            buffer = io.BytesIO()
+            if extension == ".jpg":
+                thumbnail.save(buffer, "JPEG", quality=85, optimize=True)
+            else:
+                thumbnail.save(buffer, "PNG", optimize=True)
+            thumbnails[str(size)] = buffer.getvalue()
+    return thumbnails
+
+
+def store_avatar(source: BinaryIO) -> Tuple[str, Dict[str, str]]:
+    """
+    Store an uploaded avatar with its thumbnails.
+
+    :param source: The uploaded file.
+    :return: The avatar URL and the thumbnail URLs by size.
+    :raises HTTPException: 413 if the upload is too large, 400 if it is not a JPEG or PNG image.
+    """
+    data = _read_capped(source, MAX_AVATAR_BYTES)
+    extension = _validate(data)
+    thumbnails = _thumbnails(data, extension)
+    avatar_url = store_image_bytes(data, extension)
+    return avatar_url, {size: store_image_bytes(thumbnail, extension) for size, thumbnail in thumbnails.items()}
+
+
+def release_avatar(avatar_url: Optional[str], thumbnails: Optional[Dict[str, str]]) -> None:
+    """Release the images of a replaced avatar."""
+    release_image(avatar_url)
+    for url in (thumbnails or {}).values():
+        release_image(url)
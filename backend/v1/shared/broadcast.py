@@ -0,0 +1,102 @@
+"""
+In-process fan-out of version change notifications, fed by a shared version counter.
+
+Each worker process polls a Mongo-backed version counter (see v1.db.data_versions) while
+it has subscribers, and publishes the new version, or the changes loaded for it, to all
+of them. Writers in the same process call :meth:`VersionBroadcaster.poke` to have the
+counter read immediately instead of at the next poll; writes in other workers are picked
+up by the poll.
+
+Every subscriber has a bounded queue. A subscriber that falls behind is not allowed to
+hold up the others: it is marked as overflowed and should resynchronize and disconnect.
+"""
+import asyncio
+import logging
+from typing import Any, Callable, Optional, Set
+
+from starlette.concurrency import run_in_threadpool
+
+
+class Subscription:
+    def __init__(self, max_queue: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.overflowed = False
+
+    def offer(self, message: Any) -> None:
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+
+class VersionBroadcaster:
+    def __init__(self,
+                 name: str,
+                 read_version: Callable[[], int],
+                 poll_interval: float = 2.0,
+                 load_changes: Optional[Callable[[Optional[int], int], Any]] = None):
+        """
+        :param name: Name used in log messages.
+        :param read_version: Blocking function returning the current version.
+        :param poll_interval: Seconds between reads while there are subscribers.
+        :param load_changes: Optional blocking function (previous version, new version) -> message.
+            It is called once per worker and version, and its result is published instead of
+            the version.
+        """
+        self.name = name
+        self.read_version = read_version
+        self.poll_interval = poll_interval
+        self.load_changes = load_changes
+        self.version: Optional[int] = None
+        self._subscribers: Set[Subscription] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(self, max_queue: int = 16) -> Subscription:
+        """Register a subscriber and start polling if needed. Must be called on the event loop."""
+        subscription = Subscription(max_queue)
+        self._subscribers.add(subscription)
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._loop is not loop:
+            self._loop = loop
+            self._wake = asyncio.Event()
+            self._task = loop.create_task(self._run())
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscribers.discard(subscription)
+
+    def poke(self) -> None:
+        """Ask for the version to be read now. Safe to call from any thread."""
+        loop, wake = self._loop, self._wake
+        if not self._subscribers or loop is None or wake is None or loop.is_closed():
+            return
+        try:
+            loop.call_soon_threadsafe(wake.set)
+        except RuntimeError:
+            # The loop was closed in the meantime
+            pass
+
+    def publish(self, message: Any) -> None:
+        """Send a message to every subscriber."""
+        for subscription in list(self._subscribers):
+            subscription.offer(message)
+
+    async def _run(self) -> None:
+        while self._subscribers:
+            try:
+                version = await run_in_threadpool(self.read_version)
+                if version != self.version:
+                    message = version
+                    if self.load_changes is not None:
+                        message = await run_in_threadpool(self.load_changes, self.version, version)
+                    self.version = version
+                    self.publish(message)
+            except Exception as e:
+                logging.error(f"Failed to read {self.name} version: {e}")
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
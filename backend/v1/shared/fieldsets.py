@@ -0,0 +1,58 @@
+"""
+Sparse fieldsets: `?fields=a,b,c` on list endpoints.
+
+The requested fields are validated against the full response model, and the response is
+rendered with a model holding only those fields, so nothing else is serialized.
+"""
+from functools import lru_cache
+from typing import Iterable, List, Optional, Tuple, Type
+
+from fastapi import HTTPException, Response
+from pydantic import BaseModel, create_model
+
+from v1.shared.responses import JSON_MEDIA_TYPE, fast_response
+
+
+def parse_fields(fields: Optional[str], model: Type[BaseModel], always: Iterable[str] = ()) -> Optional[Tuple[str, ...]]:
+    """
+    Parse a comma separated `fields` parameter.
+
+    :param fields: The raw parameter, or None.
+    :param model: The full response model the fields must belong to.
+    :param always: Fields that are always included, like the id.
+    :return: The sorted field names, or None when all fields are requested.
+    """
+    if fields is None:
+        return None
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested - set(model.model_fields)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    return tuple(sorted(requested | set(always)))
+
+
+@lru_cache(maxsize=128)
+def subset_model(model: Type[BaseModel], fields: Tuple[str, ...]) -> Type[BaseModel]:
+    """Return a model with only `fields` of `model`, cached per field set."""
+    definitions = {name: (model.model_fields[name].annotation, model.model_fields[name]) for name in fields}
+    return create_model(f"{model.__name__}Fields", **definitions)
+
+
+def render_fields(items: List, model: Type[BaseModel], fields: Tuple[str, ...], response: Optional[Response] = None,
+                  media_type: str = JSON_MEDIA_TYPE) -> Response:
+    """
+    Render dicts or model instances with only the requested fields.
+
+    :param items: The user documents or models.
+    :param model: The full response model.
+    :param fields: The requested fields, see :func:`parse_fields`.
+    :param response: The route's Response, whose headers are kept.
+    :param media_type: The negotiated media type, see :func:`v1.shared.responses.preferred_media_type`.
+    :return: The response.
+    """
+    subset = subset_model(model, fields)
+    rows = []
+    for item in items:
+        values = item if isinstance(item, dict) else {name: getattr(item, name) for name in fields}
+        rows.append(subset(**{name: values[name] for name in fields if name in values}))
+    return fast_response(rows, media_type, response)
@@ -0,0 +1,50 @@
+import hashlib
+from typing import Dict, Optional
+
+from fastapi import Request, Response
+
+
+def make_version(*parts) -> str:
+    """Build an opaque version string from the values that a payload is derived from."""
+    return hashlib.sha256(repr(parts).encode("utf-8")).hexdigest()[:32]
+
+
+def make_etag(*parts) -> str:
+    """Build a strong ETag from the values that the response is derived from."""
+    return f'"{make_version(*parts)}"'
+
+
+def etag_matches(request: Request, etag: Optional[str]) -> bool:
+    """Return True if the request's If-None-Match header matches `etag`."""
+    if not etag:
+        return False
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in header.split(",")]
+    return etag in candidates or f"W/{etag}" in candidates
+
+
+def not_modified(etag: str, headers: Optional[dict] = None) -> Response:
+    """Build an empty 304 Not Modified response for `etag`."""
+    return Response(status_code=304, headers={"ETag": etag, **(headers or {})})
+
+
+def accept_weights(header: Optional[str]) -> Dict[str, float]:
+    """Parse an Accept or Accept-Encoding header into lowercased values and their q weights."""
+    weights = {}
+    for part in (header or "").split(","):
+        value, *params = [item.strip() for item in part.split(";")]
+        if not value:
+            continue
+        q = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        weights[value.lower()] = max(q, weights.get(value.lower(), 0.0))
+    return weights
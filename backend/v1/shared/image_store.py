@@ -0,0 +1,123 @@
+"""
+Content-addressed image storage.
+
+Images are stored under IMAGE_STORE_ROOT named by the SHA-256 of their content, sharded into
+two directory levels (`ab/cd/abcd...jpg`). Identical uploads are stored once, and a file never
+changes once written, so it is served with a far-future `Cache-Control: immutable` and the
+content hash as its ETag (:class:`ImmutableStaticFiles`). Files are reference counted in the
+`image_refs` collection, keyed by their path in the store, and deleted when the last reference
+is released.
+"""
+import hashlib
+import os
+import tempfile
+from typing import BinaryIO, Optional
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+from v1.db.image_refs import add_image_ref, has_image_ref, release_image_ref
+
+IMAGE_STORE_ROOT = "/static/img/cas"
+IMAGE_STORE_URL_PREFIX = "/static/img/cas"
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+_CHUNK_SIZE = 64 * 1024
+
+
+def _relative_path(digest: str, extension: str) -> str:
+    return os.path.join(digest[:2], digest[2:4], digest + extension)
+
+
+def _move_into_place(temp_path: str, digest: str, extension: str) -> str:
+    """Reference the image and move the temporary file into the store."""
+    relative = _relative_path(digest, extension)
+    path = os.path.join(IMAGE_STORE_ROOT, relative)
+    add_image_ref(relative)
+    # Always (re)write the file after taking the reference: a concurrent release of the last
+    # reference may be deleting it. The content is the same, and the replace is atomic.
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    os.chmod(temp_path, 0o644)
+    os.replace(temp_path, path)
+    return f"{IMAGE_STORE_URL_PREFIX}/{relative}"
+
+
+def _temp_file(prefix: str = ".upload-") -> tuple:
+    os.makedirs(IMAGE_STORE_ROOT, exist_ok=True)
+    return tempfile.mkstemp(dir=IMAGE_STORE_ROOT, prefix=prefix)
+
+
+def store_image_bytes(data: bytes, extension: str) -> str:
+    """
+    Store an image and take a reference to it.
+
+    :param data: The image content.
+    :param extension: The file extension including the dot, e.g. ".jpg".
+    :return: The image URL.
+    """
+    fd, temp_path = _temp_file()
+    with os.fdopen(fd, "wb") as target:
+        target.write(data)
+    return _move_into_place(temp_path, hashlib.sha256(data).hexdigest(), extension)
+
+
+def store_image_file(source: BinaryIO, extension: str, max_bytes: Optional[int] = None) -> str:
+    """
+    Stream an image into the store, hashing it on the way, and take a reference to it.
+
+    :param source: The file to read.
+    :param extension: The file extension including the dot, e.g. ".jpg".
+    :param max_bytes: Size limit; larger files raise ValueError and are not stored.
+    :return: The image URL.
+    """
+    fd, temp_path = _temp_file()
+    digest = hashlib.sha256()
+    written = 0
+    try:
+        with os.fdopen(fd, "wb") as target:
+            while chunk := source.read(_CHUNK_SIZE):
+                written += len(chunk)
+                if max_bytes is not None and written > max_bytes:
+                    raise ValueError(f"Image is larger than {max_bytes} bytes")
+                digest.update(chunk)
+                target.write(chunk)
+        return _move_into_place(temp_path, digest.hexdigest(), extension)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def release_image(url: Optional[str]) -> None:
+    """Drop a reference taken by :func:`store_image_bytes` or :func:`store_image_file`, deleting the file if it was the last."""
+    if not url or not url.startswith(IMAGE_STORE_URL_PREFIX + "/"):
+        return
+    relative = url[len(IMAGE_STORE_URL_PREFIX) + 1:]
+    if not release_image_ref(relative):
+        return
+    path = os.path.join(IMAGE_STORE_ROOT, relative)
+    # Move the file aside first, and put it back if the image was stored again meanwhile
+    fd, trash_path = _temp_file(".release-")
+    os.close(fd)
+    try:
+        os.replace(path, trash_path)
+    except FileNotFoundError:
+        os.remove(trash_path)
+        return
+    if has_image_ref(relative):
+        os.replace(trash_path, path)
+    else:
+        os.remove(trash_path)
+
+
+class ImmutableStaticFiles(StaticFiles):
+    """Serves the image store: the content hash is the ETag, and files may be cached forever."""
+
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200) -> Response:
+        response = FileResponse(full_path, status_code=status_code, stat_result=stat_result)
+        digest = os.path.splitext(os.path.basename(full_path))[0]
+        response.headers["etag"] = f'"{digest}"'
+        response.headers["cache-control"] = IMMUTABLE_CACHE_CONTROL
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        return response
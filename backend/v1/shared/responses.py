@@ -0,0 +1,123 @@
+"""
+Fast JSON responses for data the application constructed itself.
+
+FastAPI validates a route's return value against its `response_model`, dumps it to
+primitives and then encodes it with the standard library json module. For large lists
+built from models we already trust (stored events, validated users) that is wasted work.
+
+:class:`FastJSONResponse` encodes with orjson instead. Pydantic models inside the content
+are dumped by pydantic-core without being validated again, with the same aliases and
+`json_encoders` (see :class:`v1.shared.model_with_id.ModelWithId`) as the normal path.
+ObjectIds are encoded as strings, as configured for the FastAPI encoders in server.py.
+
+Routes opt in by returning the response themselves, which also skips the response_model
+validation; the response_model then only documents the schema.
+
+List endpoints also speak MessagePack when the client sends `Accept: application/msgpack`.
+Both encodings go through :func:`to_primitive`, so a MessagePack payload decodes to exactly
+what the JSON payload parses to (datetimes stay ISO 8601 strings).
+"""
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Optional
+
+import msgpack
+import orjson
+from bson import ObjectId
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from v1.shared.http_cache import accept_weights
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+_MSGPACK_ALIASES = {MSGPACK_MEDIA_TYPE, "application/x-msgpack"}
+_JSON_RANGES = {JSON_MEDIA_TYPE, "application/*", "*/*"}
+
+
+def to_primitive(obj: Any) -> Any:
+    """Convert the values the encoders can't handle natively. Used as their `default` hook."""
+    if isinstance(obj, BaseModel):
+        return obj.__pydantic_serializer__.to_python(obj, mode="json", by_alias=True)
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    # orjson encodes these itself, MessagePack has no equivalent types
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, Enum):
+        return obj.value
+    raise TypeError(f"Type is not serializable: {type(obj).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """Encode content to JSON bytes, see :func:`to_primitive`."""
+    return orjson.dumps(content, default=to_primitive, option=orjson.OPT_NON_STR_KEYS)
+
+
+def packb(content: Any) -> bytes:
+    """Encode content to MessagePack bytes, see :func:`to_primitive`."""
+    return msgpack.packb(content, default=to_primitive, use_bin_type=True)
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class MsgPackResponse(Response):
+    media_type = MSGPACK_MEDIA_TYPE
+
+    def render(self, content: Any) -> bytes:
+        return packb(content)
+
+
+def preferred_media_type(request: Request) -> str:
+    """
+    Pick JSON or MessagePack from the request's Accept header. JSON is the default, and
+    MessagePack is chosen when the client accepts it at least as much as JSON.
+
+    :param request: The request.
+    :return: JSON_MEDIA_TYPE or MSGPACK_MEDIA_TYPE.
+    """
+    weights = accept_weights(request.headers.get("accept"))
+    msgpack_q = max((weights.get(media_type, 0.0) for media_type in _MSGPACK_ALIASES), default=0.0)
+    json_q = max((weights.get(media_type, 0.0) for media_type in _JSON_RANGES), default=0.0)
+    return MSGPACK_MEDIA_TYPE if msgpack_q > 0 and msgpack_q >= json_q else JSON_MEDIA_TYPE
+
+
+def variant_etag(etag: Optional[str], media_type: str) -> Optional[str]:
+    """Return the ETag of the `media_type` encoding of a response tagged `etag`."""
+    if not etag or media_type == JSON_MEDIA_TYPE:
+        return etag
+    return f'"{etag.strip(chr(34))}-msgpack"'
+
+
+def fast_json(content: Any, response: Optional[Response] = None, status_code: int = 200) -> FastJSONResponse:
+    """
+    Build a :class:`FastJSONResponse`, keeping the headers set on the route's injected Response.
+
+    :param content: Models, dicts and lists to encode.
+    :param response: The `response: Response` parameter of the route, if any.
+    :param status_code: The status code.
+    :return: The response.
+    """
+    headers = dict(response.headers) if response is not None else None
+    return FastJSONResponse(content, status_code=status_code, headers=headers)
+
+
+def fast_response(content: Any, media_type: str, response: Optional[Response] = None) -> Response:
+    """
+    Build a JSON or MessagePack response for a negotiated endpoint, see :func:`preferred_media_type`.
+
+    :param content: Models, dicts and lists to encode.
+    :param media_type: The negotiated media type.
+    :param response: The `response: Response` parameter of the route, if any.
+    :return: The response, with `Vary: Accept`.
+    """
+    headers = {**(dict(response.headers) if response is not None else {}), "Vary": "Accept"}
+    if media_type == MSGPACK_MEDIA_TYPE:
+        return MsgPackResponse(content, headers=headers)
+    return FastJSONResponse(content, headers=headers)
@@ -0,0 +1,35 @@
+"""
+Constant responses, serialized once.
+
+A :class:`StaticPayload` holds the JSON body of a value that never changes while the
+process runs, with a content hash used as its ETag and version.
+"""
+import hashlib
+from typing import Any
+
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+
+from v1.shared.http_cache import etag_matches, not_modified
+
+# Constant payloads may be cached by the client for a day; they are revalidated by ETag after that.
+STATIC_CACHE_CONTROL = "private, max-age=86400"
+
+
+class StaticPayload:
+    def __init__(self, value: Any, annotation: Any):
+        """
+        :param value: The constant value.
+        :param annotation: The type to serialize it as, e.g. List[InterestCategory].
+        """
+        self.value = value
+        self.body: bytes = TypeAdapter(annotation).dump_json(value)
+        self.version: str = hashlib.sha256(self.body).hexdigest()[:32]
+        self.etag = f'"{self.version}"'
+
+    def response(self, request: Request) -> Response:
+        """Serve the payload, or 304 Not Modified if the client has it."""
+        headers = {"ETag": self.etag, "Cache-Control": STATIC_CACHE_CONTROL}
+        if etag_matches(request, self.etag):
+            return not_modified(self.etag, headers)
+        return Response(content=self.body, media_type="application/json", headers=headers)
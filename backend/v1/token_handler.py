@@ -1,5 +1,11 @@
-from datetime import timedelta
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
 from v1.env_constants import SECRET_KEY
+from v1.db.models.user import settings_version
 from v1.utilities import get_current_time, get_time_from_timestamp
 import jwt
 from cryptography.fernet import Fernet
@@ -7,6 +13,16 @@ from cryptography.fernet import Fernet
 access_token_expiry_delta = timedelta(minutes=15)
 refresh_token_expiry_delta = timedelta(hours=24)
 
+# Verified token payloads by token digest, dropped when the token expires
+VERIFIED_CACHE_SIZE = 4096
+# Rejected tokens by digest, with the error message, kept for REJECTED_CACHE_TTL seconds
+REJECTED_CACHE_SIZE = 4096
+REJECTED_CACHE_TTL = 30.0
+
+_verified: "OrderedDict[bytes, dict]" = OrderedDict()
+_rejected: "OrderedDict[bytes, Tuple[str, float]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
 
 def generate_secret_key():
     """
@@ -48,24 +64,39 @@ def get_token_expiry(token: str):
         return None
 
 
-def create_token(userId, expiry_delta, type):
+def create_token(userId, expiry_delta, type, claims: Optional[dict] = None):
     """
     Create a JWT token with the given userId, expiry, and type.
 
+    Uses :func:`create_token_with_expiry`.
+
     :param userId: The userId associated with the token.
     :type userId: str
     :param expiry_delta: The expiration time for the token.
     :type expiry: datetime.timedelta
     :param type: The type of the token.
     :type type: str
+    :param claims: Extra claims to embed in the token.
+    :type claims: dict
     :return: The encoded JWT token.
     :rtype: str
     """
+    return create_token_with_expiry(userId, expiry_delta, type, claims)[0]
+
+
+def create_token_with_expiry(userId, expiry_delta, type, claims: Optional[dict] = None) -> Tuple[str, datetime]:
+    """
+    Create a JWT token, see :func:`create_token`.
+
+    :return: The encoded JWT token, and its expiry time as encoded in the token.
+    """
     iat = get_current_time()
     exp = iat + expiry_delta
 
-    payload = {'exp': exp, 'iat': iat, 'sub': str(userId), 'type': type}
-    return jwt.encode(payload, get_or_create_jwt_secret(), algorithm='HS256')
+    payload = {'exp': exp, 'iat': iat, 'sub': str(userId), 'type': type, **(claims or {})}
+    token = jwt.encode(payload, get_or_create_jwt_secret(), algorithm='HS256')
+    # The token holds whole seconds
+    return token, exp.replace(microsecond=0)
 
 
 def create_refresh_token(userId):
@@ -81,16 +112,34 @@ def create_refresh_token(userId):
     return create_token(userId, refresh_token_expiry_delta, 'refresh')
 
 
-def create_access_token(userId):
+def create_access_token(userId, user: Optional[dict] = None):
     """
     Create an access token for the given userId.
 
+    If the user document is given, the token also carries the user's membership (`mem`) and
+    settings version (`sv`), so that claims-only endpoints can authenticate without fetching
+    the user. See :func:`v1.request_filter.validate_claims`.
+
     :param userId: The userId for which the access token is created.
     :type userId: str
+    :param user: The user document.
+    :type user: dict
     :return: The access token.
     :rtype: str
     """
-    return create_token(userId, access_token_expiry_delta, 'access')
+    return create_access_token_with_expiry(userId, user)[0]
+
+
+def create_access_token_with_expiry(userId, user: Optional[dict] = None) -> Tuple[str, datetime]:
+    """
+    Create an access token, see :func:`create_access_token`.
+
+    :return: The access token and its expiry time, without decoding the token again.
+    """
+    claims = None
+    if user is not None:
+        claims = {'mem': bool(user.get('isMember', False)), 'sv': settings_version(user.get('settings'))}
+    return create_token_with_expiry(userId, access_token_expiry_delta, 'access', claims)
 
 
 def verify_token(token, type):
@@ -107,17 +156,58 @@ def verify_token(token, type):
         - If the token is valid, the first element of the tuple is True and the second element is the token payload.
         - If the token is invalid, the first element of the tuple is False and the second element is the error message.
     """
+    valid, result = _decode_cached(token)
+    if valid and result['type'] != type:
+        return False, 'Invalid token type'
+    return valid, result
+
+
+def _decode_cached(token) -> Tuple[bool, object]:
+    """
+    Decode and verify a token, remembering the outcome.
+
+    Valid payloads are cached until the token expires, so a client reusing its access token
+    costs a digest and a dict lookup. Rejected tokens are cached for REJECTED_CACHE_TTL seconds.
+    """
+    key = hashlib.sha256(token.encode("utf-8") if isinstance(token, str) else token).digest()
+    now = time.time()
+    with _cache_lock:
+        payload = _verified.get(key)
+        if payload is not None:
+            if payload['exp'] > now:
+                _verified.move_to_end(key)
+                return True, payload
+            del _verified[key]
+            return False, 'Token expired'
+        rejected = _rejected.get(key)
+        if rejected is not None and rejected[1] > now:
+            return False, rejected[0]
+
     try:
         payload = jwt.decode(token,
                              get_or_create_jwt_secret(),
                              algorithms=['HS256'])
-        if payload['type'] != type:
-            raise jwt.InvalidTokenError('Invalid token type')
-        return True, payload
+        if not isinstance(payload.get('exp'), (int, float)) or 'type' not in payload:
+            raise jwt.InvalidTokenError('Missing exp or type claim')
     except jwt.ExpiredSignatureError:
-        return False, 'Token expired'
+        return False, _reject(key, 'Token expired', now)
     except jwt.InvalidTokenError as e:
-        return False, str(e)
+        return False, _reject(key, str(e), now)
+
+    with _cache_lock:
+        _verified[key] = payload
+        if len(_verified) > VERIFIED_CACHE_SIZE:
+            _verified.popitem(last=False)
+    return True, payload
+
+
+def _reject(key: bytes, message: str, now: float) -> str:
+    with _cache_lock:
+        _rejected[key] = (message, now + REJECTED_CACHE_TTL)
+        _rejected.move_to_end(key)
+        if len(_rejected) > REJECTED_CACHE_SIZE:
+            _rejected.popitem(last=False)
+    return message
 
 
 def verify_access_token(token):
@@ -1,21 +1,37 @@
 import json
 import logging
 import os
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.responses import JSONResponse
+import time
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 logger = logging.getLogger(__name__)
 
 POLICY_PATH = os.path.join(os.path.dirname(__file__), "mobile-update-policy.json")
-EXCLUDED_PATHS = ["/v1/health", "/docs", "/openapi.json"]
+EXCLUDED_PATHS = ("/v1/health", "/docs", "/openapi.json")
+
+# How often the policy file's mtime is checked, in seconds
+POLICY_CHECK_INTERVAL = 5.0
+
+PLATFORM_KEYS = {"ios": "Ios", "android": "Android"}
 
 
-def _load_policy() -> dict:
-    with open(POLICY_PATH, "r", encoding="utf-8") as f:
-        return json.load(f)
+class PlatformPolicy(NamedTuple):
+    """The update policy of one app on one platform, parsed once per policy file version."""
+    latest_version: Optional[Tuple[int, ...]]
+    min_supported: Optional[Tuple[int, ...]]
+    latest_build: Optional[int]
+    # Raw ASGI headers added to responses when a newer version is available
+    update_headers: List[Tuple[bytes, bytes]]
+    # Body of the 418 response sent when the app version is no longer supported
+    update_required_body: bytes
 
 
+@lru_cache(maxsize=256)
 def _parse_version(version_str: str | None) -> tuple[int, ...] | None:
     if not version_str:
         return None
@@ -25,101 +41,159 @@ def _parse_version(version_str: str | None) -> tuple[int, ...] | None:
         return None
 
 
-def _resolve_platform_policy(policy: dict, application_id: str, platform: str) -> dict | None:
-    apps = policy.get("MobileUpdatePolicy", {}).get("Apps", {})
-    app_policy = apps.get(application_id)
-    if app_policy is None:
-        logger.warning("Unknown application ID: %s", application_id)
-        return None
-
-    platform_key = "Ios" if platform.lower() == "ios" else "Android" if platform.lower() == "android" else None
-    if platform_key is None:
-        logger.warning("Unknown platform: %s", platform)
-        return None
+def _parse_platform_policy(platform_policy: dict) -> PlatformPolicy:
+    update_headers = [(b"x-update-available", b"true")]
+    if platform_policy.get("LatestVersion"):
+        update_headers.append((b"x-latest-version", platform_policy["LatestVersion"].encode("latin-1")))
+    if platform_policy.get("LatestBuildNumber") is not None:
+        update_headers.append((b"x-latest-build", str(platform_policy["LatestBuildNumber"]).encode("latin-1")))
+    if platform_policy.get("StoreUrl"):
+        update_headers.append((b"x-store-url", platform_policy["StoreUrl"].encode("latin-1")))
+
+    update_required_body = json.dumps({
+        "updateRequired": True,
+        "updateAvailable": True,
+        "latestVersion": platform_policy.get("LatestVersion"),
+        "latestBuildNumber": platform_policy.get("LatestBuildNumber"),
+        "storeUrl": platform_policy.get("StoreUrl"),
+    }, separators=(",", ":")).encode("utf-8")
+
+    return PlatformPolicy(
+        latest_version=_parse_version(platform_policy.get("LatestVersion")),
+        min_supported=_parse_version(platform_policy.get("MinSupportedVersion")),
+        latest_build=platform_policy.get("LatestBuildNumber"),
+        update_headers=update_headers,
+        update_required_body=update_required_body,
+    )
 
-    return app_policy.get(platform_key)
 
+def _parse_policy(policy: dict) -> Dict[str, Dict[str, PlatformPolicy]]:
+    """Parse the policy file into platform policies by application id and platform key."""
+    apps = policy.get("MobileUpdatePolicy", {}).get("Apps", {})
+    return {
+        application_id: {
+            platform_key: _parse_platform_policy(platform_policy)
+            for platform_key, platform_policy in app_policy.items()
+        }
+        for application_id, app_policy in apps.items()
+    }
+
+
+class PolicyStore:
+    """The parsed update policy, reloaded when the policy file's mtime changes."""
+
+    def __init__(self, path: str = POLICY_PATH, check_interval: float = POLICY_CHECK_INTERVAL):
+        self.path = path
+        self.check_interval = check_interval
+        self._policies: Optional[Dict[str, Dict[str, PlatformPolicy]]] = None
+        self._mtime: Optional[float] = None
+        self._checked_at = float("-inf")
+
+    def policies(self) -> Optional[Dict[str, Dict[str, PlatformPolicy]]]:
+        """Return the parsed policies, or None if the policy file has never loaded."""
+        now = time.monotonic()
+        if now - self._checked_at >= self.check_interval:
+            self._checked_at = now
+            self._reload_if_changed()
+        return self._policies
+
+    def _reload_if_changed(self) -> None:
+        try:
+            mtime = os.stat(self.path).st_mtime
+            if mtime == self._mtime:
+                return
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._policies = _parse_policy(json.load(f))
+            self._mtime = mtime
+        except Exception:
+            # Keep serving the previous policy
+            logger.exception("Error loading mobile update policy")
 
-def _is_update_required(current_version: tuple[int, ...], platform_policy: dict) -> bool:
-    min_supported = _parse_version(platform_policy.get("MinSupportedVersion"))
-    if min_supported is None:
+    def resolve(self, application_id: str, platform: str) -> Optional[PlatformPolicy]:
+        policies = self.policies()
+        if policies is None:
+            return None
+        app_policy = policies.get(application_id)
+        if app_policy is None:
+            logger.warning("Unknown application ID: %s", application_id)
+            return None
+        platform_key = PLATFORM_KEYS.get(platform.lower())
+        if platform_key is None:
+            logger.warning("Unknown platform: %s", platform)
+            return None
+        return app_policy.get(platform_key)
+
+
+def _is_update_required(current_version: tuple[int, ...], platform_policy: PlatformPolicy) -> bool:
+    if platform_policy.min_supported is None:
         return False
-    return current_version < min_supported
+    return current_version < platform_policy.min_supported
 
 
-def _is_newer_version_available(current_version: tuple[int, ...], build_number: int, platform_policy: dict) -> bool:
-    latest_version = _parse_version(platform_policy.get("LatestVersion"))
+def _is_newer_version_available(current_version: tuple[int, ...], build_number: int, platform_policy: PlatformPolicy) -> bool:
+    latest_version = platform_policy.latest_version
     if latest_version is None:
         return False
 
     if current_version < latest_version:
         return True
 
-    latest_build = platform_policy.get("LatestBuildNumber")
+    latest_build = platform_policy.latest_build
     if latest_build is not None and current_version == latest_version and build_number < latest_build:
         return True
 
     return False
 
 
-def _build_update_required_response(platform_policy: dict) -> JSONResponse:
-    return JSONResponse(
-        status_code=418,
-        content={
-            "updateRequired": True,
-            "updateAvailable": True,
-            "latestVersion": platform_policy.get("LatestVersion"),
-            "latestBuildNumber": platform_policy.get("LatestBuildNumber"),
-            "storeUrl": platform_policy.get("StoreUrl"),
-        },
-    )
-
+class UpdateCheckMiddleware:
+    def __init__(self, app: ASGIApp, policy_store: Optional[PolicyStore] = None):
+        self.app = app
+        self.policy_store = policy_store or PolicyStore()
 
-class UpdateCheckMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next) -> Response:
-        if any(request.url.path.startswith(p) for p in EXCLUDED_PATHS):
-            return await call_next(request)
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"].startswith(EXCLUDED_PATHS):
+            await self.app(scope, receive, send)
+            return
 
-        application_id = request.headers.get("x-application-id", "")
-        app_version = request.headers.get("x-app-version", "")
-        build_number_str = request.headers.get("x-build-number", "")
-        platform = request.headers.get("x-phone-os", "")
+        headers = Headers(scope=scope)
+        application_id = headers.get("x-application-id", "")
+        app_version = headers.get("x-app-version", "")
+        build_number_str = headers.get("x-build-number", "")
+        platform = headers.get("x-phone-os", "")
 
         if not all([application_id, app_version, build_number_str, platform]):
-            return await call_next(request)
+            await self.app(scope, receive, send)
+            return
 
         try:
             build_number = int(build_number_str)
         except ValueError:
             logger.warning("Invalid build number format: %s", build_number_str)
-            return await call_next(request)
+            await self.app(scope, receive, send)
+            return
 
         current_version = _parse_version(app_version)
         if current_version is None:
-            return await call_next(request)
-
-        try:
-            policy = _load_policy()
-        except Exception:
-            logger.exception("Error loading mobile update policy")
-            return await call_next(request)
+            await self.app(scope, receive, send)
+            return
 
-        platform_policy = _resolve_platform_policy(policy, application_id, platform)
+        platform_policy = self.policy_store.resolve(application_id, platform)
         if platform_policy is None:
-            return await call_next(request)
+            await self.app(scope, receive, send)
+            return
 
         if _is_update_required(current_version, platform_policy):
-            return _build_update_required_response(platform_policy)
+            response = Response(platform_policy.update_required_body, status_code=418, media_type="application/json")
+            await response(scope, receive, send)
+            return
 
-        response = await call_next(request)
+        if not _is_newer_version_available(current_version, build_number, platform_policy):
+            await self.app(scope, receive, send)
+            return
 
-        if _is_newer_version_available(current_version, build_number, platform_policy):
-            response.headers["x-update-available"] = "true"
-            if platform_policy.get("LatestVersion"):
-                response.headers["x-latest-version"] = platform_policy["LatestVersion"]
-            if platform_policy.get("LatestBuildNumber") is not None:
-                response.headers["x-latest-build"] = str(platform_policy["LatestBuildNumber"])
-            if platform_policy.get("StoreUrl"):
-                response.headers["x-store-url"] = platform_policy["StoreUrl"]
+        async def send_with_update_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", ()), *platform_policy.update_headers]
+            await send(message)
 
-        return response
+        await self.app(scope, receive, send_with_update_headers)
@@ -1,8 +1,11 @@
 from datetime import datetime, timedelta
+import logging
 from typing import List
 from bson import ObjectId
 from v1.user_events.user_events_model import ExtendedUserEvent, UserEvent
-from v1.db.mongo import user_event_collection, user_collection
+from v1.db.mongo import user_event_collection
+from v1.db.user_names import get_display_names, UNKNOWN_USER_NAME
+from v1.db.data_versions import bump_version, USER_EVENTS
 from v1.utilities import get_current_time
 
 
@@ -14,6 +17,7 @@ def create_user_event(user_event: dict) -> ObjectId:
     :return: The created user event ID as ObjectId.
     """
     result = user_event_collection.insert_one(user_event.model_dump())
+    _user_event_changed(result.inserted_id)
     return result.inserted_id
 
 
@@ -64,6 +68,7 @@ def update_user_event(event_id: str, user_event: UserEvent) -> bool:
 
     result = user_event_collection.update_one({"_id": ObjectId(event_id)},
                                               {"$set": event.model_dump()})
+    _user_event_changed(event_id)
     return result.acknowledged and result.matched_count > 0
 
 
@@ -75,6 +80,7 @@ def delete_user_event(event_id: str) -> bool:
     :return: The number of deleted documents.
     """
     result = user_event_collection.delete_one({"_id": ObjectId(event_id)})
+    _user_event_changed(event_id)
     return result.acknowledged
 
 
@@ -220,6 +226,7 @@ def add_attendee_to_user_event(event_id: str, user_id: int) -> bool:
                     "userId": user_id
                 }
             }})
+        _user_event_changed(event_id)
         return result.acknowledged and result.matched_count > 0
     except Exception:
         return False
@@ -240,6 +247,7 @@ def remove_attendee_from_user_event(event_id: str, user_id: int) -> bool:
                 "userId": user_id
             }
         }})
+    _user_event_changed(event_id)
     return result.acknowledged and result.matched_count > 0
 
 
@@ -292,6 +300,7 @@ def add_user_as_host_to_user_event(event_id: str, user_id: int) -> bool:
             }
         }
     })
+    _user_event_changed(event_id)
     return result.acknowledged and result.matched_count > 0
 
 
@@ -309,6 +318,7 @@ def remove_user_from_hosts_of_user_event(event_id: str, user_id: int) -> bool:
                 "userId": user_id
             }
         }})
+    _user_event_changed(event_id)
     return result.acknowledged and result.matched_count > 0
 
 
@@ -388,28 +398,35 @@ def remove_report_from_user_event(event_id: str, user_id: int) -> bool:
 ### Utilities ###
 
 
+def _user_event_changed(event_id) -> None:
+    """
+    Keep the materialized unified event and the user events version in step with a user event mutation.
+
+    :param event_id: The user event ID.
+    """
+    # Imported here, the unified events store is built on top of this module.
+    from v1.events.events_db import sync_user_event
+    try:
+        sync_user_event(str(event_id))
+    except Exception as e:
+        logging.error(f"Failed to sync unified event for user event {event_id}: {e}")
+    bump_version(USER_EVENTS)
+
+
 def extend_user_event(event: UserEvent) -> ExtendedUserEvent:
     return extend_user_events([event])[0]
 
 
 def extend_user_events(events: List[UserEvent]) -> List[ExtendedUserEvent]:
 
-    # Fetch user IDs
+    # Collect user IDs
     user_ids = set()
     for event in events:
         user_ids.add(event.userId)
-        user_ids.update(host.userId for host in event.hosts)
+        user_ids.update(host.userId for host in (event.hosts or []))
         user_ids.update(attendee.userId for attendee in event.attendees)
 
-    user_ids = list(user_ids)
-
-    # Fetch user names
-    user_names = {}
-    users = user_collection.find({"userId": {"$in": user_ids}})
-
-    for user in users:
-        user_id = user["userId"]
-        user_names[user_id] = f"{user['firstName']} {user['lastName']}"
+    user_names = get_display_names(user_ids)
 
     def extend_user_event(event: dict,
                           user_names: dict[int, str]) -> ExtendedUserEvent:
@@ -420,12 +437,14 @@ def extend_user_events(events: List[UserEvent]) -> List[ExtendedUserEvent]:
         :param user_names: A dictionary of user IDs and names.
         :return: The extended user event document.
         """
-        event["ownerName"] = user_names[event["userId"]]
+        event["ownerName"] = user_names.get(event["userId"], UNKNOWN_USER_NAME)
         event["hostNames"] = [
-            user_names[host["userId"]] for host in event["hosts"]
+            user_names.get(host["userId"], UNKNOWN_USER_NAME)
+            for host in (event["hosts"] or [])
         ]
         event["attendeeNames"] = [
-            user_names[attendee["userId"]] for attendee in event["attendees"]
+            user_names.get(attendee["userId"], UNKNOWN_USER_NAME)
+            for attendee in event["attendees"]
         ]
 
         return ExtendedUserEvent(**event)